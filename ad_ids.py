@@ -0,0 +1,45 @@
+import hashlib
+import re
+import urllib.parse
+
+# Токен оголошення в URL OLX: ".../obyavlenie/<slug>-IDXAhiv.html"
+_AD_TOKEN_RE = re.compile(r"-ID([0-9A-Za-z]+)\.html$")
+
+_BASE62_ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+_BASE62_INDEX = {char: i for i, char in enumerate(_BASE62_ALPHABET)}
+_INT64_MAX = 2 ** 63 - 1
+
+
+def canonical_link(url: str) -> str:
+    """
+    Нормалізує посилання на оголошення: прибирає query-параметри (трекінг, reason=...)
+    та фрагмент, приводить схему й хост до нижнього регістру.
+    """
+    parts = urllib.parse.urlsplit(url.strip())
+    return urllib.parse.urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, "", ""))
+
+
+def _decode_token(token: str) -> int | None:
+    value = 0
+    for char in token:
+        value = value * 62 + _BASE62_INDEX[char]
+    return value if 0 < value <= _INT64_MAX else None
+
+
+def extract_ad_id(url: str) -> int:
+    """
+    Повертає стабільний цілочисельний ідентифікатор оголошення.
+
+    Основне джерело — токен "ID..." в кінці URL OLX, який не змінюється разом зі slug
+    (назвою) оголошення; він однозначно переводиться в додатне число (base62).
+    Якщо токена немає, ідентифікатор береться з хешу канонічного посилання; такі
+    ідентифікатори від'ємні, щоб ніколи не перетинатися з отриманими з токена.
+    """
+    path = urllib.parse.urlsplit(url.strip()).path
+    match = _AD_TOKEN_RE.search(path)
+    if match:
+        ad_id = _decode_token(match.group(1))
+        if ad_id is not None:
+            return ad_id
+    digest = hashlib.blake2b(canonical_link(url).encode("utf-8"), digest_size=8).digest()
+    return -(int.from_bytes(digest, "big") >> 1) - 1
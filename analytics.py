@@ -0,0 +1,154 @@
+import argparse
+import os
+from datetime import date, timedelta
+
+from config import get_settings
+from logger_ import get_logger, setup_logging
+from storage import AdStore
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow — необов'язкова залежність, потрібна лише для вивантаження й аналітики
+    pa = None
+
+logger = get_logger(__name__)
+
+# Поля, за якими можна групувати медіану ціни
+GROUP_BY_FIELDS = ("district", "scrape_date", "currency")
+
+_EXPORT_META_KEY = "export:last_date"
+_EXPORT_BATCH_SIZE = 50000
+_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("Для вивантаження та аналітики потрібен pyarrow (pip install pyarrow).")
+
+
+def _partitioning():
+    return ds.partitioning(pa.schema([("scrape_date", pa.string())]), flavor="hive")
+
+
+def _timestamps(values: list[str | None]):
+    return pc.strptime(pa.array(values, pa.string()), format=_TIMESTAMP_FORMAT, unit="s", error_is_null=True)
+
+
+def _rows_to_table(rows: list[tuple]):
+    """Рядки AdStore.export_rows -> таблиця Arrow з типізованими колонками."""
+    ad_id, link, name, location, district, price_value, currency, area, listed_at, first_seen, last_seen = (
+        list(column) for column in zip(*rows))
+    price_array = pa.array(price_value, pa.float64())
+    area_array = pa.array(area, pa.float64())
+    # Ціна за м² лише там, де площа додатна
+    positive_area = pc.if_else(pc.greater(area_array, 0), area_array, pa.scalar(None, pa.float64()))
+    price_per_m2 = pc.round(pc.divide(price_array, positive_area), 2)
+    return pa.table({
+        "ad_id": pa.array(ad_id, pa.int64()),
+        "link": pa.array(link, pa.string()),
+        "name": pa.array(name, pa.string()),
+        "location": pa.array(location, pa.string()),
+        "district": pa.array(district, pa.string()),
+        "price_value": price_array,
+        "currency": pa.array(currency, pa.string()),
+        "area": area_array,
+        "price_per_m2": price_per_m2,
+        "listed_at": _timestamps(listed_at),
+        "first_seen": _timestamps(first_seen),
+        "last_seen": _timestamps(last_seen),
+        "scrape_date": pa.array([value[:10] for value in first_seen], pa.string()),
+    })
+
+
+def export_parquet(store: AdStore, export_dir: str | None = None, full: bool = False) -> int:
+    """
+    Вивантажує оголошення в Parquet (у OLX_EXPORT_DIR, якщо export_dir не задано), розбиті за датою,
+    коли їх уперше побачив парсер (scrape_date).
+    Без full перезаписуються лише розділи, починаючи з дня попереднього вивантаження, тож
+    щоденне оновлення не перечитує всю історію. Повертає кількість вивантажених оголошень.
+    Ціна та last_seen старших розділів лишаються такими, як на момент їх вивантаження (--full оновлює все).
+    """
+    _require_pyarrow()
+    export_dir = export_dir or get_settings().export_dir
+    since = None if full else store.get_meta(_EXPORT_META_KEY)
+    tables, after_id = [], 0
+    while True:
+        rows = store.export_rows(since, after_id, _EXPORT_BATCH_SIZE)
+        if not rows:
+            break
+        tables.append(_rows_to_table(rows))
+        after_id = rows[-1][0]
+    if not tables:
+        return 0
+    table = pa.concat_tables(tables)
+    # Розділи, що є в таблиці, записуються заново цілком; інші лишаються без змін
+    pq.write_to_dataset(table, export_dir, partitioning=_partitioning(),
+                        existing_data_behavior="delete_matching", basename_template="part-{i}.parquet")
+    last_date = pc.max(table["scrape_date"]).as_py()
+    store.set_meta(_EXPORT_META_KEY, last_date)
+    logger.info(f"Вивантажено {table.num_rows} оголошень у {export_dir} (розділи з {since or 'початку'} до {last_date}).")
+    return table.num_rows
+
+
+def load_history(export_dir: str | None = None, days: int | None = None, today: date | None = None):
+    """
+    Читає вивантаження за останні days днів (або все). Фільтр за scrape_date відкидає
+    зайві розділи ще до читання файлів.
+    """
+    _require_pyarrow()
+    export_dir = export_dir or get_settings().export_dir
+    if not os.path.isdir(export_dir):
+        raise FileNotFoundError(f"Вивантаження {export_dir} ще немає: запустіть python analytics.py")
+    dataset = ds.dataset(export_dir, format="parquet", partitioning=_partitioning())
+    if days is None:
+        return dataset.to_table()
+    since = ((today or date.today()) - timedelta(days=days - 1)).isoformat()
+    return dataset.to_table(filter=ds.field("scrape_date") >= since)
+
+
+def median_price(table, by: str = "district", currency: str = "UAH") -> list[dict]:
+    """
+    Медіана ціни та ціни за м² у валюті currency для кожного значення поля by (від найчисленніших груп).
+    Медіана рахується наближено (t-digest) — для цін оренди похибка значно менша за крок цін.
+    """
+    if by not in GROUP_BY_FIELDS:
+        raise ValueError(f"Групувати можна лише за {', '.join(GROUP_BY_FIELDS)}")
+    priced = table.filter(pc.and_(pc.equal(table["currency"], currency), pc.is_valid(table["price_value"])))
+    grouped = priced.group_by(by).aggregate([
+        ("price_value", "count"),
+        ("price_value", "approximate_median"),
+        ("price_per_m2", "approximate_median"),
+    ])
+    grouped = grouped.sort_by([("price_value_count", "descending"), (by, "ascending")])
+    return [
+        {
+            by: row[by],
+            "listings": row["price_value_count"],
+            "median_price": row["price_value_approximate_median"],
+            "median_price_per_m2": row["price_per_m2_approximate_median"],
+        }
+        for row in grouped.to_pylist()
+    ]
+
+
+def listings_per_day(table) -> list[dict]:
+    """Кількість нових оголошень за кожен день (за датою, коли їх уперше побачив парсер)."""
+    grouped = table.group_by("scrape_date").aggregate([("ad_id", "count_distinct")]).sort_by("scrape_date")
+    return [{"date": row["scrape_date"], "listings": row["ad_id_count_distinct"]} for row in grouped.to_pylist()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Вивантаження історії оголошень у Parquet.")
+    parser.add_argument("--dir", help="каталог вивантаження (за замовчуванням OLX_EXPORT_DIR)")
+    parser.add_argument("--full", action="store_true", help="перевивантажити всю історію, а не лише нові дні")
+    args = parser.parse_args()
+    setup_logging()
+    with AdStore() as store:
+        export_parquet(store, args.dir, full=args.full)
+
+
+if __name__ == "__main__":
+    main()
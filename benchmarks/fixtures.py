@@ -0,0 +1,136 @@
+import csv
+import glob
+import html
+import json
+import os
+import random
+
+# Рядки старого CSV (реальні назви, райони й ціни) — з них будуються синтетичні картки
+SAMPLE_CSV_PATH = os.path.join("csv", "all_ad.csv")
+
+_BASE62_ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+# Номери оголошень у фікстурах починаються звідси, щоб токени мали типову для OLX довжину
+_AD_NUMBER_OFFSET = 62 ** 4
+
+_FALLBACK_SAMPLE = {
+    "name": "Оренда 2-кімнатної квартири", "location": "Київ, Печерський",
+    "price": "20 000 грн.", "square": "55 м²",
+}
+
+
+def encode_token(number: int) -> str:
+    """Base62-токен оголошення, як у "-IDXAhiv.html" (обернене до ad_ids.extract_ad_id)."""
+    token = ""
+    while number:
+        number, rest = divmod(number, 62)
+        token = _BASE62_ALPHABET[rest] + token
+    return token or "0"
+
+
+def ad_link(number: int) -> str:
+    return f"https://www.olx.ua/d/uk/obyavlenie/kvartira-{number}-ID{encode_token(_AD_NUMBER_OFFSET + number)}.html"
+
+
+def load_samples(csv_path: str = SAMPLE_CSV_PATH) -> list[dict]:
+    try:
+        with open(csv_path, "r", encoding="utf-8", newline="") as file:
+            samples = [row for row in csv.DictReader(file) if row.get("name")]
+    except FileNotFoundError:
+        samples = []
+    return samples or [_FALLBACK_SAMPLE]
+
+
+class SyntheticCorpus:
+    """
+    Генератор сторінок результатів пошуку з розміткою, яку очікують парсери (parsers.py):
+    картки з тими самими CSS-класами та data-testid, блок пагінації і, за бажання,
+    вбудований JSON стан window.__PRERENDERED_STATE__. Вміст карток береться з рядків CSV.
+    Оголошення мають номери 0, 1, 2, ...; сторінка `page` містить номери
+    offset + (page - 1) * per_page ... offset + page * per_page - 1.
+    """
+
+    def __init__(self, per_page: int = 40, json_state: bool = True, padding_kb: int = 200, seed: int = 0):
+        self.per_page = per_page
+        self.json_state = json_state
+        self.samples = load_samples()
+        rng = random.Random(seed)
+        # Решта сторінки OLX (шапка, скрипти, стилі) — аби розмір був близький до реального
+        self.padding = "".join(
+            f'<div class="css-pad{i % 7}" data-x="{rng.random():.8f}"><span>{"·" * 40}</span></div>'
+            for i in range(padding_kb * 1024 // 90)
+        )
+
+    def sample(self, number: int) -> dict:
+        return self.samples[number % len(self.samples)]
+
+    def ad_numbers(self, page: int, offset: int = 0) -> range:
+        start = offset + (page - 1) * self.per_page
+        return range(start, start + self.per_page)
+
+    def _card(self, number: int) -> str:
+        sample = self.sample(number)
+        return (
+            f'<div class="css-l9drzq" data-cy="l-card" id="{number}"><div class="css-1sw7q4x">'
+            f'<a class="css-rc5s2u" href="{ad_link(number)}?reason=extended_search">'
+            f'<img src="https://ireland.apollo.olxcdn.com/v1/files/{number}/image;s=216x152" '
+            f'srcset="https://ireland.apollo.olxcdn.com/v1/files/{number}/image;s=216x152 1x" alt=""/>'
+            f'<h4 class="css-1sq4ur2">{html.escape(sample["name"])}</h4></a>'
+            f'<p data-testid="price" class="css-uj7mm0">{html.escape(sample.get("price") or "")}</p>'
+            f'<span class="css-6as4g5">{html.escape(sample.get("square") or "")}</span>'
+            f'<p data-testid="location-date" class="css-vbz67q">'
+            f'{html.escape(sample.get("location") or "")} - Сьогодні о {number % 24:02d}:{number % 60:02d}</p>'
+            f'</div></div>'
+        )
+
+    def _state_ad(self, number: int) -> dict:
+        sample = self.sample(number)
+        city, _, district = (sample.get("location") or "").partition(", ")
+        digits = "".join(char for char in sample.get("price") or "" if char.isdigit())
+        area = "".join(char for char in sample.get("square") or "" if char.isdigit() or char == ".")
+        return {
+            "id": _AD_NUMBER_OFFSET + number,
+            "title": sample["name"],
+            "url": ad_link(number),
+            "createdTime": f"2026-10-17T{number % 24:02d}:{number % 60:02d}:00+03:00",
+            "isBusiness": number % 3 == 0,
+            "location": {"cityName": city, "districtName": district},
+            "price": {"displayValue": sample.get("price"),
+                      "regularPrice": {"value": int(digits) if digits else None, "currencyCode": "UAH"}},
+            "params": [{"key": "total_area", "value": sample.get("square"), "normalizedValue": area}],
+        }
+
+    def page(self, page: int, total_pages: int, offset: int = 0) -> str:
+        numbers = self.ad_numbers(page, offset)
+        pagination = "".join(
+            f'<li data-testid="pagination-list-item-{i}"><a class="css-1mi714g" href="?page={i}">{i}</a></li>'
+            for i in range(1, total_pages + 1)
+        )
+        state = ""
+        if self.json_state:
+            payload = {"listing": {"listing": {"ads": [self._state_ad(n) for n in numbers], "totalPages": total_pages}}}
+            state_text = json.dumps(json.dumps(payload, ensure_ascii=False), ensure_ascii=False)
+            state = f"<script>window.__PRERENDERED_STATE__= {state_text};</script>"
+        return (
+            f"<!DOCTYPE html><html><head><title>OLX</title></head><body>{state}{self.padding}"
+            f'<div data-testid="listing-grid">{"".join(self._card(n) for n in numbers)}</div>'
+            f'<ul data-testid="pagination-list">{pagination}</ul></body></html>'
+        )
+
+
+class RecordedCorpus:
+    """
+    Записані сторінки результатів OLX (*.html з каталогу), що віддаються по колу.
+    Номери оголошень на них фіксовані, тож бенчмарки відбору нових оголошень для них не застосовні.
+    """
+
+    def __init__(self, fixtures_dir: str):
+        paths = sorted(glob.glob(os.path.join(fixtures_dir, "*.html")))
+        if not paths:
+            raise ValueError(f"У каталозі {fixtures_dir} немає записаних сторінок (*.html)")
+        self.pages = []
+        for path in paths:
+            with open(path, "r", encoding="utf-8") as file:
+                self.pages.append(file.read())
+
+    def page(self, page: int, total_pages: int, offset: int = 0) -> str:
+        return self.pages[(page - 1) % len(self.pages)]
@@ -0,0 +1,430 @@
+"""
+Офлайн-бенчмарки парсера: сторінки результатів віддає локальний HTTP-сервер, тож OLX не потрібен.
+
+    python -m benchmarks.run                                  # звіт у benchmarks/report.json
+    python -m benchmarks.run --pages 1,50,500 --history 10000,100000,1000000
+    python -m benchmarks.run --save-baseline                  # зафіксувати поточні числа як базові
+    python -m benchmarks.run --fixtures path/to/recorded/     # записані сторінки OLX замість синтетичних
+
+Якщо є файл базових результатів (--baseline), медіана кожного виміру порівнюється з ним,
+і запуск завершується з кодом 1, якщо щось стало повільнішим більше ніж на --threshold.
+Запускати з кореня репозиторію.
+"""
+import argparse
+import asyncio
+import csv
+import http.server
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from datetime import datetime
+
+# Налаштування читаються при першому зверненні (config.get_settings), тож задаємо їх до імпорту модулів
+os.environ["OLX_HTTP_CACHE"] = "0"
+
+from ad_ids import extract_ad_id  # noqa: E402
+from benchmarks.fixtures import RecordedCorpus, SyntheticCorpus, ad_link  # noqa: E402
+from fetcher import AsyncFetcher  # noqa: E402
+from http_session import close_async_sessions  # noqa: E402
+from kyiv_rent_to_telegram import get_all_olx_urls, headers_list, process_page  # noqa: E402
+from parsers import JSON_STATE_PARSER, PARSERS  # noqa: E402
+from searches import DEFAULT_SEARCH_NAME, Search  # noqa: E402
+from storage import AD_FIELDS, AdStore  # noqa: E402
+
+REPORT_PATH = os.path.join("benchmarks", "report.json")
+BASELINE_PATH = os.path.join("benchmarks", "baseline.json")
+DEFAULT_THRESHOLD = 0.25
+
+# Поля, які мають збігатися в усіх бекендів парсера
+PARITY_FIELDS = ("ad_id", "link", "name", "price", "square", "location")
+
+
+class _StubHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, як у OLX
+
+    def do_GET(self):
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+        page = int(query.get("page", ["1"])[0])
+        server = self.server
+        body = server.corpus.page(page, server.total_pages, server.offset).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer:
+    """Локальний HTTP-сервер, що віддає сторінки корпусу замість OLX."""
+
+    def __init__(self, corpus):
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+        self._server.daemon_threads = True
+        self._server.corpus = corpus
+        self._server.total_pages = 1
+        self._server.offset = 0
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/uk/nedvizhimost/kvartiry/kiev/?currency=UAH"
+
+    def configure(self, total_pages: int, offset: int = 0):
+        self._server.total_pages = total_pages
+        self._server.offset = offset
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class _NullNotifier:
+    """Замість Telegram: повідомлення лишаються в outbox бази бенчмарку."""
+
+    async def send_many(self, messages):
+        pass
+
+    def wake(self):
+        pass
+
+
+def measure(run, repeat: int, items: int = 1, setup=None, teardown=None) -> dict:
+    """
+    Викликає run(context) `repeat` разів і повертає статистику тривалостей.
+    setup() готує контекст кожного повтору й не входить у вимір; items — скільки одиниць
+    роботи (сторінок, оголошень) обробляє один повтор.
+    """
+    durations = []
+    for _ in range(repeat):
+        context = setup() if setup else None
+        try:
+            started = time.perf_counter()
+            run(context)
+            durations.append(time.perf_counter() - started)
+        finally:
+            if teardown:
+                teardown(context)
+    median = statistics.median(durations)
+    return {
+        "runs": repeat,
+        "items": items,
+        "min_s": round(min(durations), 6),
+        "median_s": round(median, 6),
+        "mean_s": round(statistics.fmean(durations), 6),
+        "per_item_ms": round(median / items * 1000, 4) if items else None,
+    }
+
+
+def _page_numbers(pages: str) -> list[int]:
+    return [int(value) for value in pages.split(",") if value.strip()]
+
+
+# --- Бенчмарки ---
+
+def bench_pagination(corpus, page_counts: list[int], repeat: int) -> dict:
+    """Визначення кількості сторінок і генерація URL пагінації за HTML першої сторінки."""
+    results = {}
+    page_url = "https://www.olx.ua/uk/nedvizhimost/kvartiry/kiev/?currency=UAH"
+    for total_pages in page_counts:
+        first_page_html = corpus.page(1, total_pages)
+
+        def run(_):
+            urls = get_all_olx_urls(page_url, first_page_html)
+            if len(urls) != total_pages:
+                raise RuntimeError(f"get_all_olx_urls повернув {len(urls)} URL замість {total_pages}")
+
+        results[f"pagination.get_all_olx_urls[pages={total_pages}]"] = measure(run, repeat)
+    return results
+
+
+def bench_scrape(server: StubServer, workdir: str, page_counts: list[int], repeat: int) -> dict:
+    """
+    Обхід сторінок так само, як у циклі парсингу: AsyncFetcher.iter_pages -> process_page (без Telegram),
+    кожен повтор — з порожньою базою, тож усі оголошення нові. Обмеження частоти вимкнено,
+    щоб вимір показував накладні витрати завантаження й обробки, а не паузи між запитами.
+    """
+    results = {}
+    searches = [Search(name=DEFAULT_SEARCH_NAME, url=server.url, chat_id=0)]
+    run_path = os.path.join(workdir, "scrape.sqlite3")
+
+    def open_empty():
+        return AdStore(run_path)
+
+    def close(store):
+        store.close()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(run_path + suffix):
+                os.remove(run_path + suffix)
+
+    for total_pages in page_counts:
+        server.configure(total_pages)
+        urls = [f"{server.url}&page={page}" for page in range(1, total_pages + 1)]
+
+        def run(store):
+            async def pipeline():
+                notifier = _NullNotifier()
+                try:
+                    async with AsyncFetcher(headers_list, rate=1_000_000, burst=1_000_000) as fetcher:
+                        async for page_url, html_content in fetcher.iter_pages(urls):
+                            page_ids, _, _ = await process_page(page_url, html_content, store, notifier, searches)
+                            if not page_ids:
+                                raise RuntimeError(f"Не знайдено оголошень на {page_url}")
+                finally:
+                    await close_async_sessions()
+            asyncio.run(pipeline())
+
+        results[f"scrape.iter_pages+process_page[pages={total_pages}]"] = measure(
+            run, repeat, items=total_pages, setup=open_empty, teardown=close)
+    return results
+
+
+def bench_parsers(corpus, pages: int, repeat: int) -> tuple[dict, list[str]]:
+    """Час розбору сторінки кожним бекендом та перевірка, що всі бекенди дають ті самі оголошення."""
+    page_url = "https://www.olx.ua/uk/nedvizhimost/kvartiry/kiev/"
+    htmls = [corpus.page(page, pages) for page in range(1, pages + 1)]
+    backends = {"json": JSON_STATE_PARSER, **PARSERS}
+    results, parsed = {}, {}
+    for name, parser in backends.items():
+        parsed[name] = [parser.parse(html_content, page_url) for html_content in htmls]
+        if any(ads is None for ads in parsed[name]):
+            continue  # На сторінках немає JSON стану
+
+        def run(_, parser=parser):
+            for html_content in htmls:
+                parser.parse(html_content, page_url)
+
+        results[f"parse.{name}"] = measure(run, repeat, items=pages)
+
+    mismatches = []
+    reference = [[tuple(ad.get(field) for field in PARITY_FIELDS) for ad in ads] for ads in parsed["bs4"]]
+    for name, pages_ads in parsed.items():
+        if name == "bs4" or any(ads is None for ads in pages_ads):
+            continue
+        for page, (ads, expected) in enumerate(zip(pages_ads, reference), start=1):
+            actual = [tuple(ad.get(field) for field in PARITY_FIELDS) for ad in ads]
+            if actual != expected:
+                mismatches.append(f"Бекенд '{name}' розходиться з bs4 на сторінці {page}")
+    return results, mismatches
+
+
+def _history_ads(count: int, start: int = 0) -> list[dict]:
+    return [
+        {"link": ad_link(number), "name": f"Квартира {number}", "location": "Київ, Печерський",
+         "price": "20 000 грн.", "square": "55 м²", "time": "17 жовтня 2026 р."}
+        for number in range(start, start + count)
+    ]
+
+
+def seed_store(db_path: str, history: int, batch: int = 20_000):
+    """База з `history` оголошеннями, які вже бачив пошук за замовчуванням."""
+    with AdStore(db_path) as store:
+        for start in range(0, history, batch):
+            ads = _history_ads(min(batch, history - start), start)
+            store.upsert_ads(ads)
+            store.mark_seen(DEFAULT_SEARCH_NAME, _ad_ids(ads))
+
+
+def _ad_ids(ads: list[dict]) -> list[int]:
+    return [extract_ad_id(ad["link"]) for ad in ads]
+
+
+def _copy_db(source: str, target: str):
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(source + suffix):
+            shutil.copyfile(source + suffix, target + suffix)
+
+
+def bench_storage(workdir: str, history_sizes: list[int], dedup_pages: int, repeat: int) -> dict:
+    """
+    Відбір нових оголошень (process_page без Telegram) і запис у базу для історії різного розміру.
+    Кожен повтор працює з копією однієї й тієї ж заповненої бази, тож повтори рівноцінні.
+    """
+    results = {}
+    corpus = SyntheticCorpus(json_state=True, padding_kb=0)
+    page_url = "https://www.olx.ua/uk/nedvizhimost/kvartiry/kiev/"
+    searches = [Search(name=DEFAULT_SEARCH_NAME, url=page_url, chat_id=0)]
+    for history in history_sizes:
+        base_path = os.path.join(workdir, f"history-{history}.sqlite3")
+        seed_store(base_path, history)
+        run_path = os.path.join(workdir, "run.sqlite3")
+
+        def open_copy():
+            _copy_db(base_path, run_path)
+            return AdStore(run_path)
+
+        def close(store):
+            store.close()
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(run_path + suffix):
+                    os.remove(run_path + suffix)
+
+        # Половина оголошень на сторінках уже є в історії, половина — нові
+        offset = max(0, history - dedup_pages * corpus.per_page // 2)
+        htmls = [corpus.page(page, dedup_pages, offset) for page in range(1, dedup_pages + 1)]
+
+        def run_dedup(store):
+            async def pipeline():
+                notifier = _NullNotifier()
+                for html_content in htmls:
+                    await process_page(page_url, html_content, store, notifier, searches)
+            asyncio.run(pipeline())
+
+        results[f"dedup.process_page[history={history}]"] = measure(
+            run_dedup, repeat, items=dedup_pages, setup=open_copy, teardown=close)
+
+        page_ids = _ad_ids(_history_ads(corpus.per_page, offset))
+
+        def run_known_ids(store):
+            for _ in range(100):
+                store.known_ids(page_ids)
+
+        results[f"storage.known_ids[history={history}]"] = measure(
+            run_known_ids, repeat, items=100, setup=open_copy, teardown=close)
+
+        new_ads = _history_ads(1000, history + 10_000_000)
+
+        def run_upsert(store):
+            store.upsert_ads(new_ads)
+
+        results[f"storage.upsert_ads[history={history}]"] = measure(
+            run_upsert, repeat, items=len(new_ads), setup=open_copy, teardown=close)
+
+        csv_path = os.path.join(workdir, f"history-{history}.csv")
+        with open(csv_path, "w", encoding="utf-8", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=AD_FIELDS)
+            writer.writeheader()
+            for start in range(0, history, 20_000):
+                writer.writerows(_history_ads(min(20_000, history - start), start))
+
+        def open_empty():
+            return AdStore(run_path)
+
+        def run_import(store):
+            if store.import_csv_once(csv_path) != history:
+                raise RuntimeError("Імпортовано не всі рядки CSV")
+
+        results[f"storage.import_csv[rows={history}]"] = measure(
+            run_import, repeat, items=history, setup=open_empty, teardown=close)
+
+        for path in (base_path, csv_path):
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+    return results
+
+
+# --- Звіт і порівняння з базовими результатами ---
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def find_regressions(results: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base or not base.get("median_s"):
+            continue
+        ratio = current["median_s"] / base["median_s"]
+        if ratio > 1 + threshold:
+            regressions.append(f"{name}: {base['median_s']:.4f} с -> {current['median_s']:.4f} с ({ratio:.2f}x)")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Офлайн-бенчмарки парсера OLX")
+    parser.add_argument("--pages", default="1,50,500", help="кількість сторінок для пагінації та обходу")
+    parser.add_argument("--history", default="10000,100000",
+                        help="розмір історії оголошень у базі (наприклад, 10000,100000,1000000)")
+    parser.add_argument("--parse-pages", type=int, default=20, help="скільки сторінок розбирати кожним бекендом")
+    parser.add_argument("--dedup-pages", type=int, default=20, help="скільки сторінок проганяти через process_page")
+    parser.add_argument("--repeat", type=int, default=3, help="повторів кожного виміру (береться медіана)")
+    parser.add_argument("--fixtures", help="каталог із записаними сторінками OLX (*.html) замість синтетичних")
+    parser.add_argument("--output", default=REPORT_PATH, help="куди записати JSON звіт")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="JSON з базовими результатами")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="допустиме сповільнення відносно базових результатів (0.25 = 25%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="записати результати як базові")
+    parser.add_argument("--skip", default="", help="пропустити групи: pagination,scrape,parse,storage")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    # Журнал кожної сторінки спотворює виміри
+    logging.disable(logging.INFO)
+    skip = {name.strip() for name in args.skip.split(",") if name.strip()}
+    page_counts = _page_numbers(args.pages)
+    corpus = RecordedCorpus(args.fixtures) if args.fixtures else SyntheticCorpus()
+
+    results, problems = {}, []
+    with tempfile.TemporaryDirectory(prefix="olx-bench-") as workdir:
+        if "pagination" not in skip:
+            results.update(bench_pagination(corpus, page_counts, args.repeat))
+        if "scrape" not in skip:
+            with StubServer(corpus) as server:
+                results.update(bench_scrape(server, workdir, page_counts, args.repeat))
+        if "parse" not in skip:
+            parse_results, mismatches = bench_parsers(corpus, args.parse_pages, args.repeat)
+            results.update(parse_results)
+            problems.extend(mismatches)
+        if "storage" not in skip:
+            results.update(bench_storage(workdir, _page_numbers(args.history), args.dedup_pages, args.repeat))
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            baseline = json.load(file).get("results", {})
+    regressions = find_regressions(results, baseline, args.threshold)
+
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "fixtures": args.fixtures or "synthetic",
+            "threshold": args.threshold,
+        },
+        "results": results,
+        "regressions": regressions,
+        "problems": problems,
+    }
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump({"meta": report["meta"], "results": results}, file, ensure_ascii=False, indent=2)
+
+    for name, result in results.items():
+        print(f"{name:55} median {result['median_s'] * 1000:10.2f} ms  ({result['per_item_ms']} ms/од.)")
+    print(f"Звіт записано в {args.output}")
+    for line in problems + regressions:
+        print(f"ПОМИЛКА: {line}", file=sys.stderr)
+    return 1 if problems or regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
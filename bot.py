@@ -1,10 +1,7 @@
 import asyncio
-from logger_ import get_logger
-import os
+import functools
 import sys
 
-from dotenv import load_dotenv
-
 from aiogram import Bot, Dispatcher, types
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
@@ -14,78 +11,97 @@ from aiogram.webhook.aiohttp_server import SimpleRequestHandler
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 
+from config import ConfigError, get_settings
+from http_session import close_async_sessions
+from jobs import ScrapeJobRunner, run_stats_query, shutdown_executor
 from kyiv_rent_to_telegram import start_parsing
+from logger_ import get_logger, setup_logging
+from metrics import REGISTRY
 from aiohttp import web
 
-load_dotenv()
-
-BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
-TELEGRAM_CHAT_ID_OLEKSANDR = os.getenv("TELEGRAM_CHAT_ID_OLEKSANDR")
-RAILWAY_PUBLIC_DOMAIN = os.getenv("RAILWAY_PUBLIC_DOMAIN")
-
 logger = get_logger(__name__)
 
-if not BOT_TOKEN:
-    logger.critical("Помилка: Не встановлено змінну оточення BOT_TOKEN!")
-    sys.exit(1)
-if not TELEGRAM_CHAT_ID_OLEKSANDR:
-    logger.warning("Увага: Не встановлено TELEGRAM_CHAT_ID_OLEKSANDR. Заплановані повідомлення не надсилатимуться.")
-    sys.exit(1)
-else:
-    try:
-        TELEGRAM_CHAT_ID_OLEKSANDR = int(TELEGRAM_CHAT_ID_OLEKSANDR)
-    except ValueError:
-        logger.critical(f"Помилка: CHAT_ID '{TELEGRAM_CHAT_ID_OLEKSANDR}' не є дійсним цілим числом!")
-        sys.exit(1)
-
-if not RAILWAY_PUBLIC_DOMAIN:
-    logger.critical("Помилка: Не встановлено змінну оточення RAILWAY_PUBLIC_DOMAIN!")
-    sys.exit(1)
+# Обов'язкові налаштування бота (перевіряються в main(), а не при імпорті модуля)
+REQUIRED_SETTINGS = ("telegram_bot_token", "telegram_chat_id", "railway_public_domain")
 
 WEBHOOK_PATH = "/webhook"
-WEBHOOK_URL = f"https://{RAILWAY_PUBLIC_DOMAIN}{WEBHOOK_PATH}"
+# Метрики парсера у текстовому форматі Prometheus (див. metrics.py)
+METRICS_PATH = "/metrics"
+# Аналітика за вивантаженням історії (див. analytics.py)
+MEDIAN_PRICE_PATH = "/stats/median-price"
+LISTINGS_PER_DAY_PATH = "/stats/listings-per-day"
 
-bot_properties = DefaultBotProperties(parse_mode=ParseMode.HTML)
-bot = Bot(token=BOT_TOKEN, default=bot_properties)
 dp = Dispatcher()
 scheduler = AsyncIOScheduler(timezone="Europe/Kiev")
+# Створюється в main(): парсер надсилає повідомлення через того ж бота (черга з урахуванням лімітів Telegram)
+scrape_runner: ScrapeJobRunner | None = None
+
+
+def webhook_url() -> str:
+    return f"https://{get_settings().railway_public_domain}{WEBHOOK_PATH}"
+
+
+def build_scrape_trigger():
+    """
+    Повертає тригер APScheduler та його опис для логів.
+    Розклад: кожні N хвилин (SCRAPE_INTERVAL_MINUTES) або щодня о SCRAPE_DAILY_AT (ГГ:ХХ);
+    з OLX_ADAPTIVE_SCHEDULE=1 обидва ігноруються — інтервал кожного пошуку підбирає scheduling.py.
+    """
+    settings = get_settings()
+    if settings.adaptive_schedule:
+        # Цикл лише перевіряє, яким пошукам настав час, тож запускається з мінімальним інтервалом
+        minutes = settings.adaptive_min_minutes
+        return (IntervalTrigger(minutes=minutes, timezone="Europe/Kiev"),
+                f"адаптивно (не частіше ніж кожні {minutes} хв.)")
+    if settings.scrape_interval_minutes:
+        minutes = settings.scrape_interval_minutes
+        return IntervalTrigger(minutes=minutes, timezone="Europe/Kiev"), f"кожні {minutes} хв."
+    hour, minute = (int(part) for part in settings.scrape_daily_at.split(":"))
+    return CronTrigger(hour=hour, minute=minute, timezone="Europe/Kiev"), f"щодня о {hour:02d}:{minute:02d}"
 
 
 async def send_scheduled_message(bot_instance: Bot, chat_id: int):
     """
     Функція, яка буде виконуватися за розкладом.
+    Цикл парсингу працює на event loop бота (блокуюча робота винесена в обмежений пул потоків),
+    тож вебхук продовжує відповідати; перекриття циклів не допускається.
     """
     try:
-        await start_parsing()
-        logger.info(f"Звіт про наявність нових оголошень надіслано до чату {chat_id}")
+        if await scrape_runner.run_once():
+            logger.info(f"Звіт про наявність нових оголошень надіслано до чату {chat_id}")
     except Exception as e:
         logger.error(f"Не вдалося надіслати заплановане повідомлення до {chat_id}: {e}")
 
 
 async def on_startup(bot: Bot):
     logger.info("Бот запускається...")
+    settings = get_settings()
     try:
         webhook_info = await bot.get_webhook_info()
-        if webhook_info.url != WEBHOOK_URL:
-            await bot.set_webhook(WEBHOOK_URL)
-            logger.info(f"Вебхук встановлено на: {WEBHOOK_URL}")
+        if webhook_info.url != webhook_url():
+            await bot.set_webhook(webhook_url())
+            logger.info(f"Вебхук встановлено на: {webhook_url()}")
         else:
             logger.info("Вебхук вже встановлено.")
     except Exception as e:
         logger.error(f"Помилка при встановленні вебхука: {e}")
 
-    if TELEGRAM_CHAT_ID_OLEKSANDR:
+    if settings.telegram_chat_id:
         try:
+            trigger, schedule_text = build_scrape_trigger()
             scheduler.add_job(
                 send_scheduled_message,
-                trigger=CronTrigger(hour=13, minute=30, timezone="Europe/Kiev"),
-                kwargs={'bot_instance': bot, 'chat_id': TELEGRAM_CHAT_ID_OLEKSANDR},
+                trigger=trigger,
+                kwargs={'bot_instance': bot, 'chat_id': settings.telegram_chat_id},
                 id='daily_message_job',
                 replace_existing=True,
-                misfire_grace_time=60
+                misfire_grace_time=60,
+                max_instances=1,
+                coalesce=True
             )
-            logger.info(f"Заплановано надсилання щоденного повідомлення до чату {TELEGRAM_CHAT_ID_OLEKSANDR} об 13:30.")
+            logger.info(f"Заплановано парсинг {schedule_text} зі звітом до чату {settings.telegram_chat_id}.")
             if not scheduler.running:
                 scheduler.start()
                 logger.info("Планувальник завдань запущено.")
@@ -102,6 +118,8 @@ async def on_shutdown(bot: Bot):
     if scheduler.running:
         scheduler.shutdown(wait=True)
         logger.info("Планувальник завдань зупинено.")
+    shutdown_executor(wait=False)
+    await close_async_sessions()
     try:
         await bot.delete_webhook()
         logger.info("Вебхук видалено.")
@@ -110,12 +128,68 @@ async def on_shutdown(bot: Bot):
     logger.info("Бот зупинено.")
 
 
+async def metrics_handler(request: web.Request) -> web.Response:
+    """Віддає поточні метрики (час завантаження, парсингу, відправки тощо) для Prometheus."""
+    return web.Response(body=REGISTRY.expose().encode("utf-8"),
+                        headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+
+def _history_days(request: web.Request) -> int | None:
+    days = request.query.get("days")
+    if days is None:
+        return None
+    try:
+        days = int(days)
+    except ValueError:
+        raise web.HTTPBadRequest(text="days має бути цілим числом")
+    if days < 1:
+        raise web.HTTPBadRequest(text="days має бути додатним")
+    return days
+
+
+async def _stats_response(compute, request: web.Request) -> web.Response:
+    """Читає вивантаження за ?days=N і віддає результат compute(analytics, table) як JSON."""
+    days = _history_days(request)
+
+    def query():
+        # analytics завантажує pyarrow, що імпортується довго, тож модуль імпортується лише тут, у потоці /stats
+        import analytics
+        return compute(analytics, analytics.load_history(days=days))
+
+    try:
+        result = await run_stats_query(query)
+    except ValueError as e:
+        raise web.HTTPBadRequest(text=str(e))
+    except (RuntimeError, FileNotFoundError) as e:
+        return web.json_response({"error": str(e)}, status=503)
+    return web.json_response(result)
+
+
+async def median_price_handler(request: web.Request) -> web.Response:
+    """Медіана ціни за районами (?by=district|scrape_date|currency, ?currency=UAH, ?days=N)."""
+    by = request.query.get("by", "district")
+    currency = request.query.get("currency", "UAH").upper()
+    return await _stats_response(lambda analytics, table: analytics.median_price(table, by, currency), request)
+
+
+async def listings_per_day_handler(request: web.Request) -> web.Response:
+    """Кількість нових оголошень за днями (?days=N)."""
+    return await _stats_response(lambda analytics, table: analytics.listings_per_day(table), request)
+
+
 @dp.message(CommandStart())
 async def start_command_handler(message: types.Message):
-    await message.reply("Бот запущено. Щоденні повідомлення о 13:30 налаштовані!")
+    _, schedule_text = build_scrape_trigger()
+    await message.reply(f"Бот запущено. Перевірка нових оголошень {schedule_text} налаштована!")
 
 
 async def main():
+    global scrape_runner
+    setup_logging()
+    settings = get_settings().require(*REQUIRED_SETTINGS)
+    bot = Bot(token=settings.telegram_bot_token, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+    scrape_runner = ScrapeJobRunner(functools.partial(start_parsing, bot))
+
     # Реєструємо функції startup/shutdown
     dp.startup.register(on_startup)
     dp.shutdown.register(on_shutdown)
@@ -128,13 +202,16 @@ async def main():
     )
     # Реєструємо обробник для вебхука за вказаним шляхом
     webhook_handler.register(app, path=WEBHOOK_PATH)
+    app.router.add_get(METRICS_PATH, metrics_handler)
+    app.router.add_get(MEDIAN_PRICE_PATH, median_price_handler)
+    app.router.add_get(LISTINGS_PER_DAY_PATH, listings_per_day_handler)
 
     # Запускаємо веб-сервер
     runner = web.AppRunner(app)
     await runner.setup()
-    site = web.TCPSite(runner, host="0.0.0.0", port=int(os.environ.get("PORT", 8080))) # Railway надає порт через змінну оточення PORT
+    site = web.TCPSite(runner, host="0.0.0.0", port=settings.port) # Railway надає порт через змінну оточення PORT
     await site.start()
-    logger.info(f"Веб-сервер запущено на порту {os.environ.get('PORT', 8080)}")
+    logger.info(f"Веб-сервер запущено на порту {settings.port}")
 
     # Встановлюємо вебхук при старті бота (перенесено сюди)
     await dp.emit_startup(bot) # Спробуємо залишити тут
@@ -152,6 +229,9 @@ async def main():
 if __name__ == "__main__":
     try:
         asyncio.run(main())
+    except ConfigError as e:
+        logger.critical(f"Помилка конфігурації: {e}")
+        sys.exit(1)
     except (KeyboardInterrupt, SystemExit):
         logger.info("Бот зупинено.")
     except Exception as e:
@@ -0,0 +1,159 @@
+import os
+import threading
+from dataclasses import dataclass, field, fields
+
+from dotenv import load_dotenv
+
+
+class ConfigError(ValueError):
+    """Обов'язкове налаштування не задане або має некоректне значення."""
+
+
+def _flag(value: str) -> bool:
+    return value == "1"
+
+
+def _setting(env: str, default=None, parse=str):
+    """Поле Settings, що читається зі змінної оточення env; parse перетворює рядок на значення."""
+    return field(default=default, metadata={"env": env, "parse": parse})
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Налаштування застосунку зі змінних оточення (та файлу .env).
+    Створюється лише при першому зверненні (get_settings), тож імпорт модулів не читає .env
+    і не падає без токенів; обов'язковість перевіряє той, кому значення потрібне (require).
+    Модулі читають налаштування під час роботи, а не при імпорті, тож значення з .env діють усюди.
+    """
+    # Telegram і вебхук (bot.py)
+    telegram_bot_token: str | None = _setting("TELEGRAM_BOT_TOKEN")
+    telegram_chat_id: int | None = _setting("TELEGRAM_CHAT_ID_OLEKSANDR", parse=int)
+    railway_public_domain: str | None = _setting("RAILWAY_PUBLIC_DOMAIN")
+    port: int = _setting("PORT", 8080, int)
+    # Розклад парсингу: кожні N хвилин або щодня о ГГ:ХХ (див. bot.build_scrape_trigger)
+    scrape_interval_minutes: int | None = _setting("SCRAPE_INTERVAL_MINUTES", parse=int)
+    scrape_daily_at: str = _setting("SCRAPE_DAILY_AT", "13:30")
+
+    # Журнал (logger_.py): у файл — лише помилки, у консоль — усе (для дебага)
+    log_file: str = _setting("OLX_LOG_FILE", os.path.join("data", "application.log"))
+    log_file_level: str = _setting("OLX_LOG_FILE_LEVEL", "ERROR")
+    log_level: str = _setting("OLX_LOG_LEVEL", "DEBUG")
+    # Записувати журнал в окремому потоці (QueueHandler), щоб запис у файл і консоль не блокував event loop
+    log_queue: bool = _setting("OLX_LOG_QUEUE", False, _flag)
+
+    # Збережені пошуки (searches.py, див. searches.example.json)
+    searches_file: str = _setting("OLX_SEARCHES_FILE", "searches.json")
+    # Інкрементальний режим: сортуємо від найновіших і зупиняємось на першій сторінці без нових оголошень
+    incremental_crawl: bool = _setting("OLX_INCREMENTAL_CRAWL", True, _flag)
+    # Відстеження цін: сповіщення про зниження ціни та придушення повторних публікацій
+    price_tracking: bool = _setting("OLX_PRICE_TRACKING", True, _flag)
+    price_drop_min_percent: float = _setting("OLX_PRICE_DROP_MIN_PERCENT", 1.0, float)  # менші зниження ігноруються
+    relist_window_days: int = _setting("OLX_RELIST_WINDOW_DAYS", 60, int)  # наскільки давнє оголошення вважається тим самим
+    # Скільки потоків може одночасно виконувати блокуючу роботу парсера (парсинг HTML, SQLite, диск)
+    scrape_workers: int = _setting("OLX_SCRAPE_WORKERS", 2, int)
+
+    # Парсер сторінок (parsers.py): "lxml" (швидкий) або "bs4"; спершу пробується вбудований JSON стан
+    parser_backend: str = _setting("OLX_PARSER_BACKEND", "lxml")
+    json_state: bool = _setting("OLX_JSON_STATE", True, _flag)
+
+    # Завантаження сторінок (fetcher.py): обмеження, щоб не отримати бан від OLX
+    fetch_concurrency: int = _setting("OLX_FETCH_CONCURRENCY", 4, int)  # одночасних запитів
+    rate_per_second: float = _setting("OLX_RATE_PER_SECOND", 0.5, float)  # запитів на секунду на один хост
+    rate_burst: int = _setting("OLX_RATE_BURST", 2, int)  # скільки запитів можна зробити "залпом"
+    fetch_timeout: float = _setting("OLX_FETCH_TIMEOUT", 30.0, float)
+    # Повторні спроби HTTP (http_session.py)
+    http_retries: int = _setting("HTTP_RETRIES", 3, int)
+    http_backoff_factor: float = _setting("HTTP_BACKOFF_FACTOR", 1.0, float)  # 1с, 2с, 4с ...
+    http_backoff_jitter: float = _setting("HTTP_BACKOFF_JITTER", 0.5, float)  # випадкова добавка до паузи, с
+    http_backoff_max: float = _setting("HTTP_BACKOFF_MAX", 60.0, float)
+    http_pool_size: int = _setting("HTTP_POOL_SIZE", 10, int)  # з'єднань на хост
+    # Скільки секунд тримати невикористане з'єднання відкритим для наступних запитів (і циклів парсингу)
+    http_keepalive_seconds: float = _setting("HTTP_KEEPALIVE_SECONDS", 60.0, float)
+    # Кеш сторінок (http_cache.py)
+    http_cache: bool = _setting("OLX_HTTP_CACHE", True, _flag)
+    http_cache_dir: str = _setting("OLX_HTTP_CACHE_DIR", os.path.join("data", "http_cache"))
+
+    # Завантаження сторінок нових оголошень (enrichment.py): поверх, опис, фото, бізнес чи ні; окремий бюджет запитів
+    enrich_details: bool = _setting("OLX_ENRICH_DETAILS", False, _flag)
+    detail_concurrency: int = _setting("OLX_DETAIL_CONCURRENCY", 2, int)
+    detail_rate_per_second: float = _setting("OLX_DETAIL_RATE_PER_SECOND", 0.3, float)
+    detail_rate_burst: int = _setting("OLX_DETAIL_RATE_BURST", 1, int)
+    # Скільки чекати на завершення черги наприкінці циклу; решта буде завантажена наступного циклу
+    detail_drain_timeout: float = _setting("OLX_DETAIL_DRAIN_TIMEOUT", 300.0, float)
+    # Оголошення, що з'явились за стільки днів і ще не мають даних сторінки, дозавантажуються на старті циклу
+    detail_backlog_days: int = _setting("OLX_DETAIL_BACKLOG_DAYS", 7, int)
+
+    # Черга Telegram (notifier.py). Ліміти: ~30 повідомлень/с загалом, ~1/с в особистий чат, ~20/хв у групу
+    telegram_global_rate: float = _setting("TELEGRAM_GLOBAL_RATE", 25.0, float)
+    telegram_chat_rate: float = _setting("TELEGRAM_CHAT_RATE", 1.0, float)
+    telegram_group_rate: float = _setting("TELEGRAM_GROUP_RATE", 20 / 60, float)
+    # Якщо в чергу чату накопичилось більше стількох повідомлень, вони об'єднуються в довші
+    telegram_batch_threshold: int = _setting("TELEGRAM_BATCH_THRESHOLD", 5, int)
+    telegram_max_attempts: int = _setting("TELEGRAM_MAX_ATTEMPTS", 10, int)
+
+    # Черга завдань (work_queue.py). Ідентифікатор обробника; за замовчуванням — хост і PID процесу
+    worker_id: str | None = _setting("OLX_WORKER_ID")
+    # Скільки секунд завдання належить обробнику без heartbeat; після цього його може взяти інший
+    work_lease_seconds: float = _setting("OLX_WORK_LEASE_SECONDS", 120.0, float)
+    # Завдання, взяте менше стількох секунд тому, не береться знову: репліки, чий розклад зсунутий
+    # у часі менше ніж на стільки, не обходять ті самі пошуки двічі за цикл. Має бути меншим за інтервал парсингу.
+    work_min_interval: float = _setting("OLX_WORK_MIN_INTERVAL_SECONDS", 30.0, float)
+    # Скільки завдань цей обробник виконує одночасно
+    work_lanes: int = _setting("OLX_WORK_LANES", 4, int)
+    # Оренда повідомлень outbox: якщо обробник зупинився, не надіславши їх, через стільки секунд їх надішле інший
+    outbox_lease_seconds: float = _setting("OLX_OUTBOX_LEASE_SECONDS", 600.0, float)
+
+    # Адаптивний розклад (scheduling.py): кожна група пошуків опитується з власним інтервалом
+    adaptive_schedule: bool = _setting("OLX_ADAPTIVE_SCHEDULE", False, _flag)
+    # Скільки запитів до OLX на годину можуть зробити всі пошуки разом
+    request_budget_per_hour: float = _setting("OLX_REQUEST_BUDGET_PER_HOUR", 120.0, float)
+    # Межі інтервалу опитування одного пошуку; мінімальний інтервал — це й період перевірки в bot.py
+    adaptive_min_minutes: int = _setting("OLX_ADAPTIVE_MIN_MINUTES", 5, int)
+    adaptive_max_minutes: int = _setting("OLX_ADAPTIVE_MAX_MINUTES", 180, int)
+    # За скільки останніх днів рахується, як часто з'являються оголошення
+    arrival_history_days: int = _setting("OLX_ARRIVAL_HISTORY_DAYS", 14, int)
+
+    # Вивантаження в Parquet (analytics.py): <export_dir>/scrape_date=YYYY-MM-DD/part-0.parquet
+    export_dir: str = _setting("OLX_EXPORT_DIR", os.path.join("data", "export"))
+    # Оновлювати вивантаження наприкінці кожного циклу парсингу
+    export_parquet: bool = _setting("OLX_EXPORT_PARQUET", False, _flag)
+    # Потоків для запитів /stats (bot.py); окремо від потоків парсера
+    stats_workers: int = _setting("OLX_STATS_WORKERS", 1, int)
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        """Читає всі поля зі змінних оточення; незадані (або порожні) лишаються зі значенням за замовчуванням."""
+        values = {}
+        for setting in fields(cls):
+            env, parse = setting.metadata["env"], setting.metadata["parse"]
+            value = os.getenv(env)
+            if not value:
+                continue
+            try:
+                values[setting.name] = parse(value)
+            except ValueError:
+                raise ConfigError(f"{env} '{value}' має некоректне значення") from None
+        return cls(**values)
+
+    def require(self, *names: str) -> "Settings":
+        """Перевіряє, що поля names задані; інакше ConfigError з переліком відсутніх змінних."""
+        env_names = {setting.name: setting.metadata["env"] for setting in fields(self)}
+        missing = [env_names[name] for name in names if getattr(self, name) in (None, "")]
+        if missing:
+            raise ConfigError(f"Не задані змінні оточення: {', '.join(missing)}")
+        return self
+
+
+_settings: Settings | None = None
+_settings_lock = threading.Lock()
+
+
+def get_settings() -> Settings:
+    """Налаштування процесу: при першому виклику завантажує .env і читає змінні оточення."""
+    global _settings
+    with _settings_lock:
+        if _settings is None:
+            load_dotenv()
+            _settings = Settings.from_env()
+        return _settings
@@ -0,0 +1,115 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from config import get_settings
+from fetcher import AsyncFetcher
+from jobs import run_blocking
+from logger_ import get_logger
+from metrics import DETAIL_FETCHES
+from models import Ad
+from parsers import parse_ad_details
+from storage import AdStore
+
+logger = get_logger(__name__)
+
+
+class DetailEnricher:
+    """
+    Фонове завантаження сторінок нових оголошень з власним AsyncFetcher (свої ліміти паралельності
+    й частоти, незалежні від обходу сторінок пошуку) і фіксованою кількістю обробників.
+    Результат (або невдача — знято з публікації, помилка) зберігається в таблиці ad_details за ad_id,
+    тож сторінка кожного оголошення завантажується не більше одного разу; ті, до яких черга не дійшла
+    до таймауту, дозавантажуються на початку наступного циклу. Увімкнення та ліміти — OLX_ENRICH_DETAILS і OLX_DETAIL_* (config.py).
+
+        async with DetailEnricher(store, headers_list) as enricher:
+            await enricher.enqueue(new_ads)
+        # на виході чекає до OLX_DETAIL_DRAIN_TIMEOUT секунд, доки черга спорожніє
+    """
+
+    def __init__(self, store: AdStore, headers_list: list[dict], concurrency: int | None = None,
+                 rate: float | None = None, burst: int | None = None, drain_timeout: float | None = None):
+        settings = get_settings()
+        self.store = store
+        self.concurrency = max(1, settings.detail_concurrency if concurrency is None else concurrency)
+        self.drain_timeout = settings.detail_drain_timeout if drain_timeout is None else drain_timeout
+        self.backlog_days = settings.detail_backlog_days
+        self._fetcher = AsyncFetcher(
+            headers_list, concurrency=self.concurrency,
+            rate=settings.detail_rate_per_second if rate is None else rate,
+            burst=settings.detail_rate_burst if burst is None else burst,
+        )
+        self._queue: asyncio.Queue[tuple[int, str]] = asyncio.Queue()
+        self._queued: set[int] = set()
+        self._workers: list[asyncio.Task] = []
+        self.enriched = 0
+        self.failed = 0
+
+    async def __aenter__(self):
+        await self._fetcher.__aenter__()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        since = (datetime.now() - timedelta(days=self.backlog_days)).isoformat(timespec="seconds")
+        backlog = await run_blocking(self.store.recent_ads_without_details, since)
+        if backlog:
+            logger.info(f"Дозавантаження сторінок {len(backlog)} оголошень з попередніх циклів.")
+            self._put(backlog)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            await self.drain()
+        finally:
+            await self._fetcher.close()
+
+    def _put(self, items: list[tuple[int, str]]):
+        for ad_id, link in items:
+            if ad_id not in self._queued:
+                self._queued.add(ad_id)
+                self._queue.put_nowait((ad_id, link))
+
+    async def enqueue(self, ads: list[Ad]):
+        """Ставить у чергу оголошення, сторінки яких ще не завантажувались. Не чекає на завантаження."""
+        if not ads:
+            return
+        missing = set(await run_blocking(self.store.missing_details, [ad.ad_id for ad in ads]))
+        self._put([(ad.ad_id, ad.link) for ad in ads if ad.ad_id in missing])
+
+    async def drain(self):
+        """Чекає (не довше drain_timeout), доки черга спорожніє, і зупиняє обробники."""
+        if not self._workers:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=self.drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Не встигли завантажити сторінки {self._queue.qsize()} оголошень, "
+                           f"їх буде дозавантажено наступного циклу.")
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        logger.info(f"Завантажено сторінок оголошень: {self.enriched}, помилок: {self.failed}.")
+
+    async def _worker(self):
+        while True:
+            ad_id, link = await self._queue.get()
+            try:
+                html_content = await self._fetcher.fetch(link)
+                if html_content is None:
+                    await self._failed(ad_id)
+                    continue
+                details = await run_blocking(parse_ad_details, html_content)
+                await run_blocking(self.store.save_details, ad_id, details)
+                self.enriched += 1
+                DETAIL_FETCHES.inc(result="ok")
+            except Exception as e:
+                logger.error(f"Помилка обробки сторінки оголошення {link}: {e}")
+                await self._failed(ad_id)
+            finally:
+                self._queue.task_done()
+
+    async def _failed(self, ad_id: int):
+        self.failed += 1
+        DETAIL_FETCHES.inc(result="error")
+        try:
+            await run_blocking(self.store.mark_details_failed, ad_id)
+        except Exception as e:
+            logger.error(f"Не вдалося зберегти невдале завантаження сторінки оголошення {ad_id}: {e}")
@@ -0,0 +1,207 @@
+import asyncio
+import random
+import time
+import urllib.parse
+
+import aiohttp
+
+from config import get_settings
+from http_cache import HttpCache
+from http_session import RETRY_STATUSES, backoff_delay, get_async_session, parse_retry_after, record_retry
+from jobs import run_blocking
+from logger_ import get_logger
+from metrics import PAGE_BYTES, PAGE_FETCH_SECONDS
+
+logger = get_logger(__name__)
+
+# Результат запиту: 304 Not Modified, але збереженого тіла в кеші немає
+_NOT_MODIFIED_WITHOUT_BODY = object()
+
+
+class TokenBucket:
+    """
+    Обмежувач швидкості за алгоритмом "відро токенів".
+    Поповнюється зі швидкістю `rate` токенів на секунду, вміщує не більше `capacity` токенів.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        if rate <= 0:
+            raise ValueError("rate має бути більшим за 0")
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        """Чекає, доки з'явиться вільний токен, і забирає його."""
+        # Лок гарантує, що черговість очікувачів зберігається (FIFO)
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+
+class AsyncFetcher:
+    """
+    Асинхронний завантажувач сторінок.
+    Обмежує кількість одночасних запитів семафором, а частоту запитів до кожного хоста — TokenBucket.
+    Якщо передано HttpCache, робить умовні запити (ETag/Last-Modified) і на 304 повертає збережене тіло.
+    З'єднання беруться зі спільних сесій хостів (http_session.get_async_session), тож наступні
+    завантажувачі в тому самому event loop перевикористовують уже відкриті keep-alive з'єднання.
+    Використовується як асинхронний контекстний менеджер:
+
+        async with AsyncFetcher(headers_list) as fetcher:
+            html = await fetcher.fetch(url)
+    """
+
+    def __init__(self, headers_list: list[dict], concurrency: int | None = None,
+                 rate: float | None = None, burst: int | None = None, timeout: float | None = None,
+                 cache: HttpCache | None = None):
+        # Бюджет "ввічливості" за замовчуванням — з налаштувань (OLX_FETCH_CONCURRENCY, OLX_RATE_* тощо)
+        settings = get_settings()
+        self.headers_list = headers_list
+        self.cache = cache
+        self.concurrency = max(1, settings.fetch_concurrency if concurrency is None else concurrency)
+        self.rate = settings.rate_per_second if rate is None else rate
+        self.burst = settings.rate_burst if burst is None else burst
+        self.timeout = settings.fetch_timeout if timeout is None else timeout
+        self.retries = settings.http_retries
+        self.backoff_max = settings.http_backoff_max
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._buckets: dict[str, TokenBucket] = {}
+        self._client_timeout = aiohttp.ClientTimeout(total=self.timeout)
+        self._open = False
+
+    async def __aenter__(self):
+        self._open = True
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        # Спільні сесії лишаються відкритими для наступних циклів (їх закриває http_session.close_async_sessions)
+        self._open = False
+
+    def _bucket_for(self, url: str) -> TokenBucket:
+        """Повертає (або створює) окремий обмежувач для хоста з URL."""
+        host = urllib.parse.urlsplit(url).netloc
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = TokenBucket(self.rate, self.burst)
+            self._buckets[host] = bucket
+        return bucket
+
+    async def fetch(self, url: str) -> str | None:
+        """
+        Завантажує одну сторінку. Повертає HTML або None у разі помилки.
+        На 429/5xx та мережевих помилках робить повторні спроби з експоненційною паузою,
+        враховуючи заголовок Retry-After.
+        """
+        if not self._open:
+            raise RuntimeError("AsyncFetcher потрібно використовувати через 'async with'")
+
+        started = time.perf_counter()
+        html = await self._fetch(url)
+        PAGE_FETCH_SECONDS.observe(time.perf_counter() - started, status="ok" if html is not None else "error")
+        if html is not None:
+            PAGE_BYTES.observe(len(html))
+        return html
+
+    async def _fetch(self, url: str) -> str | None:
+        html = await self._fetch_with_retries(url, conditional=self.cache is not None)
+        if html is _NOT_MODIFIED_WITHOUT_BODY:
+            # Сервер відповів 304, але тіла в кеші немає: один безумовний запит (це не повторна спроба)
+            logger.info(f"304 без збереженого тіла, повторний запит без умовних заголовків: {url}")
+            html = await self._fetch_with_retries(url, conditional=False)
+        return html
+
+    async def _fetch_with_retries(self, url: str, conditional: bool):
+        host = urllib.parse.urlsplit(url).netloc
+        for attempt in range(self.retries + 1):
+            retry_after = None
+            async with self._semaphore:
+                await self._bucket_for(url).acquire()
+                headers = dict(random.choice(self.headers_list))
+                if conditional:
+                    headers.update(await run_blocking(self.cache.conditional_headers, url))
+                try:
+                    async with get_async_session(url).get(url, headers=headers,
+                                                          timeout=self._client_timeout) as response:
+                        if response.status == 304 and conditional:
+                            html = await run_blocking(self.cache.load_body, url)
+                            if html is None:
+                                return _NOT_MODIFIED_WITHOUT_BODY
+                            logger.info(f"Сторінка не змінилась (304), використано кеш: {url}")
+                            return html
+                        elif response.status in RETRY_STATUSES and attempt < self.retries:
+                            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                            reason = response.status
+                        else:
+                            response.raise_for_status()
+                            html = await response.text()
+                            logger.info(f"Успішно отримано HTML з {url}")
+                            if self.cache is not None:
+                                await run_blocking(self.cache.store_response, url, html, response.headers)
+                            return html
+                except asyncio.TimeoutError:
+                    logger.error(f"Помилка Timeout при запиті до {url}")
+                    reason = "timeout"
+                except aiohttp.ClientResponseError as e:
+                    logger.error(f"Помилка HTTP {e.status} при запиті до {url}")
+                    return None
+                except aiohttp.ClientError as e:
+                    logger.error(f"Помилка з'єднання з {url}: {e}")
+                    reason = e.__class__.__name__
+                except Exception as e:
+                    logger.error(f"Неочікувана помилка при отриманні HTML з {url}: {e}")
+                    return None
+
+            if attempt == self.retries:
+                break
+            # Пауза робиться поза семафором, щоб не займати слот іншим запитам.
+            # Retry-After обмежується HTTP_BACKOFF_MAX, щоб сервер не міг зупинити обхід на години
+            pause = min(retry_after, self.backoff_max) if retry_after is not None else backoff_delay(attempt + 1)
+            record_retry(host, reason)
+            logger.warning(f"Повторна спроба {attempt + 1}/{self.retries} для {url} через {pause:.1f} с (причина: {reason})")
+            await asyncio.sleep(pause)
+        return None
+
+    async def iter_pages(self, urls):
+        """
+        Асинхронний генератор пар (url, html) у порядку завершення завантаження.
+        Наперед запускається не більше 2 * concurrency запитів, тож у пам'яті одночасно
+        тримається лише кілька сторінок, скільки б їх не було всього.
+        """
+        pending_urls = iter(urls)
+        window = 2 * self.concurrency
+        in_flight: dict[asyncio.Task, str] = {}
+
+        def schedule_next() -> bool:
+            url = next(pending_urls, None)
+            if url is None:
+                return False
+            in_flight[asyncio.ensure_future(self.fetch(url))] = url
+            return True
+
+        while len(in_flight) < window and schedule_next():
+            pass
+        try:
+            while in_flight:
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    url = in_flight.pop(task)
+                    schedule_next()
+                    yield url, task.result()
+        finally:
+            # Якщо споживач перервав ітерацію, скасовуємо незавершені запити
+            for task in in_flight:
+                task.cancel()
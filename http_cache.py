@@ -0,0 +1,131 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+from datetime import datetime
+
+from config import get_settings
+from logger_ import get_logger
+
+logger = get_logger(__name__)
+
+# Частини сторінки, що змінюються з кожним запитом, навіть якщо оголошення ті самі
+_VOLATILE_PATTERNS = [
+    re.compile(r'\snonce="[^"]*"'),
+    re.compile(r'"(?:csrfToken|csrf_token|requestId|traceId|sessionId|nonce)"\s*:\s*"[^"]*"'),
+    re.compile(r'\\"(?:csrfToken|csrf_token|requestId|traceId|sessionId|nonce)\\"\s*:\s*\\"[^"\\]*\\"'),
+    re.compile(r'"(?:timestamp|serverTime|requestTime)"\s*:\s*\d+'),
+    re.compile(r'\\"(?:timestamp|serverTime|requestTime)\\"\s*:\s*\d+'),
+    re.compile(r'name="csrf-token"\s+content="[^"]*"'),
+]
+
+
+def content_hash(html_content: str) -> str:
+    """Хеш сторінки без частин, що змінюються між запитами (nonce, csrf, мітки часу сервера)."""
+    for pattern in _VOLATILE_PATTERNS:
+        html_content = pattern.sub("", html_content)
+    return hashlib.sha256(html_content.encode("utf-8")).hexdigest()
+
+
+class HttpCache:
+    """
+    Дисковий кеш сторінок за URL.
+    Для кожного URL зберігає ETag/Last-Modified (для умовних запитів), останнє тіло відповіді
+    (стиснене gzip, щоб відповісти на 304 Not Modified) та оголошення, розібрані з тіла з певним хешем.
+    """
+
+    def __init__(self, cache_dir: str | None = None):
+        self.cache_dir = get_settings().http_cache_dir if cache_dir is None else cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _path(self, url: str, suffix: str) -> str:
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}{suffix}")
+
+    def _read_meta(self, url: str) -> dict:
+        try:
+            with open(self._path(url, ".json"), "r", encoding="utf-8") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning(f"Пошкоджений запис кешу для {url}: {e}")
+            return {}
+
+    def _write_meta(self, url: str, meta: dict):
+        path = self._path(url, ".json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(meta, file, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def conditional_headers(self, url: str) -> dict:
+        """Заголовки If-None-Match / If-Modified-Since для URL, якщо сервер їх раніше надав."""
+        meta = self._read_meta(url)
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def load_body(self, url: str) -> str | None:
+        """Останнє збережене тіло сторінки (для відповіді 304) або None."""
+        try:
+            with gzip.open(self._path(url, ".html.gz"), "rt", encoding="utf-8") as file:
+                return file.read()
+        except (FileNotFoundError, OSError, EOFError):
+            return None
+
+    def store_response(self, url: str, body: str, headers):
+        """Зберігає тіло відповіді 200 та її валідатори (ETag, Last-Modified)."""
+        with self._lock:
+            try:
+                path = self._path(url, ".html.gz")
+                with gzip.open(f"{path}.tmp", "wt", encoding="utf-8", compresslevel=5) as file:
+                    file.write(body)
+                os.replace(f"{path}.tmp", path)
+                meta = self._read_meta(url)
+                meta.update({
+                    "url": url,
+                    "etag": headers.get("ETag"),
+                    "last_modified": headers.get("Last-Modified"),
+                    "fetched_at": datetime.now().isoformat(timespec="seconds"),
+                })
+                self._write_meta(url, meta)
+            except OSError as e:
+                logger.error(f"Помилка запису кешу для {url}: {e}")
+
+    def get_parsed(self, url: str, body_hash: str) -> list[dict] | None:
+        """Оголошення, розібрані раніше з тіла з тим самим хешем, або None."""
+        meta = self._read_meta(url)
+        if meta.get("body_hash") == body_hash and isinstance(meta.get("ads"), list):
+            return meta["ads"]
+        return None
+
+    def store_parsed(self, url: str, body_hash: str, ads: list[dict]):
+        with self._lock:
+            try:
+                meta = self._read_meta(url)
+                meta.update({"url": url, "body_hash": body_hash, "ads": ads})
+                self._write_meta(url, meta)
+            except OSError as e:
+                logger.error(f"Помилка запису кешу для {url}: {e}")
+
+
+_http_cache: HttpCache | None = None
+_http_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> HttpCache | None:
+    """Спільний екземпляр дискового кешу сторінок або None, якщо кеш вимкнено (OLX_HTTP_CACHE=0)."""
+    global _http_cache
+    if not get_settings().http_cache:
+        return None
+    with _http_cache_lock:
+        if _http_cache is None:
+            _http_cache = HttpCache()
+        return _http_cache
@@ -0,0 +1,135 @@
+import asyncio
+import random
+import threading
+import urllib.parse
+import weakref
+from collections import defaultdict
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+
+import aiohttp
+
+from config import get_settings
+from logger_ import get_logger
+from metrics import HTTP_RETRY_COUNT
+
+logger = get_logger(__name__)
+
+# Статуси, на які робиться повторна спроба (кількість і паузи — HTTP_RETRIES, HTTP_BACKOFF_*)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Сесії aiohttp (AsyncFetcher): по одній на хост у кожному event loop, бо сесія прив'язана до свого loop
+_async_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, aiohttp.ClientSession]]" = \
+    weakref.WeakKeyDictionary()
+# Запити та нові з'єднання сесій aiohttp по хостах (для pool_hit_rate)
+_async_counts: dict[str, dict[str, int]] = defaultdict(lambda: {"requests": 0, "new_connections": 0})
+_retry_counts: dict[str, int] = defaultdict(int)
+_stats_lock = threading.Lock()
+
+
+def record_retry(host: str, reason="unknown"):
+    """Збільшує лічильник повторних спроб для хоста (reason — статус відповіді або тип помилки)."""
+    with _stats_lock:
+        _retry_counts[host] += 1
+    HTTP_RETRY_COUNT.inc(host=host, reason=reason)
+
+
+def backoff_delay(attempt: int) -> float:
+    """Експоненційна пауза з випадковою добавкою (jitter) перед спробою номер `attempt` (з 1)."""
+    settings = get_settings()
+    delay = settings.http_backoff_factor * (2 ** (attempt - 1))
+    return min(settings.http_backoff_max, delay + random.uniform(0, settings.http_backoff_jitter))
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Розбирає заголовок Retry-After (секунди або HTTP-дата). Повертає паузу в секундах або None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def _count_async(host: str, key: str):
+    with _stats_lock:
+        _async_counts[host][key] += 1
+
+
+def _trace_config(host: str) -> aiohttp.TraceConfig:
+    """Рахує запити сесії та з'єднання, які довелось відкрити (решту запитів обслужило вже відкрите)."""
+    trace_config = aiohttp.TraceConfig()
+
+    async def on_request_start(session, context, params):
+        _count_async(host, "requests")
+
+    async def on_connection_create_end(session, context, params):
+        _count_async(host, "new_connections")
+
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    return trace_config
+
+
+def get_async_session(url: str) -> aiohttp.ClientSession:
+    """
+    Повертає спільну сесію aiohttp з пулом keep-alive з'єднань для хоста з URL у поточному event loop.
+    Сесія живе, доки її не закриє close_async_sessions, тож цикли парсингу в боті (один event loop)
+    перевикористовують з'єднання, відкриті попередніми циклами, поки їх тримає keep-alive.
+    """
+    loop = asyncio.get_running_loop()
+    host = urllib.parse.urlsplit(url).netloc
+    sessions = _async_sessions.setdefault(loop, {})
+    session = sessions.get(host)
+    if session is None or session.closed:
+        settings = get_settings()
+        connector = aiohttp.TCPConnector(limit=settings.http_pool_size,
+                                         keepalive_timeout=settings.http_keepalive_seconds)
+        session = aiohttp.ClientSession(connector=connector, trace_configs=[_trace_config(host)])
+        sessions[host] = session
+    return session
+
+
+async def close_async_sessions():
+    """Закриває сесії aiohttp поточного event loop (при зупинці бота чи наприкінці запуску з командного рядка)."""
+    sessions = _async_sessions.pop(asyncio.get_running_loop(), {})
+    for session in sessions.values():
+        await session.close()
+
+
+def get_http_stats() -> dict[str, dict]:
+    """
+    Статистика сесій aiohttp по хостах: кількість запитів, нових з'єднань, частка запитів,
+    обслужених уже відкритим з'єднанням (pool_hit_rate), та кількість повторних спроб.
+    """
+    with _stats_lock:
+        counts = {host: dict(host_counts) for host, host_counts in _async_counts.items()}
+        retry_counts = dict(_retry_counts)
+
+    stats = {}
+    for host in counts.keys() | retry_counts.keys():
+        host_counts = counts.get(host, {"requests": 0, "new_connections": 0})
+        requests_count, connections_count = host_counts["requests"], host_counts["new_connections"]
+        hit_rate = 1 - connections_count / requests_count if requests_count else 0.0
+        stats[host] = {
+            "requests": requests_count,
+            "new_connections": connections_count,
+            "pool_hit_rate": round(hit_rate, 3),
+            "retries": retry_counts.get(host, 0),
+        }
+    return stats
+
+
+def log_http_stats():
+    """Пише в лог зведення по пулу з'єднань і повторних спробах."""
+    for host, host_stats in get_http_stats().items():
+        logger.info(
+            f"HTTP {host}: запитів {host_stats['requests']}, нових з'єднань {host_stats['new_connections']}, "
+            f"pool hit rate {host_stats['pool_hit_rate']:.0%}, повторних спроб {host_stats['retries']}"
+        )
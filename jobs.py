@@ -0,0 +1,87 @@
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import get_settings
+from logger_ import get_logger
+
+logger = get_logger(__name__)
+
+_executor: ThreadPoolExecutor | None = None
+_stats_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Окремий обмежений пул потоків для парсера (OLX_SCRAPE_WORKERS потоків), щоб не займати
+    пул за замовчуванням event loop.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=get_settings().scrape_workers,
+                                           thread_name_prefix="olx-scrape")
+        return _executor
+
+
+def get_stats_executor() -> ThreadPoolExecutor:
+    """
+    Пул потоків для запитів аналітики (/stats, OLX_STATS_WORKERS потоків): читання Parquet може тривати
+    секунди, тож у пулі парсера воно затримувало б цикл парсингу, а цикл — відповіді на запити.
+    """
+    global _stats_executor
+    with _executor_lock:
+        if _stats_executor is None:
+            _stats_executor = ThreadPoolExecutor(max_workers=get_settings().stats_workers,
+                                                 thread_name_prefix="olx-stats")
+        return _stats_executor
+
+
+def shutdown_executor(wait: bool = True):
+    global _executor, _stats_executor
+    with _executor_lock:
+        for executor in (_executor, _stats_executor):
+            if executor is not None:
+                executor.shutdown(wait=wait)
+        _executor = _stats_executor = None
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Виконує блокуючу функцію в пулі потоків парсера, не блокуючи event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
+
+
+async def run_stats_query(func, *args, **kwargs):
+    """Виконує запит аналітики в пулі потоків /stats, не блокуючи event loop і не займаючи потоки парсера."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_stats_executor(), functools.partial(func, *args, **kwargs))
+
+
+class ScrapeJobRunner:
+    """
+    Запускає цикли парсингу на event loop бота.
+    Гарантує, що цикли не перекриваються: якщо попередній ще триває, новий запуск пропускається.
+    """
+
+    def __init__(self, job):
+        self._job = job
+        self._lock = asyncio.Lock()
+        self.last_duration: float | None = None
+
+    async def run_once(self) -> bool:
+        """Запускає один цикл. Повертає False, якщо попередній цикл ще не завершився."""
+        if self._lock.locked():
+            logger.warning("Попередній цикл парсингу ще триває, новий запуск пропущено.")
+            return False
+        async with self._lock:
+            started = time.monotonic()
+            try:
+                await self._job()
+            finally:
+                self.last_duration = time.monotonic() - started
+                logger.info(f"Цикл парсингу тривав {self.last_duration:.1f} с.")
+        return True
@@ -1,37 +1,37 @@
-import csv
-import random
-import time
-from datetime import datetime
-import requests
+import asyncio
+import contextlib
+from typing import TYPE_CHECKING
 from bs4 import BeautifulSoup
-from logger_ import get_logger
-from dotenv import load_dotenv
+from config import get_settings
+from enrichment import DetailEnricher
+from fetcher import AsyncFetcher
+from http_cache import content_hash, get_http_cache
+from http_session import close_async_sessions, log_http_stats
+from jobs import run_blocking
+from logger_ import get_logger, setup_logging
+from metrics import (CARDS_PER_PAGE, CYCLE_SECONDS, DEDUP_ADS, DEDUP_SECONDS, PARSE_SECONDS, PRICE_CHANGES,
+                     RELISTS_SUPPRESSED, RULES_REJECTED)
+from models import Ad
+from parsers import parse_ads
+from scheduling import AdaptiveScheduler
+from searches import DEFAULT_SEARCH_NAME, Search, group_by_url, load_searches
+from storage import AdStore
+from work_queue import WorkQueue
 import os
+import time
 import urllib.parse # Потрібно для генерації URL та urljoin
+from datetime import datetime, timedelta
 
-# Завантаження змінних середовища
-load_dotenv()
-
-# Словник українських місяців у родовому відмінку для форматування дати
-UKRAINIAN_MONTHS_GENITIVE = {
-    1: "січня", 2: "лютого", 3: "березня", 4: "квітня", 5: "травня",
-    6: "червня", 7: "липня", 8: "серпня", 9: "вересня", 10: "жовтня",
-    11: "листопада", 12: "грудня"
-}
-
-TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
-if not TELEGRAM_BOT_TOKEN:
-    raise ValueError("TELEGRAM_BOT_TOKEN не заданий в .env")
+if TYPE_CHECKING:
+    # aiogram імпортується довго, тож модуль завантажує його лише в main()
+    from aiogram import Bot
+    from notifier import TelegramNotifier
 
-TELEGRAM_CHAT_ID_OLEKSANDR = os.getenv("TELEGRAM_CHAT_ID_OLEKSANDR")
-if not TELEGRAM_CHAT_ID_OLEKSANDR:
-    raise ValueError("TELEGRAM_CHAT_ID_OLEKSANDR не заданий в .env")
-
-# Шлях до CSV файлу (краще використовувати os.path.join для сумісності)
+# Шлях до старого CSV файлу (з нього одноразово імпортуються оголошення в SQLite)
 CSV_FILE_PATH = os.path.join("csv", "all_ad.csv")
 
-# Створення директорії csv, якщо вона не існує
-os.makedirs(os.path.dirname(CSV_FILE_PATH), exist_ok=True)
+# Сортування від найновіших для інкрементального режиму (OLX_INCREMENTAL_CRAWL)
+NEWEST_FIRST_ORDER = "created_at:desc"
 
 logger = get_logger(__name__)
 
@@ -45,49 +45,6 @@ headers_list = [
     {"User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.131 Safari/537.36"}
 ]
 
-# --- Функції-хелпери ---
-def send_telegram_message_oleksandr(message):
-    """Відправляє повідомлення в Telegram."""
-    telegram_url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-    params = {
-        "chat_id": TELEGRAM_CHAT_ID_OLEKSANDR,
-        "text": message,
-        "parse_mode": "HTML", # Дозволяє форматування HTML у повідомленнях
-        "disable_web_page_preview": True # Можна додати, щоб прибрати прев'ю посилань
-    }
-    try:
-        response = requests.get(telegram_url, params=params, timeout=10)
-        response.raise_for_status()
-        logger.info(f"Повідомлення успішно відправлено в Telegram.")
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Помилка відправки повідомлення в Telegram: {e}")
-
-
-def delay():
-    """Робить випадкову затримку між запитами."""
-    sleep_time = random.uniform(5, 10) # Використовуємо uniform для нецілих значень
-    logger.info(f"Затримка на {sleep_time:.2f} секунд...")
-    time.sleep(sleep_time)
-
-
-def get_html(url):
-    """Отримує HTML контент сторінки з випадковим User-Agent."""
-    headers = random.choice(headers_list)
-    try:
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status() # Перевірка на HTTP помилки (4xx, 5xx)
-        logger.info(f"Успішно отримано HTML з {url}")
-        return response.text
-    except requests.exceptions.Timeout:
-        logger.error(f"Помилка Timeout при запиті до {url}")
-        return None
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Помилка з'єднання з {url}: {e}")
-        return None
-    except Exception as e:
-        logger.error(f"Неочікувана помилка при отриманні HTML з {url}: {e}")
-        return None
-
 # --- Функції для генерації URL пагінації ---
 
 
@@ -117,13 +74,18 @@ def generate_olx_pagination_urls(base_url: str, total_pages: int) -> list[str]:
     return urls
 
 
-def get_all_olx_urls(start_url: str) -> list[str]:
-    """
-    Знаходить загальну кількість сторінок і генерує всі URL пагінації.
-    """
-    logger.info(f"Пошук загальної кількості сторінок, починаючи з: {start_url}")
-    first_page_html = get_html(start_url)
+def with_newest_first(url: str) -> str:
+    """Додає (або замінює) в URL пошуку сортування від найновіших оголошень."""
+    parts = urllib.parse.urlsplit(url)
+    query = [(key, value) for key, value in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+             if key != "search[order]"]
+    query.append(("search[order]", NEWEST_FIRST_ORDER))
+    return urllib.parse.urlunsplit(parts._replace(query=urllib.parse.urlencode(query)))
 
+
+def get_all_olx_urls(start_url: str, first_page_html: str | None) -> list[str]:
+    """Знаходить загальну кількість сторінок за HTML першої сторінки і генерує всі URL пагінації."""
+    logger.info(f"Пошук загальної кількості сторінок, починаючи з: {start_url}")
     if not first_page_html:
         logger.error("Не вдалося отримати HTML першої сторінки. Повернення порожнього списку.")
         return []
@@ -172,210 +134,334 @@ def get_all_olx_urls(start_url: str) -> list[str]:
 
 
 # --- Функції для парсингу та обробки даних ---
-def scrape_ads_from_page(page_url: str) -> list[dict]:
-    """Парсить оголошення з однієї сторінки та повертає список словників."""
-    logger.info(f"Парсинг сторінки: {page_url}")
-    html_content = get_html(page_url)
-    scraped_ads = []
-
-    if not html_content:
-        logger.warning(f"Пропуск сторінки через помилку завантаження: {page_url}")
-        return scraped_ads
-
-    soup = BeautifulSoup(html_content, "lxml")
-    all_apartments_containers = soup.select('div.css-l9drzq')
+def parse_ads_from_html(html_content: str, page_url: str) -> list[Ad]:
+    """
+    Парсить оголошення з уже завантаженого HTML сторінки та повертає список записів Ad
+    (ціна, площа, район і час публікації розбираються тут, один раз).
+    Бекенд парсера задається змінною OLX_PARSER_BACKEND ("lxml" або "bs4"), див. parsers.py.
+    """
+    return [Ad.from_dict(ad) for ad in parse_ads(html_content, page_url)]
 
-    if not all_apartments_containers:
-        logger.warning(
-            f"Не знайдено контейнерів оголошень на сторінці: {page_url}. Перевірте селектор 'div.css-l9drzq'.")
 
-    for item in all_apartments_containers:
-        ad_data = {}
-        try:
-            # Назва
-            name_tag = item.select_one("h4, h6")
-            ad_data['name'] = name_tag.text.strip() if name_tag else "N/A"
-
-            # --- Змінений блок для Локації та Часу ---
-            location_time_tag = item.select_one("p.css-vbz67q, p[data-testid='location-date']")
-            time_value = "N/A"  # Значення за замовчуванням
-            location_value = "N/A"  # Значення за замовчуванням
-
-            if location_time_tag:
-                location_time_text = location_time_tag.text.split(" - ")
-                location_value = location_time_text[0].strip() if len(location_time_text) > 0 else "N/A"
-
-                # Обробка часу
-                if len(location_time_text) > 1:
-                    original_time_text = location_time_text[1].strip()
-                    # Перевіряємо, чи текст містить слово "Сьогодні" (ігноруючи регістр)
-                    if 'сьогодні' in original_time_text.lower():
-                        try:
-                            # Отримуємо поточну дату
-                            today_date = datetime.now().date()
-                            day = today_date.day
-                            month_num = today_date.month
-                            year = today_date.year
-                            # Форматуємо у потрібний рядок з українським місяцем
-                            month_name = UKRAINIAN_MONTHS_GENITIVE.get(month_num, f"({month_num})")  # Резервний варіант
-                            time_value = f"{day:02d} {month_name} {year} р."  # :02d для дня типу 01, 02...
-                            logger.debug(f"Замінено 'Сьогодні' на '{time_value}' для оголошення '{ad_data['name']}'")
-                        except Exception as e:
-                            logger.warning(
-                                f"Не вдалося відформатувати 'Сьогодні' в дату: {e}. Використовується оригінальний текст.")
-                            time_value = original_time_text  # Повертаємось до оригінального тексту при помилці
-                    else:
-                        # Якщо не "Сьогодні", використовуємо оригінальний текст
-                        time_value = original_time_text
-                # Якщо в split не було другого елемента, time_value залишиться "N/A"
-            # Присвоюємо отримані значення
-            ad_data['location'] = location_value
-            ad_data['time'] = time_value
-
-            # Ціна
-            price_tag = item.select_one("p.css-uj7mm0, p[data-testid='price']")
-            ad_data['price'] = price_tag.text.strip() if price_tag else "N/A"
-
-            # Площа
-            square_tag = item.select_one("span.css-6as4g5")
-            ad_data['square'] = square_tag.text.strip() if square_tag else ""
-
-            # Посилання
-            link_anchor = item.select_one("a")
-            if link_anchor and link_anchor.get('href'):
-                relative_link = link_anchor.get('href')
-                ad_data['link'] = urllib.parse.urljoin(page_url, relative_link)
-            else:
-                ad_data['link'] = "N/A"
+def parse_ads_cached(html_content: str, page_url: str) -> list[Ad]:
+    """
+    Як parse_ads_from_html, але якщо сторінка побайтово не змінилась з минулого разу
+    (без урахування nonce, csrf тощо), бере збережені раніше оголошення без парсингу HTML.
+    """
+    cache = get_http_cache()
+    if cache is None:
+        with PARSE_SECONDS.time(source="html"):
+            return parse_ads_from_html(html_content, page_url)
+
+    started = time.perf_counter()
+    body_hash = content_hash(html_content)
+    cached_ads = cache.get_parsed(page_url, body_hash)
+    if cached_ads is not None:
+        logger.info(f"Сторінка не змінилась, використано {len(cached_ads)} раніше розібраних оголошень: {page_url}")
+        scraped_ads = [Ad.from_dict(ad) for ad in cached_ads]
+        # Лише влучання: промах враховується як розбір HTML нижче
+        PARSE_SECONDS.observe(time.perf_counter() - started, source="cache")
+        return scraped_ads
+    with PARSE_SECONDS.time(source="html"):
+        raw_ads = parse_ads(html_content, page_url)
+        scraped_ads = [Ad.from_dict(ad) for ad in raw_ads]
+    # У кеші лишаються словники парсера (JSON), записи Ad з них відтворюються дешево
+    cache.store_parsed(page_url, body_hash, raw_ads)
+    return scraped_ads
 
-            if ad_data['name'] != "N/A" and ad_data['link'] != "N/A":
-                scraped_ads.append(ad_data)
 
-        except Exception as e:
-            logger.error(f"Помилка парсингу окремого оголошення на {page_url}: {e}", exc_info=True)
+# --- Головна функція ---
 
-    logger.info(f"Знайдено {len(scraped_ads)} оголошень на сторінці.")
-    return scraped_ads
+def format_ad_message(ad: Ad) -> str:
+    """Формує текст повідомлення для Telegram з даних оголошення."""
+    return (
+        f"🏠 <b>{ad.name}</b>\n"
+        f"📍 {ad.location}\n"
+        f"💰 {ad.price}\n"
+        f"📏 {ad.square}\n" # Якщо square порожній, нічого не виведе
+        f"⏰ {ad.time}\n"
+        f"🔗 <a href='{ad.link}'>Переглянути на OLX</a>"
+    )
+
+
+def format_price_drop_message(ad: Ad, old_price: float) -> str:
+    """Повідомлення про зниження ціни вже надісланого раніше оголошення."""
+    def amount(value: float) -> str:
+        return f"{value:,.0f}".replace(",", " ")
+    return (
+        f"📉 <b>Ціна знизилась</b>: {amount(old_price)} → {amount(ad.price_value)} {ad.currency or ''}\n"
+        + format_ad_message(ad)
+    )
+
+
+def is_price_drop(new_price: float | None, new_currency: str | None, old_price: float | None,
+                  old_currency: str | None) -> bool:
+    """Чи знизилась ціна (у тій самій валюті) щонайменше на OLX_PRICE_DROP_MIN_PERCENT відсотків."""
+    if new_price is None or old_price is None or new_currency != old_currency:
+        return False
+    return new_price < old_price * (1 - get_settings().price_drop_min_percent / 100)
+
+
+def select_new_ads(ads: list[Ad], known_ids: set[int]) -> list[Ad]:
+    """
+    Повертає оголошення, ідентифікаторів яких ще немає в known_ids, і одразу додає їх туди,
+    щоб дублікати в межах сторінки теж відсіювались.
+    """
+    new_ads = []
+    for ad in ads:
+        if ad.ad_id not in known_ids:
+            new_ads.append(ad)
+            known_ids.add(ad.ad_id)
+    return new_ads
+
+
+async def process_page(page_url: str, html_content: str | None, store: AdStore,
+                       notifier: "TelegramNotifier", searches: list[Search],
+                       enricher: DetailEnricher | None = None) -> tuple[list[int], dict[str, int], dict[str, int]]:
+    """Парсить сторінку і ставить у чергу Telegram нові оголошення кожного пошуку; повертає (ids, нові, надіслані)."""
+    new_counts = {search.name: 0 for search in searches}
+    sent_counts = dict(new_counts)
+    if not html_content:
+        logger.warning(f"Пропуск сторінки через помилку завантаження: {page_url}")
+        return [], new_counts, sent_counts
 
+    logger.info(f"Парсинг сторінки: {page_url}")
+    # Парсинг блокує, тому виконуємо його в пулі потоків парсера
+    ads_from_page = await run_blocking(parse_ads_cached, html_content, page_url)
+    page_ids = [ad.ad_id for ad in ads_from_page]
+    CARDS_PER_PAGE.observe(len(page_ids))
+
+    dedup_started = time.perf_counter()
+    # Точковий пошук у базі лише для оголошень з цієї сторінки
+    known_ids = await run_blocking(store.known_ids, page_ids)
+    known_ads = [ad for ad in ads_from_page if ad.ad_id in known_ids]
+    globally_new_ads = select_new_ads(ads_from_page, known_ids)
+    price_drops, relists = [], {}
+    settings = get_settings()
+    if settings.price_tracking:
+        # Зміни цін відомих оголошень і повторні публікації (до збереження нових, щоб не знайти самих себе)
+        price_changes = await run_blocking(store.record_prices, known_ads)
+        price_drops = [(ad, old_price) for ad, old_price, old_currency in price_changes
+                       if is_price_drop(ad.price_value, ad.currency, old_price, old_currency)]
+        relist_since = (datetime.now() - timedelta(days=settings.relist_window_days)).isoformat(timespec="seconds")
+        relists = await run_blocking(store.find_relists, globally_new_ads, relist_since)
+        PRICE_CHANGES.inc(len(price_drops), direction="down")
+        PRICE_CHANGES.inc(len(price_changes) - len(price_drops), direction="other")
+    else:
+        # last_seen потрібен і без відстеження цін (вивантаження історії, пошук повторних публікацій)
+        await run_blocking(store.touch_ads, [ad.ad_id for ad in known_ads])
+    await run_blocking(store.upsert_ads, globally_new_ads)
+    if enricher is not None:
+        await enricher.enqueue(globally_new_ads)
+    DEDUP_ADS.inc(len(globally_new_ads), result="new")
+    DEDUP_ADS.inc(len(page_ids) - len(globally_new_ads), result="known")
+    DEDUP_SECONDS.observe(time.perf_counter() - dedup_started)
+
+    for search in searches:
+        # Попередній відбір; остаточно новими будуть ті, які позначить переглянутими саме цей виклик mark_seen
+        already_seen = await run_blocking(store.seen_by, search.name, page_ids)
+        candidates = [ad for ad in ads_from_page if ad.ad_id not in already_seen]
+        # Зниження цін оголошень, які цей пошук уже бачив (нові для пошуку й так будуть надіслані)
+        search_drops = [(ad, old_price) for ad, old_price in price_drops if ad.ad_id in already_seen]
+        # Повідомлення, що надсилаються, лише якщо оголошення виявиться новим (зниження ціни повторної публікації)
+        relist_drops = []
+
+        relisted = [ad for ad in candidates if ad.ad_id in relists]
+        if relisted:
+            seen_before = await run_blocking(store.seen_by, search.name, [relists[ad.ad_id][0] for ad in relisted])
+            suppressed = set()
+            for ad in relisted:
+                old_id, old_price, old_currency = relists[ad.ad_id]
+                if old_id not in seen_before:
+                    continue
+                suppressed.add(ad.ad_id)
+                if is_price_drop(ad.price_value, ad.currency, old_price, old_currency):
+                    relist_drops.append((ad, old_price))
+            if suppressed:
+                RELISTS_SUPPRESSED.inc(len(suppressed))
+                logger.info(f"[{search.name}] {len(suppressed)} оголошень є повторними публікаціями вже надісланих.")
+                candidates = [ad for ad in candidates if ad.ad_id not in suppressed]
+
+        # Відхилені правилами пошуку позначаються переглянутими нижче, але не надсилаються
+        new_ads, rejected = search.rules.apply(candidates)
+        for _, reason in rejected:
+            RULES_REJECTED.inc(search=search.name, reason=reason)
+        if rejected:
+            logger.info(f"[{search.name}] Правила пошуку відхилили {len(rejected)} нових оголошень.")
+        search_drops = [(ad, old_price) for ad, old_price in search_drops if search.rules.rejection_reason(ad) is None]
+        relist_drops = [(ad, old_price) for ad, old_price in relist_drops if search.rules.rejection_reason(ad) is None]
+
+        # Позначка "переглянуто" і повідомлення про нові оголошення записуються однією транзакцією:
+        # паралельний обробник тієї ж сторінки чи перезапуск після збою не надішлють їх вдруге
+        pending = {ad.ad_id: [(search.chat_id, format_ad_message(ad))] for ad in new_ads}
+        for ad, old_price in relist_drops:
+            pending[ad.ad_id] = [(search.chat_id, format_price_drop_message(ad, old_price))]
+        search_new_ids = await run_blocking(store.mark_seen, search.name, page_ids, pending)
+        new_counts[search.name] = len(search_new_ids)
+        sent_counts[search.name] = sum(1 for ad in new_ads if ad.ad_id in search_new_ids)
+        queued_drops = len(search_drops) + sum(1 for ad, _ in relist_drops if ad.ad_id in search_new_ids)
+        if not sent_counts[search.name] and not queued_drops:
+            continue
+        logger.info(f"[{search.name}] На сторінці {page_url} знайдено {sent_counts[search.name]} нових оголошень "
+                    f"і {queued_drops} знижень ціни, відправка в Telegram...")
+        # Черга сама дотримується лімітів Telegram і об'єднує повідомлення, якщо їх багато
+        await notifier.send_many([(search.chat_id, format_price_drop_message(ad, old_price))
+                                  for ad, old_price in search_drops])
+        notifier.wake()
+    return page_ids, new_counts, sent_counts
+
+
+async def main(bot: "Bot | None" = None):
+    """Один цикл парсингу всіх збережених пошуків (searches.py); без bot створюється тимчасовий aiogram Bot."""
+    # Відправка в Telegram потребує aiogram, що імпортується довго, тож завантажуємо його лише тут
+    from notifier import TelegramNotifier
 
-def read_existing_ad_links(csv_filepath: str) -> set[str]:
-    """Читає існуючі посилання на оголошення з CSV файлу."""
-    existing_links = set()
-    try:
-        with open(csv_filepath, "r", encoding="utf-8", newline="") as file:
-            reader = csv.reader(file)
-            header = next(reader, None) # Пропустити заголовок, якщо він є
-            if header: # Перевірка, чи файл не порожній
-                 # Визначаємо індекс колонки з посиланням (припускаємо, що це остання колонка)
-                link_index = len(header) - 1
-                for row in reader:
-                    if len(row) > link_index: # Перевірка, чи рядок має достатньо колонок
-                        existing_links.add(row[link_index])
-    except FileNotFoundError:
-        logger.info("CSV файл ще не існує. Буде створено новий.")
-    except Exception as e:
-        logger.error(f"Помилка читання CSV файлу {csv_filepath}: {e}")
-    return existing_links
-
-
-def save_new_ads_to_csv(csv_filepath: str, new_ads: list[dict]):
-    """Додає нові оголошення до CSV файлу."""
-    # Визначаємо, чи існує файл і чи він порожній, щоб додати заголовок
-    file_exists = os.path.isfile(csv_filepath)
-    is_empty = not file_exists or os.path.getsize(csv_filepath) == 0
+    logger.info("===== Запуск парсера OLX =====")
+    settings = get_settings().require("telegram_chat_id")
+    # Файл пошуків і база читаються в пулі потоків, щоб не затримувати event loop бота (вебхук)
+    searches = await run_blocking(load_searches, start_url, settings.telegram_chat_id)
+    search_groups = group_by_url(searches, normalize=with_newest_first if settings.incremental_crawl else None)
+    logger.info(f"Пошуків: {len(searches)}, різних URL для обходу: {len(search_groups)}.")
+
+    cycle_started = time.perf_counter()
+    own_bot = bot is None
+    if own_bot:
+        from aiogram import Bot
+        from aiogram.client.default import DefaultBotProperties
+        from aiogram.enums import ParseMode
+
+        bot = Bot(token=settings.require("telegram_bot_token").telegram_bot_token,
+                  default=DefaultBotProperties(parse_mode=ParseMode.HTML))
 
     try:
-        with open(csv_filepath, "a", encoding="utf-8", newline="") as file:
-            # Визначаємо порядок колонок (важливо!)
-            fieldnames = ['time', 'name', 'location', 'price', 'square', 'link']
-            writer = csv.DictWriter(file, fieldnames=fieldnames)
-
-            if is_empty:
-                writer.writeheader() # Записуємо заголовок лише якщо файл новий/порожній
-
-            # Записуємо дані нових оголошень
-            for ad_dict in new_ads:
-                 # Переконуємось, що словник містить всі ключі з fieldnames
-                 row_to_write = {key: ad_dict.get(key, '') for key in fieldnames}
-                 writer.writerow(row_to_write)
-        logger.info(f"Успішно додано {len(new_ads)} нових оголошень до {csv_filepath}")
-    except IOError as e:
-        logger.error(f"Помилка запису до CSV файлу {csv_filepath}: {e}")
-    except Exception as e:
-        logger.error(f"Неочікувана помилка при записі до CSV: {e}")
-
+        store = await run_blocking(AdStore)
+        try:
+            # Одноразова міграція старого CSV (наступні запуски її пропускають)
+            await run_blocking(store.import_csv_once, CSV_FILE_PATH)
+            # Черга також досилає повідомлення, що лишились недоставленими з минулих запусків
+            async with TelegramNotifier(bot, store) as notifier:
+                # Збагачення сторінками оголошень має власний fetcher і не сповільнює обхід пошуку
+                enricher_context = (DetailEnricher(store, headers_list) if settings.enrich_details
+                                    else contextlib.nullcontext())
+                async with enricher_context as enricher, \
+                        AsyncFetcher(headers_list, cache=get_http_cache()) as fetcher:
+                    # В адаптивному режимі опитуються лише групи, чий інтервал минув (див. scheduling.py)
+                    tasks = list(search_groups)
+                    if settings.adaptive_schedule:
+                        tasks = await AdaptiveScheduler(store).due_tasks(search_groups)
+                    # Групи пошуків розподіляються через спільну чергу: кілька процесів з однією базою
+                    # обходять різні групи, а не всі одне й те саме
+                    await WorkQueue(store).run(
+                        tasks,
+                        lambda search_url: run_search_group(store, fetcher, notifier, search_url,
+                                                            search_groups[search_url], enricher),
+                    )
+            if settings.export_parquet:
+                # Дописуємо в Parquet оголошення, що з'явились з попереднього вивантаження.
+                # analytics завантажує pyarrow, що імпортується довго, тож імпортуємо його лише тут
+                from analytics import export_parquet
+                try:
+                    await run_blocking(export_parquet, store)
+                except Exception as e:
+                    logger.error(f"Не вдалося оновити вивантаження Parquet: {e}")
+        finally:
+            await run_blocking(store.close)
+    finally:
+        if own_bot:
+            await bot.session.close()
+
+    CYCLE_SECONDS.observe(time.perf_counter() - cycle_started)
+    log_http_stats()
+    logger.info("===== Парсер OLX завершив роботу =====")
 
-# --- Головна функція ---
 
-def main():
-    """Основний процес парсингу."""
-    logger.info("===== Запуск парсера OLX =====")
+async def run_search_group(store: AdStore, fetcher: AsyncFetcher, notifier: "TelegramNotifier",
+                           search_url: str, searches: list[Search], enricher: DetailEnricher | None = None) -> int:
+    """
+    Обходить сторінки одного URL результатів і надсилає нові оголошення всім пошукам групи.
+    Сторінки обробляються у міру завантаження, тож оголошення йдуть у Telegram, не чекаючи кінця обходу.
+    В інкрементальному режимі (OLX_INCREMENTAL_CRAWL=1) вже повністю обійдений пошук завантажується
+    по сторінці до першої без нових оголошень.
+    Повертає кількість запитів сторінок (за нею адаптивний розклад оцінює вартість обходу).
+    """
+    settings = get_settings()
+    crawled = settings.incremental_crawl and await run_blocking(store.is_crawled, search_url)
 
     # 1. Отримати список всіх URL сторінок для парсингу
-    all_page_urls = get_all_olx_urls(start_url)
+    first_page_html = await fetcher.fetch(search_url)
+    all_page_urls = []
+    if first_page_html:
+        all_page_urls = await run_blocking(get_all_olx_urls, search_url, first_page_html)
     if not all_page_urls:
-        logger.warning("Не вдалося отримати URL сторінок для парсингу. Завершення роботи.")
-        send_telegram_message_oleksandr("❌ Не вдалося отримати URL сторінок OLX для парсингу.")
-        return
-
-    logger.info(f"Буде оброблено {len(all_page_urls)} сторінок.")
-
-    # 2. Прочитати існуючі посилання з CSV
-    existing_links = read_existing_ad_links(CSV_FILE_PATH)
-    logger.info(f"Знайдено {len(existing_links)} існуючих посилань у CSV.")
-
-    # 3. Спарсити оголошення з усіх сторінок
-    all_scraped_ads = []
-    for page_url in all_page_urls:
-        ads_from_page = scrape_ads_from_page(page_url)
-        all_scraped_ads.extend(ads_from_page)
-        if page_url != all_page_urls[-1]: # Не робимо затримку після останньої сторінки
-             delay()
-
-    logger.info(f"Всього зібрано {len(all_scraped_ads)} оголошень зі всіх сторінок.")
-
-    # 4. Визначити нові оголошення
-    new_ads_found = []
-    processed_links_this_run = set() # Щоб уникнути дублів з поточного запуску
-
-    for ad in all_scraped_ads:
-        ad_link = ad.get('link')
-        # Перевіряємо, чи є посилання, чи воно не N/A, чи його немає в існуючих і чи не обробляли його вже
-        if ad_link and ad_link != "N/A" and ad_link not in existing_links and ad_link not in processed_links_this_run:
-            new_ads_found.append(ad)
-            processed_links_this_run.add(ad_link) # Додаємо до оброблених в цьому запуску
-
-    logger.info(f"Знайдено {len(new_ads_found)} нових оголошень.")
-
-    # 5. Зберегти нові оголошення та відправити в Telegram
-    if new_ads_found:
-        save_new_ads_to_csv(CSV_FILE_PATH, new_ads_found)
-        logger.info(f"Відправка {len(new_ads_found)} нових оголошень в Telegram...")
-        send_telegram_message_oleksandr(f"✅ Знайдено нових оголошень: {len(new_ads_found)}")
-        for ad in new_ads_found:
-            # Формуємо повідомлення з даних словника
-            msg = (
-                f"🏠 <b>{ad.get('name', 'Без назви')}</b>\n"
-                f"📍 {ad.get('location', 'N/A')}\n"
-                f"💰 {ad.get('price', 'N/A')}\n"
-                f"📏 {ad.get('square', '')}\n" # Якщо square порожній, нічого не виведе
-                f"⏰ {ad.get('time', 'N/A')}\n"
-                f"🔗 <a href='{ad.get('link')}'>Переглянути на OLX</a>"
-            )
-            send_telegram_message_oleksandr(msg)
-            time.sleep(1) # Невелика затримка між повідомленнями в Telegram
-        logger.info("📨 Нові оголошення відправлено.")
+        logger.warning(f"Не вдалося отримати URL сторінок для парсингу {search_url}.")
+        for search in searches:
+            prefix = "" if search.name == DEFAULT_SEARCH_NAME else f"[{search.name}] "
+            await notifier.send(search.chat_id, f"❌ {prefix}Не вдалося отримати URL сторінок OLX для парсингу.")
+        return 1
+
+    logger.info(f"Буде оброблено до {len(all_page_urls)} сторінок для {search_url}.")
+
+    # 2. Перша сторінка вже завантажена, решту обробляємо в міру надходження
+    first_page_ids, page_new_counts, sent_counts = await process_page(
+        search_url, first_page_html, store, notifier, searches, enricher)
+    requests_made = 1
+    if crawled:
+        pages_done = 1
+        for page_url in all_page_urls[1:]:
+            if not any(page_new_counts.values()):
+                logger.info(f"Сторінка містить лише відомі оголошення, обхід {search_url} зупинено після {pages_done} сторінок.")
+                break
+            html_content = await fetcher.fetch(page_url)
+            requests_made += 1
+            if not html_content:
+                # Сторінку не вдалося завантажити: не робимо висновків і переходимо до наступної
+                logger.warning(f"Пропуск сторінки через помилку завантаження: {page_url}")
+                continue
+            _, page_new_counts, page_sent_counts = await process_page(page_url, html_content, store, notifier, searches, enricher)
+            for name, count in page_sent_counts.items():
+                sent_counts[name] += count
+            pages_done += 1
     else:
-        logger.info("❌ Нових оголошень немає.")
-        send_telegram_message_oleksandr("ℹ️ Нових оголошень не знайдено.")
+        requests_made = len(all_page_urls)
+        async for page_url, html_content in fetcher.iter_pages(all_page_urls[1:]):
+            _, _, page_sent_counts = await process_page(page_url, html_content, store, notifier, searches, enricher)
+            for name, count in page_sent_counts.items():
+                sent_counts[name] += count
+
+    if settings.incremental_crawl and first_page_ids and not crawled:
+        await run_blocking(store.mark_crawled, search_url)
+
+    # 3. Підсумок для кожного пошуку
+    for search in searches:
+        prefix = "" if search.name == DEFAULT_SEARCH_NAME else f"[{search.name}] "
+        new_ads_count = sent_counts[search.name]
+        if new_ads_count:
+            logger.info(f"📨 {prefix}Відправлено {new_ads_count} нових оголошень.")
+            message = f"✅ {prefix}Знайдено нових оголошень: {new_ads_count}"
+        else:
+            logger.info(f"❌ {prefix}Нових оголошень немає.")
+            if settings.adaptive_schedule or settings.scrape_interval_minutes:
+                # Пошуки опитуються часто, тож порожні підсумки лише засмічували б чат;
+                # "нічого не знайдено" надсилається лише для щоденного запуску
+                continue
+            message = f"ℹ️ {prefix}Нових оголошень не знайдено."
+        await notifier.send(search.chat_id, message)
+    return requests_made
 
-    logger.info("===== Парсер OLX завершив роботу =====")
+
+async def start_parsing(bot: "Bot | None" = None):
+    await main(bot)
 
 
-def start_parsing():
-    main()
+async def _run_once():
+    """Один цикл з командного рядка; сесії aiohttp закриваються разом з event loop."""
+    try:
+        await main()
+    finally:
+        await close_async_sessions()
 
 
 # --- Точка входу ---
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    setup_logging()
+    asyncio.run(_run_once())
\ No newline at end of file
@@ -1,21 +1,86 @@
+import atexit
 import logging
+import logging.handlers
+import os
+import queue
+import threading
+
+from config import get_settings
 
 log_format = (
     "%(asctime)s [%(levelname)s] - %(name)s - %(funcName)15s:%(lineno)d - %(message)s"
 )
 
-file_handler = logging.FileHandler("data/application.log", encoding='utf-8')
-file_handler.setLevel(logging.ERROR)     # для реліза необхідно змінити на ERROR
-file_handler.setFormatter(logging.Formatter(log_format))
+_configured = False
+_configure_lock = threading.Lock()
+_listener: logging.handlers.QueueListener | None = None
+# Логери модулів застосунку (get_logger); рівень їм задає setup_logging з налаштувань
+_module_loggers: set[str] = set()
+_level: str | None = None
+
+
+class _LazyFileHandler(logging.FileHandler):
+    """Файловий обробник, що створює каталог і відкриває файл лише при першому записі."""
+
+    def __init__(self, filename: str, encoding: str = "utf-8"):
+        super().__init__(filename, encoding=encoding, delay=True)
+
+    def _open(self):
+        directory = os.path.dirname(self.baseFilename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        return super()._open()
+
+
+def setup_logging(log_file: str | None = None, use_queue: bool | None = None):
+    """
+    Налаштовує журнал процесу (консоль + файл помилок) один раз; повторні виклики нічого не роблять.
+    Викликається точками входу (bot.py, kyiv_rent_to_telegram.py, analytics.py), а не при імпорті,
+    тож модулі можна імпортувати у воркерах, тестах і бенчмарках без відкриття файлів.
+    Файл, рівні та черга беруться з налаштувань (OLX_LOG_*), якщо не передані явно.
+    """
+    global _configured, _listener, _level
+    with _configure_lock:
+        if _configured:
+            return
+        settings = get_settings()
+        log_file = settings.log_file if log_file is None else log_file
+        use_queue = settings.log_queue if use_queue is None else use_queue
+        formatter = logging.Formatter(log_format)
+        stream_handler = logging.StreamHandler()
+        stream_handler.setLevel(logging.DEBUG)
+        stream_handler.setFormatter(formatter)
+        file_handler = _LazyFileHandler(log_file)
+        file_handler.setLevel(settings.log_file_level)
+        file_handler.setFormatter(formatter)
 
-stream_handler = logging.StreamHandler()
-stream_handler.setLevel(logging.DEBUG)   # для дебага потрібно змінити на DEBUG
-stream_handler.setFormatter(logging.Formatter(log_format))
+        root = logging.getLogger()
+        if use_queue:
+            # Потік QueueListener форматує і записує повідомлення; виклик logger.* лише кладе запис у чергу
+            log_queue = queue.SimpleQueue()
+            _listener = logging.handlers.QueueListener(log_queue, stream_handler, file_handler,
+                                                       respect_handler_level=True)
+            _listener.start()
+            atexit.register(_listener.stop)
+            root.addHandler(logging.handlers.QueueHandler(log_queue))
+        else:
+            root.addHandler(stream_handler)
+            root.addHandler(file_handler)
+        _level = settings.log_level
+        for name in _module_loggers:
+            logging.getLogger(name).setLevel(_level)
+        _configured = True
 
 
 def get_logger(name):
+    """
+    Логер модуля. Обробників не додає (їх один раз налаштовує setup_logging на кореневому логері),
+    тож виклик дешевий і повідомлення не дублюються. Рівень (OLX_LOG_LEVEL) задається при setup_logging,
+    щоб імпорт модуля не читав налаштувань.
+    """
     logger = logging.getLogger(name)
-    logger.setLevel(logging.DEBUG)
-    logger.addHandler(stream_handler)
-    logger.addHandler(file_handler)
+    with _configure_lock:
+        _module_loggers.add(name)
+        if _level is not None:
+            logger.setLevel(_level)
     return logger
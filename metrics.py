@@ -0,0 +1,183 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Межі кошиків гістограм за замовчуванням (секунди)
+DEFAULT_TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for key, value in sorted(labels.items()):
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, label_names: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"Метрика {self.name} очікує мітки {self.label_names}, отримано {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def _header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+
+
+class Counter(_Metric):
+    """Лічильник, що лише зростає."""
+
+    type_name = "counter"
+
+    def __init__(self, name, documentation, label_names=()):
+        super().__init__(name, documentation, label_names)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def expose(self) -> list[str]:
+        lines = self._header()
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(dict(zip(self.label_names, key)))} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Гістограма з фіксованими кошиками (сумісна з форматом Prometheus)."""
+
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, label_names=(), buckets=DEFAULT_TIME_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: dict[tuple, list[int]] = {}
+        self._sums: dict[tuple, float] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            counts[index] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    @contextmanager
+    def time(self, **labels):
+        """Вимірює тривалість блоку коду в секундах."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            return sum(self._counts.get(self._key(labels), ()))
+
+    def expose(self) -> list[str]:
+        lines = self._header()
+        with self._lock:
+            for key in sorted(self._counts):
+                labels = dict(zip(self.label_names, key))
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), self._counts[key]):
+                    cumulative += count
+                    bucket_labels = _format_labels({**labels, "le": _format_value(bound)})
+                    lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(self._sums[key])}")
+                lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Набір метрик процесу та їх експорт у текстовому форматі Prometheus."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, label_names: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, label_names))
+
+    def histogram(self, name: str, documentation: str, label_names: tuple[str, ...] = (),
+                  buckets=DEFAULT_TIME_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, label_names, buckets))
+
+    def expose(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.expose())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# --- Метрики парсера ---
+PAGE_FETCH_SECONDS = REGISTRY.histogram(
+    "olx_page_fetch_seconds", "Тривалість завантаження сторінки (разом з очікуванням ліміту)", ("status",))
+PAGE_BYTES = REGISTRY.histogram(
+    "olx_page_bytes", "Розмір завантаженої сторінки в байтах", (),
+    buckets=(10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 2_500_000))
+PARSE_SECONDS = REGISTRY.histogram(
+    "olx_parse_seconds", "Тривалість розбору сторінки", ("source",))
+CARDS_PER_PAGE = REGISTRY.histogram(
+    "olx_cards_per_page", "Кількість оголошень на сторінці", (),
+    buckets=(0, 1, 5, 10, 20, 30, 40, 50, 60))
+DEDUP_SECONDS = REGISTRY.histogram(
+    "olx_dedup_seconds", "Тривалість відбору нових оголошень сторінки (пошук у базі + позначення)")
+DEDUP_ADS = REGISTRY.counter(
+    "olx_dedup_ads_total", "Оголошення за результатом перевірки на новизну", ("result",))
+PRICE_CHANGES = REGISTRY.counter(
+    "olx_price_changes_total", "Зміни ціни відомих оголошень", ("direction",))
+RELISTS_SUPPRESSED = REGISTRY.counter(
+    "olx_relists_suppressed_total", "Повторні публікації, не надіслані як нові оголошення")
+RULES_REJECTED = REGISTRY.counter(
+    "olx_rules_rejected_total", "Нові оголошення, відхилені правилами пошуку", ("search", "reason"))
+DETAIL_FETCHES = REGISTRY.counter(
+    "olx_detail_fetches_total", "Завантаження сторінок оголошень (збагачення)", ("result",))
+HTTP_RETRY_COUNT = REGISTRY.counter(
+    "olx_http_retries_total", "Повторні HTTP-запити", ("host", "reason"))
+NOTIFY_SECONDS = REGISTRY.histogram(
+    "olx_notify_seconds", "Тривалість відправки повідомлення в Telegram", ("result",))
+NOTIFY_RATE_LIMITED = REGISTRY.counter(
+    "olx_notify_rate_limited_total", "Відповіді Telegram 429 (перевищено ліміт)")
+NOTIFY_MESSAGES = REGISTRY.counter(
+    "olx_notify_messages_total", "Повідомлення Telegram за результатом", ("result",))
+CYCLE_SECONDS = REGISTRY.histogram(
+    "olx_cycle_seconds", "Тривалість повного циклу парсингу", (),
+    buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1800))
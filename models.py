@@ -0,0 +1,149 @@
+import hashlib
+import re
+from dataclasses import dataclass
+from datetime import datetime
+
+from ad_ids import canonical_link, extract_ad_id
+from parsers import parse_listing_time
+
+_NUMBER_RE = re.compile(r"\d[\d\s]*(?:[.,]\d+)?")
+_CURRENCY_MARKERS = (("грн", "UAH"), ("uah", "UAH"), ("$", "USD"), ("usd", "USD"), ("€", "EUR"), ("eur", "EUR"))
+_WORD_RE = re.compile(r"\w+")
+
+
+def parse_number(text: str | None) -> float | None:
+    """Перше число в тексті: "15 000 грн." -> 15000.0, "45,5 м²" -> 45.5."""
+    if not text:
+        return None
+    match = _NUMBER_RE.search(text)
+    if not match:
+        return None
+    digits = re.sub(r"\s", "", match.group()).replace(",", ".")
+    try:
+        return float(digits)
+    except ValueError:
+        return None
+
+
+def parse_price(text: str | None) -> tuple[float | None, str | None]:
+    """Ціна та валюта з тексту картки: "15 000 грн." -> (15000.0, "UAH"), "$500" -> (500.0, "USD")."""
+    value = parse_number(text)
+    if value is None:
+        return None, None
+    lowered = text.lower()
+    currency = next((code for marker, code in _CURRENCY_MARKERS if marker in lowered), None)
+    return value, currency
+
+
+def parse_district(location: str | None) -> str | None:
+    """Район з тексту локації "Київ, Печерський" -> "Печерський"."""
+    if not location or "," not in location:
+        return None
+    district = location.split(",", 1)[1].strip()
+    return district or None
+
+
+def ad_fingerprint(name: str | None, location: str | None, area: float | None) -> int:
+    """
+    Відбиток вмісту оголошення (назва, локація, площа) як знакове 64-бітне число.
+    Не залежить від регістру, пунктуації та ідентифікатора, тож збігається в оголошення,
+    видаленого й опублікованого знову під новим посиланням.
+    """
+    title = " ".join(_WORD_RE.findall((name or "").casefold()))
+    place = " ".join(_WORD_RE.findall((location or "").casefold()))
+    size = f"{area:.0f}" if area is not None else ""
+    digest = hashlib.blake2b(f"{title}|{place}|{size}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+@dataclass(slots=True)
+class Ad:
+    """
+    Оголошення з уже розібраними числовими полями.
+    Текстові поля (price, square, time) зберігаються як на сайті — для повідомлень у Telegram,
+    а числові значення розбираються один раз під час створення запису (Ad.from_dict).
+    """
+    ad_id: int
+    link: str
+    name: str
+    location: str = "N/A"
+    time: str = "N/A"
+    price: str = "N/A"
+    square: str = ""
+    price_value: float | None = None
+    currency: str | None = None
+    area: float | None = None
+    district: str | None = None
+    listed_at: datetime | None = None
+    is_business: bool | None = None
+
+    @property
+    def price_per_m2(self) -> float | None:
+        if self.price_value is None or not self.area:
+            return None
+        return round(self.price_value / self.area, 2)
+
+    @property
+    def fingerprint(self) -> int:
+        return ad_fingerprint(self.name, self.location, self.area)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Ad":
+        """
+        Створює запис зі словника парсера (parsers.py) або рядка старого CSV.
+        Час публікації береться з created_at (його заповнюють парсери — з JSON стану або з тексту картки
+        до форматування для показу); з тексту time він розбирається лише для рядків старого CSV.
+        """
+        link = canonical_link(data["link"])
+        price_value, currency = data.get("price_value"), data.get("currency")
+        if price_value is None:
+            price_value, currency = parse_price(data.get("price"))
+        area = data.get("area")
+        if area is None:
+            area = parse_number(data.get("square"))
+        listed_at = None
+        if data.get("created_at"):
+            try:
+                listed_at = datetime.fromisoformat(data["created_at"])
+            except (TypeError, ValueError):
+                listed_at = None
+            else:
+                # Час з картки локальний, тож і час зі JSON стану зводимо до локального без зони
+                if listed_at.tzinfo is not None:
+                    listed_at = listed_at.astimezone().replace(tzinfo=None)
+        if listed_at is None:
+            listed_at = parse_listing_time(data.get("time"))
+        return cls(
+            ad_id=data.get("ad_id") or extract_ad_id(link),
+            link=link,
+            name=data.get("name") or "N/A",
+            location=data.get("location") or "N/A",
+            time=data.get("time") or "N/A",
+            price=data.get("price") or "N/A",
+            square=data.get("square") or "",
+            price_value=price_value,
+            currency=currency,
+            area=area,
+            district=parse_district(data.get("location")),
+            listed_at=listed_at,
+            is_business=data.get("is_business"),
+        )
+
+    def to_dict(self) -> dict:
+        """Словник з простими типами (для JSON)."""
+        return {
+            "ad_id": self.ad_id,
+            "link": self.link,
+            "name": self.name,
+            "location": self.location,
+            "time": self.time,
+            "price": self.price,
+            "square": self.square,
+            "price_value": self.price_value,
+            "currency": self.currency,
+            "area": self.area,
+            "price_per_m2": self.price_per_m2,
+            "district": self.district,
+            "listed_at": self.listed_at.isoformat() if self.listed_at else None,
+            "is_business": self.is_business,
+        }
@@ -0,0 +1,211 @@
+import asyncio
+import time
+
+from aiogram import Bot
+from aiogram.enums import ParseMode
+from aiogram.exceptions import (TelegramBadRequest, TelegramForbiddenError, TelegramNotFound,
+                                TelegramRetryAfter)
+from aiogram.types import LinkPreviewOptions
+
+from config import get_settings
+from fetcher import TokenBucket
+from http_session import backoff_delay
+from jobs import run_blocking
+from logger_ import get_logger
+from metrics import NOTIFY_MESSAGES, NOTIFY_RATE_LIMITED, NOTIFY_SECONDS
+from storage import AdStore
+from work_queue import worker_id
+
+logger = get_logger(__name__)
+
+TELEGRAM_MESSAGE_LIMIT = 4096
+# Під час 429 швидкість чату знижується, але не нижче цієї частки від базової
+_MIN_RATE_FACTOR = 0.1
+
+
+class TelegramNotifier:
+    """
+    Черга вихідних повідомлень Telegram поверх aiogram Bot.
+
+    Повідомлення спершу записуються в таблицю outbox (AdStore), тож недоставлені після
+    перезапуску будуть надіслані наступним запуском. Обробник бере повідомлення з outbox
+    в оренду, тож кілька процесів з однією базою не надсилають те саме повідомлення двічі. Фоновий обробник надсилає їх з урахуванням
+    загального ліміту та ліміту кожного чату; на 429 чекає retry_after і знижує швидкість чату,
+    після успішних відправок поступово її відновлює. Коли для чату накопичується багато
+    повідомлень, кілька з них об'єднуються в одне (до 4096 символів). Ліміти — TELEGRAM_* (config.py).
+
+        async with TelegramNotifier(bot, store) as notifier:
+            await notifier.send(chat_id, text)
+        # на виході чекає, доки черга спорожніє (відкладені через помилки лишаються в outbox)
+    """
+
+    def __init__(self, bot: Bot, store: AdStore, global_rate: float | None = None,
+                 batch_threshold: int | None = None, owner: str | None = None):
+        self.bot = bot
+        self.store = store
+        self.settings = get_settings()
+        self.owner = owner or worker_id()
+        self.batch_threshold = self.settings.telegram_batch_threshold if batch_threshold is None else batch_threshold
+        global_rate = self.settings.telegram_global_rate if global_rate is None else global_rate
+        self._global_bucket = TokenBucket(global_rate, max(1, int(global_rate)))
+        self._chat_buckets: dict[int, TokenBucket] = {}
+        self._wakeup = asyncio.Event()
+        self._closing = False
+        self._worker: asyncio.Task | None = None
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.drain()
+
+    def start(self):
+        if self._worker is None:
+            self._closing = False
+            self._worker = asyncio.create_task(self._run())
+
+    async def send(self, chat_id: int, text: str):
+        """Ставить повідомлення в чергу на відправку."""
+        await self.send_many([(chat_id, text)])
+
+    async def send_many(self, messages: list[tuple[int, str]]):
+        """Ставить кілька повідомлень (chat_id, text) в чергу однією транзакцією."""
+        if not messages:
+            return
+        await run_blocking(self.store.enqueue_messages, messages)
+        self._wakeup.set()
+
+    def wake(self):
+        """Повідомляє обробнику, що в outbox з'явились повідомлення, додані в обхід send (див. AdStore.mark_seen)."""
+        self._wakeup.set()
+
+    async def drain(self):
+        """Чекає, доки будуть надіслані всі готові до відправки повідомлення, і зупиняє обробник."""
+        if self._worker is None:
+            return
+        self._closing = True
+        self._wakeup.set()
+        try:
+            await self._worker
+        finally:
+            self._worker = None
+            # Повідомлення, які обробник узяв, але не надсилав, одразу стають доступними іншим обробникам
+            await run_blocking(self.store.release_messages, self.owner)
+        pending = await run_blocking(self.store.count_pending_messages)
+        if pending:
+            logger.warning(f"У черзі Telegram лишилось {pending} недоставлених повідомлень, їх буде надіслано пізніше.")
+
+    # --- Обробник черги ---
+
+    def _base_rate(self, chat_id: int) -> float:
+        # Ідентифікатори груп і каналів від'ємні
+        return self.settings.telegram_group_rate if chat_id < 0 else self.settings.telegram_chat_rate
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(self._base_rate(chat_id), 1)
+            self._chat_buckets[chat_id] = bucket
+        return bucket
+
+    async def _run(self):
+        while True:
+            rows = await run_blocking(self.store.claim_messages, self.owner, time.time(),
+                                     self.settings.outbox_lease_seconds)
+            if not rows:
+                if self._closing:
+                    return
+                self._wakeup.clear()
+                try:
+                    # Прокидаємось на нове повідомлення або періодично — для відкладених
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=30)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            by_chat: dict[int, list[tuple[int, str, int]]] = {}
+            for message_id, chat_id, text, attempts in rows:
+                by_chat.setdefault(chat_id, []).append((message_id, text, attempts))
+            await asyncio.gather(*(self._deliver_chat(chat_id, messages) for chat_id, messages in by_chat.items()))
+
+    def _make_batches(self, messages: list[tuple[int, str, int]]) -> list[tuple[list[int], str, int]]:
+        """Розбиває повідомлення чату на відправки: поодинці або, якщо їх багато, пачками до 4096 символів."""
+        if len(messages) <= self.batch_threshold:
+            return [([message_id], text, attempts) for message_id, text, attempts in messages]
+        batches = []
+        ids, parts, length, max_attempts = [], [], 0, 0
+        for message_id, text, attempts in messages:
+            extra = len(text) + (2 if parts else 0)
+            if parts and length + extra > TELEGRAM_MESSAGE_LIMIT:
+                batches.append((ids, "\n\n".join(parts), max_attempts))
+                ids, parts, length, max_attempts = [], [], 0, 0
+                extra = len(text)
+            ids.append(message_id)
+            parts.append(text)
+            length += extra
+            max_attempts = max(max_attempts, attempts)
+        if parts:
+            batches.append((ids, "\n\n".join(parts), max_attempts))
+        return batches
+
+    async def _deliver_chat(self, chat_id: int, messages: list[tuple[int, str, int]]):
+        """Надсилає повідомлення одного чату по черзі; при помилці зупиняється, щоб не порушити порядок."""
+        bucket = self._chat_bucket(chat_id)
+        base_rate = self._base_rate(chat_id)
+        batches = self._make_batches(messages)
+        for index, (message_ids, text, attempts) in enumerate(batches):
+            while True:
+                await bucket.acquire()
+                await self._global_bucket.acquire()
+                started = time.perf_counter()
+                try:
+                    await self.bot.send_message(
+                        chat_id, text,
+                        parse_mode=ParseMode.HTML,
+                        link_preview_options=LinkPreviewOptions(is_disabled=True),
+                    )
+                except TelegramRetryAfter as e:
+                    # Перевищено ліміт: чекаємо, скільки просить Telegram, і сповільнюємо чат
+                    NOTIFY_SECONDS.observe(time.perf_counter() - started, result="rate_limited")
+                    NOTIFY_RATE_LIMITED.inc()
+                    bucket.rate = max(base_rate * _MIN_RATE_FACTOR, bucket.rate / 2)
+                    logger.warning(f"Telegram 429 для чату {chat_id}: пауза {e.retry_after} с, "
+                                   f"нова швидкість {bucket.rate:.2f} повідомл./с")
+                    await asyncio.sleep(e.retry_after)
+                    continue
+                except (TelegramBadRequest, TelegramForbiddenError, TelegramNotFound) as e:
+                    # Таке повідомлення не буде доставлено і з наступної спроби
+                    NOTIFY_SECONDS.observe(time.perf_counter() - started, result="rejected")
+                    NOTIFY_MESSAGES.inc(len(message_ids), result="rejected")
+                    logger.error(f"Telegram відхилив повідомлення до чату {chat_id}: {e}. Повідомлення видалено з черги.")
+                    await run_blocking(self.store.delete_messages, message_ids)
+                    break
+                except Exception as e:
+                    NOTIFY_SECONDS.observe(time.perf_counter() - started, result="error")
+                    if attempts + 1 >= self.settings.telegram_max_attempts:
+                        NOTIFY_MESSAGES.inc(len(message_ids), result="dropped")
+                        logger.error(f"Не вдалося надіслати повідомлення до чату {chat_id} після {attempts + 1} спроб: {e}. "
+                                     f"Повідомлення видалено з черги.")
+                        await run_blocking(self.store.delete_messages, message_ids)
+                        break
+                    delay = backoff_delay(attempts + 1)
+                    logger.error(f"Помилка відправки повідомлення в Telegram до чату {chat_id}: {e}. "
+                                 f"Повтор через {delay:.1f} с.")
+                    NOTIFY_MESSAGES.inc(len(message_ids), result="deferred")
+                    retry_at = time.time() + delay
+                    await run_blocking(self.store.defer_messages, message_ids, retry_at)
+                    # Решту повідомлень чату не надсилали: звільняємо їх, але не раніше повтору, щоб зберегти порядок
+                    rest = [message_id for ids, _, _ in batches[index + 1:] for message_id in ids]
+                    if rest:
+                        await run_blocking(self.store.release_messages, self.owner, rest, retry_at)
+                    return
+
+                NOTIFY_SECONDS.observe(time.perf_counter() - started, result="ok")
+                NOTIFY_MESSAGES.inc(len(message_ids), result="sent")
+                await run_blocking(self.store.delete_messages, message_ids)
+                # Після успішної відправки поступово повертаємо швидкість до базової
+                bucket.rate = min(base_rate, bucket.rate * 1.25)
+                if len(message_ids) > 1:
+                    logger.info(f"Надіслано {len(message_ids)} оголошень одним повідомленням до чату {chat_id}.")
+                break
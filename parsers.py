@@ -0,0 +1,393 @@
+import json
+import re
+import urllib.parse
+from datetime import datetime, timedelta
+
+from bs4 import BeautifulSoup
+from lxml import etree, html as lxml_html
+
+from ad_ids import canonical_link, extract_ad_id
+from config import get_settings
+from logger_ import get_logger
+
+logger = get_logger(__name__)
+
+# Словник українських місяців у родовому відмінку для форматування дати
+UKRAINIAN_MONTHS_GENITIVE = {
+    1: "січня", 2: "лютого", 3: "березня", 4: "квітня", 5: "травня",
+    6: "червня", 7: "липня", 8: "серпня", 9: "вересня", 10: "жовтня",
+    11: "листопада", 12: "грудня"
+}
+_MONTHS_BY_NAME = {name: month for month, name in UKRAINIAN_MONTHS_GENITIVE.items()}
+_RELATIVE_TIME_RE = re.compile(r"(сьогодні|вчора)\s+о\s+(\d{1,2}):(\d{2})")
+_DATE_RE = re.compile(r"(\d{1,2})\s+([^\W\d_]+)\s+(\d{4})")
+
+# Стан сторінки OLX вбудовано як JS-рядок, всередині якого JSON: window.__PRERENDERED_STATE__= "{\"...\"}";
+_PRERENDERED_STATE_RE = re.compile(r'window\.__PRERENDERED_STATE__\s*=\s*(?=")')
+_JSON_DECODER = json.JSONDecoder()
+
+# CSS-класи карток OLX (хешовані, можуть змінюватись)
+CARD_CLASS = "css-l9drzq"
+LOCATION_DATE_CLASS = "css-vbz67q"
+PRICE_CLASS = "css-uj7mm0"
+SQUARE_CLASS = "css-6as4g5"
+
+
+def format_date(value: datetime) -> str:
+    """Форматує дату як "18 жовтня 2026 р." (так само, як дати в картках OLX)."""
+    month_name = UKRAINIAN_MONTHS_GENITIVE.get(value.month, f"({value.month})")  # Резервний варіант
+    return f"{value.day:02d} {month_name} {value.year} р."  # :02d для дня типу 01, 02...
+
+
+def parse_listing_time(text: str | None, now: datetime | None = None) -> datetime | None:
+    """
+    Час публікації з тексту картки: "Сьогодні о 12:30", "Вчора о 08:15" або "18 жовтня 2026 р."
+    (у останньому випадку — початок дня). Повертає None, якщо текст не вдалося розібрати.
+    """
+    if not text:
+        return None
+    lowered = text.lower()
+    now = now or datetime.now()
+    match = _RELATIVE_TIME_RE.search(lowered)
+    if match:
+        day = now if match.group(1) == "сьогодні" else now - timedelta(days=1)
+        return day.replace(hour=int(match.group(2)), minute=int(match.group(3)), second=0, microsecond=0)
+    match = _DATE_RE.search(lowered)
+    if match and match.group(2) in _MONTHS_BY_NAME:
+        try:
+            return datetime(int(match.group(3)), _MONTHS_BY_NAME[match.group(2)], int(match.group(1)))
+        except ValueError:
+            return None
+    return None
+
+
+def format_listing_time(original_time_text: str) -> str:
+    """Замінює "Сьогодні ..." на сьогоднішню дату у форматі "18 жовтня 2026 р.", решту повертає як є."""
+    # Перевіряємо, чи текст містить слово "Сьогодні" (ігноруючи регістр)
+    if 'сьогодні' not in original_time_text.lower():
+        return original_time_text
+    return format_date(datetime.now())
+
+
+def build_ad(page_url: str, name: str | None, location_time: str | None, price: str | None,
+             square: str | None, href: str | None) -> dict | None:
+    """
+    Збирає словник оголошення з тексту, знайденого будь-яким бекендом.
+    Час публікації (created_at) розбирається з тексту картки до того, як "Сьогодні о 18:45"
+    замінюється датою для показу (time), тож година публікації не губиться.
+    Повертає None, якщо немає назви або посилання.
+    """
+    ad_data = {'name': name.strip() if name else "N/A"}
+
+    time_value = "N/A"  # Значення за замовчуванням
+    location_value = "N/A"  # Значення за замовчуванням
+    created_at = None
+    if location_time:
+        location_time_parts = location_time.split(" - ")
+        location_value = location_time_parts[0].strip()
+        # Якщо в split не було другого елемента, time_value залишиться "N/A"
+        if len(location_time_parts) > 1:
+            raw_time = location_time_parts[1].strip()
+            created_at = parse_listing_time(raw_time)
+            time_value = format_listing_time(raw_time)
+    ad_data['location'] = location_value
+    ad_data['time'] = time_value
+    ad_data['created_at'] = created_at.isoformat(timespec="seconds") if created_at else None
+
+    ad_data['price'] = price.strip() if price else "N/A"
+    ad_data['square'] = square.strip() if square else ""
+
+    if not href or ad_data['name'] == "N/A":
+        return None
+    ad_data['link'] = canonical_link(urllib.parse.urljoin(page_url, href))
+    ad_data['ad_id'] = extract_ad_id(ad_data['link'])
+    return ad_data
+
+
+class BeautifulSoupParser:
+    """Повільніший, але найтерпиміший до розмітки бекенд: BeautifulSoup + CSS-селектори."""
+
+    name = "bs4"
+
+    def parse(self, html_content: str, page_url: str) -> list[dict]:
+        soup = BeautifulSoup(html_content, "lxml")
+        scraped_ads = []
+        for item in soup.select(f"div.{CARD_CLASS}"):
+            try:
+                name_tag = item.select_one("h4, h6")
+                location_time_tag = item.select_one(f"p.{LOCATION_DATE_CLASS}, p[data-testid='location-date']")
+                price_tag = item.select_one(f"p.{PRICE_CLASS}, p[data-testid='price']")
+                square_tag = item.select_one(f"span.{SQUARE_CLASS}")
+                link_anchor = item.select_one("a")
+                ad_data = build_ad(
+                    page_url,
+                    name=name_tag.text if name_tag else None,
+                    location_time=location_time_tag.text if location_time_tag else None,
+                    price=price_tag.text if price_tag else None,
+                    square=square_tag.text if square_tag else None,
+                    href=link_anchor.get('href') if link_anchor else None,
+                )
+                if ad_data:
+                    scraped_ads.append(ad_data)
+            except Exception as e:
+                logger.error(f"Помилка парсингу окремого оголошення на {page_url}: {e}", exc_info=True)
+        return scraped_ads
+
+
+def _has_class(class_name: str) -> str:
+    """XPath-умова "елемент має CSS-клас" (аналог селектора .class)."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+
+
+class LxmlParser:
+    """
+    Швидкий бекенд: дерево lxml без обгортки BeautifulSoup і заздалегідь скомпільовані XPath-вирази.
+    Селектори еквівалентні BeautifulSoupParser і повертають ті самі словники.
+    """
+
+    name = "lxml"
+
+    _cards = etree.XPath(f"//div[{_has_class(CARD_CLASS)}]")
+    _name = etree.XPath("(.//h4 | .//h6)[1]")
+    _location_time = etree.XPath(f"(.//p[{_has_class(LOCATION_DATE_CLASS)}] | .//p[@data-testid='location-date'])[1]")
+    _price = etree.XPath(f"(.//p[{_has_class(PRICE_CLASS)}] | .//p[@data-testid='price'])[1]")
+    _square = etree.XPath(f"(.//span[{_has_class(SQUARE_CLASS)}])[1]")
+    _href = etree.XPath("(.//a)[1]/@href")
+
+    @staticmethod
+    def _first_text(nodes: list) -> str | None:
+        return nodes[0].text_content() if nodes else None
+
+    def parse(self, html_content: str, page_url: str) -> list[dict]:
+        tree = lxml_html.document_fromstring(html_content)
+        scraped_ads = []
+        for item in self._cards(tree):
+            try:
+                hrefs = self._href(item)
+                ad_data = build_ad(
+                    page_url,
+                    name=self._first_text(self._name(item)),
+                    location_time=self._first_text(self._location_time(item)),
+                    price=self._first_text(self._price(item)),
+                    square=self._first_text(self._square(item)),
+                    href=str(hrefs[0]) if hrefs else None,
+                )
+                if ad_data:
+                    scraped_ads.append(ad_data)
+            except Exception as e:
+                logger.error(f"Помилка парсингу окремого оголошення на {page_url}: {e}", exc_info=True)
+        return scraped_ads
+
+
+def extract_prerendered_state(html_content: str) -> dict | None:
+    """Дістає та декодує JSON стан сторінки OLX. Повертає None, якщо його немає або він пошкоджений."""
+    match = _PRERENDERED_STATE_RE.search(html_content)
+    if not match:
+        return None
+    try:
+        # Спершу розкодовуємо JS-рядок (raw_decode сам знаходить його кінець), потім — JSON всередині нього
+        state_text, _ = _JSON_DECODER.raw_decode(html_content, match.end())
+        return json.loads(state_text)
+    except (json.JSONDecodeError, TypeError) as e:
+        logger.warning(f"Не вдалося декодувати JSON стан сторінки: {e}")
+        return None
+
+
+class JsonStateParser:
+    """
+    Бекенд, що бере оголошення з вбудованого JSON стану сторінки, а не з DOM.
+    Не залежить від хешованих CSS-класів і дає структуровані значення (ціна числом, площа, час створення).
+    Якщо стану на сторінці немає, parse() повертає None, щоб викликач перейшов до HTML-бекенду.
+    """
+
+    name = "json"
+
+    @staticmethod
+    def _listing_ads(state: dict) -> list[dict] | None:
+        listing = (state.get("listing") or {}).get("listing") or {}
+        ads = listing.get("ads")
+        return ads if isinstance(ads, list) else None
+
+    @staticmethod
+    def _param(ad: dict, key: str) -> dict:
+        for param in ad.get("params") or []:
+            if param.get("key") == key:
+                return param
+        return {}
+
+    @staticmethod
+    def _number(value) -> float | None:
+        try:
+            return float(str(value).replace(",", ".").replace(" ", ""))
+        except (TypeError, ValueError):
+            return None
+
+    def _build(self, raw_ad: dict, page_url: str) -> dict | None:
+        location = raw_ad.get("location") or {}
+        location_text = ", ".join(
+            part for part in (location.get("cityName"), location.get("districtName")) if part
+        )
+        created_at = None
+        time_text = None
+        if raw_ad.get("createdTime"):
+            try:
+                created_at = datetime.fromisoformat(raw_ad["createdTime"])
+                time_text = format_date(created_at)
+            except ValueError:
+                time_text = raw_ad["createdTime"]
+
+        price = raw_ad.get("price") or {}
+        regular_price = price.get("regularPrice") or {}
+        area_param = self._param(raw_ad, "total_area")
+
+        ad_data = build_ad(
+            page_url,
+            name=raw_ad.get("title"),
+            location_time=f"{location_text} - {time_text}" if time_text else location_text,
+            price=price.get("displayValue"),
+            square=area_param.get("value"),
+            href=raw_ad.get("url"),
+        )
+        if ad_data is None:
+            return None
+        # Структуровані значення, яких немає в HTML-картці
+        ad_data['price_value'] = self._number(regular_price.get("value"))
+        ad_data['currency'] = regular_price.get("currencyCode")
+        ad_data['area'] = self._number(area_param.get("normalizedValue"))
+        ad_data['created_at'] = created_at.isoformat() if created_at else None
+        ad_data['is_business'] = raw_ad.get("isBusiness")
+        return ad_data
+
+    def parse(self, html_content: str, page_url: str) -> list[dict] | None:
+        state = extract_prerendered_state(html_content)
+        raw_ads = self._listing_ads(state) if state else None
+        if raw_ads is None:
+            return None
+        scraped_ads = []
+        for raw_ad in raw_ads:
+            try:
+                ad_data = self._build(raw_ad, page_url)
+                if ad_data:
+                    scraped_ads.append(ad_data)
+            except Exception as e:
+                logger.error(f"Помилка розбору оголошення з JSON стану на {page_url}: {e}", exc_info=True)
+        return scraped_ads
+
+
+JSON_STATE_PARSER = JsonStateParser()
+PARSERS = {parser.name: parser for parser in (LxmlParser(), BeautifulSoupParser())}
+
+
+def get_parser(name: str | None = None):
+    """Повертає бекенд парсера за назвою (за замовчуванням — з OLX_PARSER_BACKEND)."""
+    name = name or get_settings().parser_backend
+    parser = PARSERS.get(name)
+    if parser is None:
+        logger.warning(f"Невідомий бекенд парсера '{name}', використовується BeautifulSoup.")
+        parser = PARSERS["bs4"]
+    return parser
+
+
+def parse_ads(html_content: str, page_url: str, backend: str | None = None) -> list[dict]:
+    """
+    Повертає оголошення сторінки.
+    Спершу пробує вбудований JSON стан window.__PRERENDERED_STATE__ (якщо не вимкнено OLX_JSON_STATE=0);
+    якщо його немає, парсить картки HTML-бекендом (OLX_PARSER_BACKEND). Якщо швидкий HTML-бекенд
+    падає на розмітці, сторінка повторно парситься через BeautifulSoup.
+    """
+    if get_settings().json_state:
+        scraped_ads = JSON_STATE_PARSER.parse(html_content, page_url)
+        if scraped_ads:
+            logger.info(f"Знайдено {len(scraped_ads)} оголошень у JSON стані сторінки.")
+            return scraped_ads
+        logger.debug(f"JSON стан сторінки {page_url} відсутній або порожній, парсинг HTML.")
+
+    parser = get_parser(backend)
+    try:
+        scraped_ads = parser.parse(html_content, page_url)
+    except Exception as e:
+        if parser.name == "bs4":
+            raise
+        logger.warning(f"Бекенд '{parser.name}' не зміг розібрати {page_url}: {e}. Повтор через BeautifulSoup.")
+        scraped_ads = PARSERS["bs4"].parse(html_content, page_url)
+
+    if not scraped_ads:
+        logger.warning(
+            f"Не знайдено контейнерів оголошень на сторінці: {page_url}. Перевірте селектор 'div.{CARD_CLASS}'.")
+    logger.info(f"Знайдено {len(scraped_ads)} оголошень на сторінці.")
+    return scraped_ads
+
+
+# --- Сторінка оголошення ---
+
+_DETAIL_DESCRIPTION = etree.XPath("(//div[@data-cy='ad_description'])[1]")
+_DETAIL_PARAMS = etree.XPath("//div[@data-testid='ad-parameters-container']//p")
+_DETAIL_PHOTOS = etree.XPath("//div[@data-testid='ad-photo']//img | //img[@data-testid='swiper-image']")
+_FLOOR_RE = re.compile(r"^\s*Поверх\s*:\s*(\d+)", re.IGNORECASE)
+_TOTAL_FLOORS_RE = re.compile(r"^\s*Поверховість\s*:\s*(\d+)", re.IGNORECASE)
+
+
+def _int_or_none(value) -> int | None:
+    try:
+        return int(float(str(value).replace(",", ".")))
+    except (TypeError, ValueError):
+        return None
+
+
+def _details_from_state(state: dict) -> dict | None:
+    ad = (state.get("ad") or {}).get("ad")
+    if not isinstance(ad, dict):
+        return None
+    params = {param.get("key"): param for param in ad.get("params") or [] if isinstance(param, dict)}
+
+    def param_value(*keys):
+        for key in keys:
+            param = params.get(key)
+            if param:
+                return param.get("normalizedValue") or param.get("value")
+        return None
+
+    description = ad.get("description")
+    if description:
+        description = lxml_html.fromstring(f"<div>{description}</div>").text_content().strip()
+    return {
+        "floor": _int_or_none(param_value("floor")),
+        "total_floors": _int_or_none(param_value("total_floors", "floors_in_building", "number_of_floors")),
+        "description": description or None,
+        "photos_count": len(ad.get("photos") or []),
+        "is_business": ad.get("isBusiness"),
+    }
+
+
+def _details_from_dom(html_content: str) -> dict:
+    tree = lxml_html.document_fromstring(html_content)
+    description_nodes = _DETAIL_DESCRIPTION(tree)
+    details = {
+        "floor": None,
+        "total_floors": None,
+        "description": (description_nodes[0].text_content().strip() or None) if description_nodes else None,
+        "photos_count": len(_DETAIL_PHOTOS(tree)),
+        "is_business": None,
+    }
+    for node in _DETAIL_PARAMS(tree):
+        text = node.text_content().strip()
+        if match := _FLOOR_RE.match(text):
+            details["floor"] = int(match.group(1))
+        elif match := _TOTAL_FLOORS_RE.match(text):
+            details["total_floors"] = int(match.group(1))
+        elif text == "Приватна особа":
+            details["is_business"] = False
+        elif text == "Бізнес":
+            details["is_business"] = True
+    return details
+
+
+def parse_ad_details(html_content: str) -> dict:
+    """
+    Дані сторінки оголошення, яких немає в картці пошуку: поверх, поверховість, опис,
+    кількість фото і чи це бізнес (агенція), а не приватна особа.
+    Спершу з JSON стану сторінки, якщо його немає — з розмітки.
+    """
+    state = extract_prerendered_state(html_content) if get_settings().json_state else None
+    details = _details_from_state(state) if state else None
+    return details if details is not None else _details_from_dom(html_content)
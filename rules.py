@@ -0,0 +1,159 @@
+import re
+from dataclasses import dataclass
+
+from models import Ad
+
+# Ключі filters у searches.json, які розуміє SearchRules
+FILTER_KEYS = {
+    "currency", "min_price", "max_price", "min_area", "max_area",
+    "min_price_per_m2", "max_price_per_m2", "districts", "exclude_districts",
+    "title_include", "title_exclude", "exclude_business", "sort_by",
+}
+
+# Поля, за якими можна впорядкувати оголошення перед відправкою ("-" на початку — за спаданням)
+SORT_FIELDS = {"price": "price_value", "area": "area", "price_per_m2": "price_per_m2", "listed_at": "listed_at"}
+
+
+def _compile_patterns(patterns, key: str) -> re.Pattern | None:
+    """Об'єднує список регулярних виразів в один (без урахування регістру), щоб перевіряти назву за один прохід."""
+    if not patterns:
+        return None
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    try:
+        for pattern in patterns:
+            re.compile(pattern)
+        return re.compile("|".join(f"(?:{pattern})" for pattern in patterns), re.IGNORECASE)
+    except re.error as e:
+        raise ValueError(f"Некоректний регулярний вираз у '{key}': {e}") from e
+
+
+def _number(filters: dict, key: str) -> float | None:
+    value = filters.get(key)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"'{key}' має бути числом, отримано {value!r}") from e
+
+
+def _names(filters: dict, key: str) -> frozenset[str] | None:
+    values = filters.get(key)
+    if not values:
+        return None
+    if isinstance(values, str):
+        values = [values]
+    return frozenset(str(value).strip().casefold() for value in values)
+
+
+@dataclass(frozen=True)
+class SearchRules:
+    """
+    Правила відбору оголошень пошуку, скомпільовані з його filters один раз при завантаженні.
+    Оголошення, що не пройшли правила, позначаються переглянутими, але в Telegram не надсилаються.
+
+    Межі ціни порівнюються лише з цінами у валюті `currency` (за замовчуванням UAH): якщо межі
+    задані, оголошення в іншій валюті або без ціни відхиляються. Списки районів порівнюються
+    без урахування регістру; title_include/title_exclude — регулярні вирази для назви.
+    """
+    currency: str = "UAH"
+    min_price: float | None = None
+    max_price: float | None = None
+    min_area: float | None = None
+    max_area: float | None = None
+    min_price_per_m2: float | None = None
+    max_price_per_m2: float | None = None
+    districts: frozenset[str] | None = None
+    exclude_districts: frozenset[str] | None = None
+    title_include: re.Pattern | None = None
+    title_exclude: re.Pattern | None = None
+    exclude_business: bool = False
+    sort_by: str | None = None
+
+    @classmethod
+    def from_filters(cls, filters: dict | None) -> "SearchRules":
+        """Перевіряє та компілює filters пошуку. На невідомих ключах чи некоректних значеннях — ValueError."""
+        filters = filters or {}
+        unknown = set(filters) - FILTER_KEYS
+        if unknown:
+            raise ValueError(f"Невідомі фільтри: {', '.join(sorted(unknown))}")
+        sort_by = filters.get("sort_by")
+        if sort_by and (not isinstance(sort_by, str) or sort_by.lstrip("-") not in SORT_FIELDS):
+            raise ValueError(f"sort_by має бути одним з {', '.join(SORT_FIELDS)} (з '-' для спадання)")
+        return cls(
+            currency=str(filters.get("currency") or "UAH").upper(),
+            min_price=_number(filters, "min_price"),
+            max_price=_number(filters, "max_price"),
+            min_area=_number(filters, "min_area"),
+            max_area=_number(filters, "max_area"),
+            min_price_per_m2=_number(filters, "min_price_per_m2"),
+            max_price_per_m2=_number(filters, "max_price_per_m2"),
+            districts=_names(filters, "districts"),
+            exclude_districts=_names(filters, "exclude_districts"),
+            title_include=_compile_patterns(filters.get("title_include"), "title_include"),
+            title_exclude=_compile_patterns(filters.get("title_exclude"), "title_exclude"),
+            exclude_business=bool(filters.get("exclude_business", False)),
+            sort_by=sort_by or None,
+        )
+
+    @property
+    def is_empty(self) -> bool:
+        return self == SearchRules(currency=self.currency)
+
+    def _check_range(self, value: float | None, low: float | None, high: float | None) -> bool:
+        if low is None and high is None:
+            return True
+        if value is None:
+            return False
+        return (low is None or value >= low) and (high is None or value <= high)
+
+    def rejection_reason(self, ad: Ad) -> str | None:
+        """Причина відхилення оголошення (назва правила) або None, якщо оголошення проходить."""
+        price_limited = self.min_price is not None or self.max_price is not None
+        per_m2_limited = self.min_price_per_m2 is not None or self.max_price_per_m2 is not None
+        if (price_limited or per_m2_limited) and ad.currency != self.currency:
+            return "currency"
+        if not self._check_range(ad.price_value, self.min_price, self.max_price):
+            return "price"
+        if not self._check_range(ad.area, self.min_area, self.max_area):
+            return "area"
+        if not self._check_range(ad.price_per_m2, self.min_price_per_m2, self.max_price_per_m2):
+            return "price_per_m2"
+        if self.districts is not None or self.exclude_districts is not None:
+            district = (ad.district or "").casefold()
+            if self.districts is not None and district not in self.districts:
+                return "district"
+            if self.exclude_districts is not None and district in self.exclude_districts:
+                return "district"
+        if self.title_include is not None and not self.title_include.search(ad.name):
+            return "title"
+        if self.title_exclude is not None and self.title_exclude.search(ad.name):
+            return "title"
+        if self.exclude_business and ad.is_business:
+            return "business"
+        return None
+
+    def rank(self, ads: list[Ad]) -> list[Ad]:
+        """Впорядковує оголошення за sort_by; оголошення без значення поля йдуть у кінець."""
+        if not self.sort_by:
+            return ads
+        descending = self.sort_by.startswith("-")
+        attribute = SORT_FIELDS[self.sort_by.lstrip("-")]
+        with_value = [ad for ad in ads if getattr(ad, attribute) is not None]
+        without_value = [ad for ad in ads if getattr(ad, attribute) is None]
+        with_value.sort(key=lambda ad: getattr(ad, attribute), reverse=descending)
+        return with_value + without_value
+
+    def apply(self, ads: list[Ad]) -> tuple[list[Ad], list[tuple[Ad, str]]]:
+        """Розділяє пачку оголошень на прийняті (впорядковані за sort_by) та відхилені з причиною."""
+        if self.is_empty:
+            return ads, []
+        accepted, rejected = [], []
+        for ad in ads:
+            reason = self.rejection_reason(ad)
+            if reason is None:
+                accepted.append(ad)
+            else:
+                rejected.append((ad, reason))
+        return self.rank(accepted), rejected
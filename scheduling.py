@@ -0,0 +1,103 @@
+import math
+import time
+from datetime import datetime, timedelta
+
+from config import get_settings
+from jobs import run_blocking
+from logger_ import get_logger
+from searches import Search
+from storage import AdStore
+
+logger = get_logger(__name__)
+
+
+def hourly_rate(hours: list[int], days: float, hour: int) -> float:
+    """
+    Очікувана кількість нових оголошень за годину о годині доби hour.
+    До лічильника додається одне оголошення (згладжування Лапласа), щоб година без історії
+    не вважалась зовсім тихою і пошук усе одно зрідка опитувався.
+    """
+    return (hours[hour] + 1) / max(days, 1.0)
+
+
+def plan_intervals(rates: dict[str, float], costs: dict[str, float], budget_per_hour: float,
+                   min_seconds: float, max_seconds: float) -> dict[str, float]:
+    """
+    Інтервали опитування (секунди), що мінімізують сумарну затримку сповіщень у межах бюджету запитів.
+
+    Якщо пошук з частотою появи оголошень rate (за годину) опитується раз на T годин і кожен обхід
+    коштує cost запитів, оголошення в середньому чекає T/2, а на годину витрачається cost/T запитів.
+    Мінімум суми rate·T за умови sum(cost/T) = budget дає T = sqrt(cost/rate) · sum(sqrt(cost·rate)) / budget:
+    "гарячі" пошуки опитуються частіше, тихі — рідше. Після обмеження інтервалів знизу всі вони
+    пропорційно збільшуються, якщо бюджет перевищено. Обмеження зверху має пріоритет над бюджетом:
+    кожен пошук опитується хоча б раз на max_seconds, навіть якщо бюджет для цього замалий.
+    """
+    if not rates:
+        return {}
+    total = sum(math.sqrt(costs[task] * rates[task]) for task in rates)
+    intervals = {task: max(min_seconds, 3600 * math.sqrt(costs[task] / rates[task]) * total / budget_per_hour)
+                 for task in rates}
+    requests_per_hour = sum(costs[task] * 3600 / interval for task, interval in intervals.items())
+    scale = max(1.0, requests_per_hour / budget_per_hour)
+    return {task: min(max_seconds, interval * scale) for task, interval in intervals.items()}
+
+
+class AdaptiveScheduler:
+    """
+    Визначає, які групи пошуків (URL результатів) пора опитати в цьому циклі.
+
+    Для кожної групи з історії (search_seen) рахується, скільки нових оголошень з'являлось у поточну
+    годину доби, а з черги завдань (work_queue) — коли групу опитували востаннє і скільки запитів це
+    коштувало. З цього plan_intervals розподіляє бюджет запитів; група опитується, якщо з останнього
+    обходу минув її інтервал. З OLX_ADAPTIVE_SCHEDULE=1 цикли запускаються кожні OLX_ADAPTIVE_MIN_MINUTES
+    хвилин (див. bot.py), але опитують лише групи, яким настав час.
+    """
+
+    def __init__(self, store: AdStore, budget_per_hour: float | None = None, min_minutes: int | None = None,
+                 max_minutes: int | None = None, history_days: int | None = None):
+        settings = get_settings()
+        min_minutes = settings.adaptive_min_minutes if min_minutes is None else min_minutes
+        max_minutes = settings.adaptive_max_minutes if max_minutes is None else max_minutes
+        self.store = store
+        self.budget_per_hour = settings.request_budget_per_hour if budget_per_hour is None else budget_per_hour
+        self.min_seconds = min_minutes * 60
+        self.max_seconds = max(min_minutes, max_minutes) * 60
+        self.history_days = settings.arrival_history_days if history_days is None else history_days
+
+    async def due_tasks(self, search_groups: dict[str, list[Search]], now: datetime | None = None) -> list[str]:
+        """URL груп, які пора опитати."""
+        now = now or datetime.now()
+        tasks = list(search_groups)
+        since = (now - timedelta(days=self.history_days)).isoformat(timespec="seconds")
+        names = sorted({search.name for group in search_groups.values() for search in group})
+        counts = await run_blocking(self.store.arrival_counts, names, since)
+        states = await run_blocking(self.store.task_states, tasks)
+
+        rates, costs = {}, {}
+        for task, group in search_groups.items():
+            group_rates = []
+            for search in group:
+                hours, first_seen = counts[search.name]
+                # Для нового пошуку історія коротша за history_days — ділимо на фактичну кількість днів
+                days = self.history_days
+                if first_seen:
+                    days = min(days, (now - datetime.fromisoformat(first_seen)).total_seconds() / 86400)
+                group_rates.append(hourly_rate(hours, days, now.hour))
+            # Пошуки групи дивляться ту саму сторінку результатів, тож беремо найактивніший
+            rates[task] = max(group_rates)
+            costs[task] = max(1, states.get(task, (None, None))[1] or 1)
+        intervals = plan_intervals(rates, costs, self.budget_per_hour, self.min_seconds, self.max_seconds)
+
+        # Допуск у пів періоду перевірки, щоб група з інтервалом, кратним періоду, не пропускала цикл через затримку запуску
+        slack = self.min_seconds / 2
+        timestamp = time.time()
+        due = []
+        for task in tasks:
+            claimed_at = states.get(task, (None, None))[0]
+            if claimed_at is None or timestamp - claimed_at + slack >= intervals[task]:
+                due.append(task)
+            logger.debug(f"Розклад {task}: {rates[task]:.2f} оголош./год, {costs[task]} запитів, "
+                         f"інтервал {intervals[task] / 60:.0f} хв.")
+        logger.info(f"Адаптивний розклад: пора опитати {len(due)} з {len(tasks)} груп пошуків "
+                    f"(бюджет {self.budget_per_hour:.0f} запитів/год).")
+        return due
@@ -0,0 +1,80 @@
+import json
+from dataclasses import dataclass, field
+
+from config import get_settings
+from logger_ import get_logger
+from rules import SearchRules
+
+logger = get_logger(__name__)
+
+# Назва пошуку, який створюється зі start_url, якщо файлу з пошуками немає
+DEFAULT_SEARCH_NAME = "default"
+
+
+@dataclass
+class Search:
+    """
+    Збережений пошук: URL результатів OLX, чат для сповіщень та додаткові налаштування.
+    filters компілюються в правила відбору (rules.SearchRules) один раз при створенні пошуку.
+    """
+    name: str
+    url: str
+    chat_id: int
+    filters: dict = field(default_factory=dict)
+    enabled: bool = True
+    rules: SearchRules = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.rules = SearchRules.from_filters(self.filters)
+
+
+def load_searches(default_url: str, default_chat_id: int | str,
+                  filepath: str | None = None) -> list[Search]:
+    """
+    Читає пошуки з JSON файлу (за замовчуванням OLX_SEARCHES_FILE; список об'єктів з полями
+    name, url, chat_id, filters, enabled).
+    Якщо файлу немає, повертає один пошук "default" з default_url та default_chat_id.
+    Пошуки без chat_id надсилають сповіщення в default_chat_id.
+    """
+    filepath = filepath or get_settings().searches_file
+    try:
+        with open(filepath, "r", encoding="utf-8") as file:
+            raw_searches = json.load(file)
+    except FileNotFoundError:
+        return [Search(name=DEFAULT_SEARCH_NAME, url=default_url, chat_id=int(default_chat_id))]
+    except (json.JSONDecodeError, OSError) as e:
+        raise ValueError(f"Не вдалося прочитати файл пошуків {filepath}: {e}") from e
+
+    searches = []
+    names = set()
+    for i, raw in enumerate(raw_searches):
+        try:
+            search = Search(
+                name=str(raw.get("name") or f"search-{i + 1}"),
+                url=raw["url"],
+                chat_id=int(raw.get("chat_id") or default_chat_id),
+                filters=raw.get("filters") or {},
+                enabled=raw.get("enabled", True),
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Некоректний пошук #{i + 1} у {filepath}: {e}") from e
+        if search.name in names:
+            raise ValueError(f"Назва пошуку '{search.name}' у {filepath} повторюється")
+        names.add(search.name)
+        if search.enabled:
+            searches.append(search)
+
+    logger.info(f"Завантажено {len(searches)} активних пошуків з {filepath}")
+    return searches
+
+
+def group_by_url(searches: list[Search], normalize=None) -> dict[str, list[Search]]:
+    """
+    Групує пошуки з однаковим (після normalize) URL результатів: такі сторінки завантажуються
+    й парсяться один раз, а оголошення розсилаються всім пошукам групи (різні чати або фільтри).
+    """
+    groups: dict[str, list[Search]] = {}
+    for search in searches:
+        url = normalize(search.url) if normalize else search.url
+        groups.setdefault(url, []).append(search)
+    return groups
@@ -0,0 +1,647 @@
+import csv
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+from logger_ import get_logger
+from models import Ad
+from searches import DEFAULT_SEARCH_NAME
+
+logger = get_logger(__name__)
+
+# Шлях до бази оголошень
+DB_FILE_PATH = os.path.join("data", "ads.sqlite3")
+
+# Колонки оголошення в тому ж порядку, що й у старому CSV
+AD_FIELDS = ['time', 'name', 'location', 'price', 'square', 'link']
+
+# Версія схеми бази (PRAGMA user_version)
+SCHEMA_VERSION = 1
+
+# Максимальна кількість параметрів в одному запиті SQLite (з запасом)
+_SQL_CHUNK_SIZE = 500
+
+
+def _chunks(items: list, size: int = _SQL_CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _numeric_values(ad: Ad) -> tuple:
+    listed_at = ad.listed_at.isoformat(timespec="seconds") if ad.listed_at else None
+    return ad.price_value, ad.currency, ad.area, ad.district, listed_at
+
+
+# Додає точку до історії цін, лише якщо ціна відрізняється від останньої записаної для оголошення
+_APPEND_PRICE_SQL = """
+    INSERT OR REPLACE INTO price_history (ad_id, seen_at, price_value, currency)
+    SELECT :ad_id, :seen_at, :price_value, :currency
+    WHERE :price_value IS NOT NULL AND NOT EXISTS (
+        SELECT 1 FROM price_history AS last
+        WHERE last.ad_id = :ad_id
+          AND last.seen_at = (SELECT MAX(seen_at) FROM price_history WHERE ad_id = :ad_id)
+          AND last.price_value IS :price_value AND last.currency IS :currency
+    )
+"""
+
+
+def _price_point(ad: Ad, seen_at: str) -> dict:
+    return {"ad_id": ad.ad_id, "seen_at": seen_at, "price_value": ad.price_value, "currency": ad.currency}
+
+
+# Таблиці та індекси бази
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS meta (
+        key   TEXT PRIMARY KEY,
+        value TEXT
+    )
+    """,
+    # Оголошення ідентифікуються цілим ad_id (ключ самого B-дерева таблиці), а не посиланням;
+    # поруч із текстом картки зберігаються розібрані поля та відбиток вмісту (для повторних публікацій)
+    """
+    CREATE TABLE IF NOT EXISTS ads (
+        ad_id       INTEGER PRIMARY KEY,
+        link        TEXT NOT NULL,
+        time        TEXT,
+        name        TEXT,
+        location    TEXT,
+        price       TEXT,
+        square      TEXT,
+        first_seen  TEXT NOT NULL,
+        last_seen   TEXT NOT NULL,
+        price_value REAL,
+        currency    TEXT,
+        area        REAL,
+        district    TEXT,
+        listed_at   TEXT,
+        fingerprint INTEGER
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ads_fingerprint ON ads (fingerprint)",
+    "CREATE INDEX IF NOT EXISTS ads_first_seen ON ads (first_seen)",
+    # Які оголошення вже оброблено для кожного пошуку
+    """
+    CREATE TABLE IF NOT EXISTS search_seen (
+        search  TEXT NOT NULL,
+        ad_id   INTEGER NOT NULL,
+        seen_at TEXT NOT NULL,
+        PRIMARY KEY (search, ad_id)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS search_seen_search_time ON search_seen (search, seen_at)",
+    # Ціна оголошення щоразу, коли вона змінювалась
+    """
+    CREATE TABLE IF NOT EXISTS price_history (
+        ad_id       INTEGER NOT NULL,
+        seen_at     TEXT NOT NULL,
+        price_value REAL,
+        currency    TEXT,
+        PRIMARY KEY (ad_id, seen_at)
+    ) WITHOUT ROWID
+    """,
+    # Дані сторінки оголошення (enrichment.py); status = 'failed', якщо сторінку не вдалося завантажити
+    """
+    CREATE TABLE IF NOT EXISTS ad_details (
+        ad_id        INTEGER PRIMARY KEY,
+        floor        INTEGER,
+        total_floors INTEGER,
+        description  TEXT,
+        photos_count INTEGER,
+        is_business  INTEGER,
+        fetched_at   TEXT NOT NULL,
+        status       TEXT NOT NULL DEFAULT 'ok'
+    )
+    """,
+    # Черга повідомлень Telegram, що ще не доставлені; повідомлення береться обробником в оренду
+    """
+    CREATE TABLE IF NOT EXISTS outbox (
+        id               INTEGER PRIMARY KEY AUTOINCREMENT,
+        chat_id          INTEGER NOT NULL,
+        text             TEXT NOT NULL,
+        created_at       TEXT NOT NULL,
+        attempts         INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at  REAL NOT NULL DEFAULT 0,
+        lease_owner      TEXT,
+        lease_expires_at REAL NOT NULL DEFAULT 0
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS outbox_next_attempt ON outbox (next_attempt_at, id)",
+    # Завдання обходу з орендою для кількох обробників (work_queue.py)
+    """
+    CREATE TABLE IF NOT EXISTS work_queue (
+        task             TEXT PRIMARY KEY,
+        lease_owner      TEXT,
+        lease_expires_at REAL NOT NULL DEFAULT 0,
+        attempts         INTEGER NOT NULL DEFAULT 0,
+        claimed_at       REAL,
+        last_requests    INTEGER
+    )
+    """,
+)
+
+
+class AdStore:
+    """
+    Сховище оголошень на SQLite (режим WAL).
+    Перевірка "чи нове оголошення" робиться точковим пошуком за індексом, тому її вартість
+    залежить від кількості оголошень на сторінці, а не від усієї історії.
+    Об'єкт можна використовувати з різних потоків (наприклад, через asyncio.to_thread).
+    """
+
+    def __init__(self, db_path: str = DB_FILE_PATH):
+        self.db_path = db_path
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._lock = threading.Lock()
+        # Базою можуть користуватись кілька процесів (див. work_queue.py), тож на блокування чекаємо довше
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _create_schema(self):
+        """Створює таблиці бази, якщо їх ще немає (версія схеми — PRAGMA user_version)."""
+        with self._lock, self._conn:
+            for statement in _SCHEMA:
+                self._conn.execute(statement)
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    # --- Оголошення ---
+
+    def known_ids(self, ad_ids: list[int]) -> set[int]:
+        """Повертає ті ідентифікатори зі списку, які вже є в базі."""
+        ad_ids = list(set(ad_ids))
+        found = set()
+        with self._lock:
+            for chunk in _chunks(ad_ids):
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(f"SELECT ad_id FROM ads WHERE ad_id IN ({placeholders})", chunk)
+                found.update(row[0] for row in rows)
+        return found
+
+    def upsert_ads(self, ads: list[Ad | dict], seen_at: str | None = None):
+        """
+        Пакетно додає оголошення (Ad або словники парсера/CSV). Для вже відомих оновлює дані
+        (зокрема посилання, якщо змінився slug) та час, коли їх бачили востаннє, зберігаючи first_seen.
+        """
+        if not ads:
+            return
+        seen_at = seen_at or datetime.now().isoformat(timespec="seconds")
+        with self._lock, self._conn:
+            count = len(self._write_ads(ads, seen_at))
+        logger.info(f"Збережено {count} оголошень у {self.db_path}")
+
+    def _write_ads(self, ads: list[Ad | dict], seen_at: str) -> list[int]:
+        """Запис для upsert_ads у вже відкритій транзакції; повертає ad_id записаних оголошень."""
+        rows, price_points = [], []
+        for ad in ads:
+            if not isinstance(ad, Ad):
+                ad = Ad.from_dict(ad)
+            rows.append((ad.ad_id, ad.link, ad.time, ad.name, ad.location, ad.price, ad.square)
+                        + _numeric_values(ad) + (ad.fingerprint, seen_at, seen_at))
+            price_points.append(_price_point(ad, seen_at))
+        self._conn.executemany("""
+            INSERT INTO ads (ad_id, link, time, name, location, price, square, price_value, currency,
+                             area, district, listed_at, fingerprint, first_seen, last_seen)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(ad_id) DO UPDATE SET
+                link = excluded.link,
+                time = excluded.time,
+                name = excluded.name,
+                location = excluded.location,
+                price = excluded.price,
+                square = excluded.square,
+                price_value = excluded.price_value,
+                currency = excluded.currency,
+                area = excluded.area,
+                district = excluded.district,
+                listed_at = COALESCE(ads.listed_at, excluded.listed_at),
+                fingerprint = excluded.fingerprint,
+                last_seen = excluded.last_seen
+        """, rows)
+        self._conn.executemany(_APPEND_PRICE_SQL, price_points)
+        return [row[0] for row in rows]
+
+    def record_prices(self, ads: list[Ad], seen_at: str | None = None) -> list[tuple[Ad, float, str | None]]:
+        """
+        Оновлює ціну та час останньої появи вже відомих оголошень і дописує зміни ціни в price_history.
+        Повертає оголошення, ціна яких змінилась, разом з попередньою ціною та валютою.
+        Пошук попередніх цін іде за первинним ключем, тож вартість залежить лише від розміру пачки.
+        """
+        if not ads:
+            return []
+        seen_at = seen_at or datetime.now().isoformat(timespec="seconds")
+        changes = []
+        with self._lock, self._conn:
+            stored = {}
+            for chunk in _chunks([ad.ad_id for ad in ads]):
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT ad_id, price_value, currency FROM ads WHERE ad_id IN ({placeholders})", chunk)
+                stored.update((ad_id, (price_value, currency)) for ad_id, price_value, currency in rows)
+            for ad in ads:
+                old_price, old_currency = stored.get(ad.ad_id, (None, None))
+                if ad.price_value is not None and old_price is not None \
+                        and (ad.price_value, ad.currency) != (old_price, old_currency):
+                    changes.append((ad, old_price, old_currency))
+            self._conn.executemany(
+                """
+                UPDATE ads SET price = ?, price_value = COALESCE(?, price_value), currency = COALESCE(?, currency),
+                               last_seen = ?
+                WHERE ad_id = ?
+                """,
+                [(ad.price, ad.price_value, ad.currency, seen_at, ad.ad_id) for ad in ads if ad.ad_id in stored],
+            )
+            self._conn.executemany(_APPEND_PRICE_SQL, [_price_point(ad, seen_at) for ad, _, _ in changes])
+        return changes
+
+    def touch_ads(self, ad_ids: list[int], seen_at: str | None = None):
+        """Оновлює час останньої появи вже відомих оголошень (без відстеження цін, див. record_prices)."""
+        seen_at = seen_at or datetime.now().isoformat(timespec="seconds")
+        with self._lock, self._conn:
+            self._conn.executemany("UPDATE ads SET last_seen = ? WHERE ad_id = ?",
+                                   [(seen_at, ad_id) for ad_id in ad_ids])
+
+    def find_relists(self, ads: list[Ad], since: str) -> dict[int, tuple[int, float | None, str | None]]:
+        """
+        Шукає серед оголошень ті, що є повторною публікацією вже відомого (той самий відбиток вмісту,
+        інший ad_id, останній раз бачене не раніше `since`). Повертає {новий ad_id: (старий ad_id,
+        стара ціна, валюта)}. Пошук іде за індексом ads_fingerprint.
+        """
+        by_fingerprint = {}
+        for ad in ads:
+            by_fingerprint.setdefault(ad.fingerprint, []).append(ad)
+        relists = {}
+        with self._lock:
+            for chunk in _chunks(list(by_fingerprint)):
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(f"""
+                    SELECT fingerprint, ad_id, price_value, currency FROM ads
+                    WHERE fingerprint IN ({placeholders}) AND last_seen >= ?
+                    ORDER BY last_seen
+                """, (*chunk, since))
+                for fingerprint, old_id, price_value, currency in rows:
+                    for ad in by_fingerprint[fingerprint]:
+                        if ad.ad_id != old_id:
+                            # Рядки впорядковані за last_seen, тож лишається найсвіжіша публікація
+                            relists[ad.ad_id] = (old_id, price_value, currency)
+        return relists
+
+    def seen_by(self, search: str, ad_ids: list[int]) -> set[int]:
+        """Ті ідентифікатори зі списку, які пошук уже обробляв."""
+        found = set()
+        with self._lock:
+            for chunk in _chunks(list(set(ad_ids))):
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT ad_id FROM search_seen WHERE search = ? AND ad_id IN ({placeholders})", (search, *chunk))
+                found.update(row[0] for row in rows)
+        return found
+
+    def mark_seen(self, search: str, ad_ids: list[int],
+                  messages: dict[int, list[tuple[int, str]]] | None = None) -> set[int]:
+        """
+        Позначає оголошення як оброблені для пошуку і повертає ті з них, що були для нього новими.
+        Кожен ідентифікатор вставляється окремо (INSERT OR IGNORE), тож новим він буде рівно для
+        одного виклику, навіть якщо базою користуються кілька процесів.
+        messages — повідомлення (chat_id, text) за ad_id: вони додаються до outbox у тій самій
+        транзакції і лише для оголошень, що виявились новими, тож кожне оголошення потрапляє
+        в чергу Telegram рівно один раз — і при паралельних обробниках, і при збої посередині.
+        """
+        seen_at = datetime.now().isoformat(timespec="seconds")
+        messages = messages or {}
+        newly_seen = set()
+        with self._lock, self._conn:
+            for ad_id in dict.fromkeys(ad_ids):
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO search_seen (search, ad_id, seen_at) VALUES (?, ?, ?)",
+                    (search, ad_id, seen_at),
+                )
+                if cursor.rowcount:
+                    newly_seen.add(ad_id)
+            # Порядок messages (ранжування сторінки) зберігається: outbox віддає повідомлення за id
+            outgoing = [(chat_id, text, seen_at) for ad_id, ad_messages in messages.items() if ad_id in newly_seen
+                        for chat_id, text in ad_messages]
+            if outgoing:
+                self._conn.executemany("INSERT INTO outbox (chat_id, text, created_at) VALUES (?, ?, ?)", outgoing)
+        return newly_seen
+
+    def arrival_counts(self, searches: list[str], since: str) -> dict[str, tuple[list[int], str | None]]:
+        """
+        Скільки оголошень з'являлось у кожному пошуку за кожну годину доби (0-23) починаючи з since,
+        і коли пошук побачив перше з них. Година береться з часу публікації (listed_at), а якщо
+        його немає — з часу, коли оголошення побачив парсер.
+        """
+        result = {search: ([0] * 24, None) for search in searches}
+        with self._lock:
+            for search in searches:
+                hours, first_seen = result[search]
+                rows = self._conn.execute(
+                    """
+                    SELECT CAST(strftime('%H', COALESCE(ads.listed_at, search_seen.seen_at)) AS INTEGER),
+                           COUNT(*), MIN(search_seen.seen_at)
+                    FROM search_seen JOIN ads ON ads.ad_id = search_seen.ad_id
+                    WHERE search_seen.search = ? AND search_seen.seen_at >= ?
+                          AND COALESCE(ads.listed_at, search_seen.seen_at) >= ?
+                    GROUP BY 1
+                    """,
+                    (search, since, since),
+                )
+                for hour, count, hour_first_seen in rows:
+                    if hour is not None:
+                        hours[hour] += count
+                    if first_seen is None or hour_first_seen < first_seen:
+                        first_seen = hour_first_seen
+                result[search] = (hours, first_seen)
+        return result
+
+    def export_rows(self, since: str | None = None, after_id: int = 0, limit: int = 50000) -> list[tuple]:
+        """
+        Порція оголошень для вивантаження (див. analytics.py), впорядкована за ad_id:
+        (ad_id, link, name, location, district, price_value, currency, area, listed_at, first_seen, last_seen).
+        since обмежує first_seen знизу, after_id — ad_id останнього рядка попередньої порції.
+        """
+        with self._lock:
+            return self._conn.execute(
+                """
+                SELECT ad_id, link, name, location, district, price_value, currency, area,
+                       listed_at, first_seen, last_seen
+                FROM ads WHERE ad_id > ? AND first_seen >= ? ORDER BY ad_id LIMIT ?
+                """,
+                (after_id, since or "", limit),
+            ).fetchall()
+
+    # --- Дані сторінок оголошень ---
+
+    def missing_details(self, ad_ids: list[int]) -> list[int]:
+        """Ті ідентифікатори зі списку, для яких сторінку оголошення ще не завантажено (порядок зберігається)."""
+        ad_ids = list(dict.fromkeys(ad_ids))
+        found = set()
+        with self._lock:
+            for chunk in _chunks(ad_ids):
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(f"SELECT ad_id FROM ad_details WHERE ad_id IN ({placeholders})", chunk)
+                found.update(row[0] for row in rows)
+        return [ad_id for ad_id in ad_ids if ad_id not in found]
+
+    def recent_ads_without_details(self, since: str, limit: int = 500) -> list[tuple[int, str]]:
+        """
+        (ad_id, link) оголошень, уперше побачених не раніше since, сторінку яких ще не пробували завантажити.
+        Імпортовані з CSV не враховуються: їх first_seen — час імпорту, а самі оголошення здебільшого давно зняті.
+        """
+        imported = self.get_meta("csv_imported")
+        imported_at = imported["imported_at"] if imported else ""
+        with self._lock:
+            return self._conn.execute("""
+                SELECT ads.ad_id, ads.link FROM ads
+                LEFT JOIN ad_details ON ad_details.ad_id = ads.ad_id
+                WHERE ads.first_seen >= ? AND ads.first_seen > ? AND ad_details.ad_id IS NULL
+                ORDER BY ads.first_seen DESC
+                LIMIT ?
+            """, (since, imported_at, limit)).fetchall()
+
+    def save_details(self, ad_id: int, details: dict):
+        """Зберігає дані сторінки оголошення (див. parsers.parse_ad_details)."""
+        with self._lock, self._conn:
+            self._conn.execute("""
+                INSERT INTO ad_details (ad_id, floor, total_floors, description, photos_count, is_business,
+                                        fetched_at, status)
+                VALUES (?, ?, ?, ?, ?, ?, ?, 'ok')
+                ON CONFLICT(ad_id) DO UPDATE SET
+                    floor = excluded.floor,
+                    total_floors = excluded.total_floors,
+                    description = excluded.description,
+                    photos_count = excluded.photos_count,
+                    is_business = excluded.is_business,
+                    fetched_at = excluded.fetched_at,
+                    status = excluded.status
+            """, (ad_id, details.get("floor"), details.get("total_floors"), details.get("description"),
+                  details.get("photos_count"), details.get("is_business"),
+                  datetime.now().isoformat(timespec="seconds")))
+
+    def mark_details_failed(self, ad_id: int):
+        """
+        Запам'ятовує, що сторінку оголошення не вдалося завантажити (знято з публікації, 404, помилка),
+        щоб не завантажувати її знову кожного циклу. Уже збережених даних не змінює.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO ad_details (ad_id, fetched_at, status) VALUES (?, ?, 'failed')",
+                (ad_id, datetime.now().isoformat(timespec="seconds")),
+            )
+
+    # --- Черга повідомлень ---
+
+    def enqueue_messages(self, messages: list[tuple[int, str]]):
+        """Додає повідомлення (chat_id, text) до черги на відправку."""
+        created_at = datetime.now().isoformat(timespec="seconds")
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO outbox (chat_id, text, created_at) VALUES (?, ?, ?)",
+                [(chat_id, text, created_at) for chat_id, text in messages],
+            )
+
+    def claim_messages(self, owner: str, now: float, lease_seconds: float,
+                       limit: int = 500) -> list[tuple[int, int, str, int]]:
+        """
+        Бере в оренду повідомлення, час відправки яких настав і які не орендує інший обробник:
+        (id, chat_id, text, attempts) у порядку додавання. Вибір і оренда — один запит UPDATE,
+        тож те саме повідомлення не отримають два обробники; якщо обробник зупинився, не надіславши
+        його, після закінчення оренди повідомлення знову стане доступним.
+        """
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                """
+                UPDATE outbox SET lease_owner = ?, lease_expires_at = ?
+                WHERE id IN (
+                    SELECT id FROM outbox WHERE next_attempt_at <= ? AND lease_expires_at <= ? ORDER BY id LIMIT ?
+                )
+                RETURNING id, chat_id, text, attempts
+                """,
+                (owner, now + lease_seconds, now, now, limit),
+            ).fetchall()
+        return sorted(rows)
+
+    def count_pending_messages(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def delete_messages(self, message_ids: list[int]):
+        """Видаляє доставлені (або остаточно відхилені) повідомлення з черги."""
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM outbox WHERE id = ?", [(message_id,) for message_id in message_ids])
+
+    def defer_messages(self, message_ids: list[int], next_attempt_at: float):
+        """Відкладає повідомлення до next_attempt_at (unix time) і збільшує лічильник спроб."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE outbox SET attempts = attempts + 1, next_attempt_at = ?, lease_owner = NULL, "
+                "lease_expires_at = 0 WHERE id = ?",
+                [(next_attempt_at, message_id) for message_id in message_ids],
+            )
+
+    def release_messages(self, owner: str, message_ids: list[int] | None = None, next_attempt_at: float = 0):
+        """
+        Знімає оренду обробника owner з повідомлень message_ids (або з усіх його повідомлень), не рахуючи
+        спробу, щоб їх одразу міг надіслати будь-який обробник — але не раніше next_attempt_at (unix time).
+        """
+        with self._lock, self._conn:
+            sql = ("UPDATE outbox SET lease_owner = NULL, lease_expires_at = 0, "
+                   "next_attempt_at = MAX(next_attempt_at, ?) WHERE lease_owner = ?")
+            if message_ids is None:
+                self._conn.execute(sql, (next_attempt_at, owner))
+            else:
+                self._conn.executemany(f"{sql} AND id = ?",
+                                       [(next_attempt_at, owner, message_id) for message_id in message_ids])
+
+    # --- Черга завдань обходу ---
+
+    def claim_task(self, tasks: list[str], owner: str, now: float, lease_seconds: float,
+                   min_interval: float) -> str | None:
+        """
+        Бере в оренду одне із завдань tasks, яке нікому не віддане (або чия оренда минула) і яке
+        не бралось останні min_interval секунд. Завдання, яких ще немає в таблиці, додаються.
+        Повертає назву завдання або None, якщо доступних немає.
+        """
+        if not tasks:
+            return None
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR IGNORE INTO work_queue (task) VALUES (?)", [(task,) for task in tasks])
+            for chunk in _chunks(list(tasks)):
+                placeholders = ",".join("?" * len(chunk))
+                row = self._conn.execute(
+                    f"""
+                    UPDATE work_queue
+                    SET lease_owner = ?, lease_expires_at = ?, attempts = attempts + 1, claimed_at = ?
+                    WHERE task = (
+                        SELECT task FROM work_queue
+                        WHERE task IN ({placeholders}) AND lease_expires_at <= ?
+                              AND (claimed_at IS NULL OR claimed_at <= ?)
+                        ORDER BY claimed_at LIMIT 1
+                    )
+                    RETURNING task
+                    """,
+                    (owner, now + lease_seconds, now, *chunk, now, now - min_interval),
+                ).fetchone()
+                if row:
+                    return row[0]
+        return None
+
+    def extend_lease(self, task: str, owner: str, now: float, lease_seconds: float) -> bool:
+        """Продовжує оренду завдання (heartbeat). False, якщо оренду вже втрачено."""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE work_queue SET lease_expires_at = ? WHERE task = ? AND lease_owner = ? AND lease_expires_at > ?",
+                (now + lease_seconds, task, owner, now),
+            )
+            return cursor.rowcount > 0
+
+    def finish_task(self, task: str, owner: str, done: bool = True, requests: int | None = None):
+        """
+        Звільняє оренду завдання. Якщо завдання не виконано (done=False), його може одразу взяти
+        інший обробник, не чекаючи min_interval. requests — скільки запитів зробив обхід.
+        """
+        with self._lock, self._conn:
+            if done:
+                self._conn.execute(
+                    "UPDATE work_queue SET lease_owner = NULL, lease_expires_at = 0, attempts = 0, "
+                    "last_requests = COALESCE(?, last_requests) WHERE task = ? AND lease_owner = ?",
+                    (requests, task, owner),
+                )
+            else:
+                self._conn.execute(
+                    "UPDATE work_queue SET lease_owner = NULL, lease_expires_at = 0, claimed_at = NULL "
+                    "WHERE task = ? AND lease_owner = ?",
+                    (task, owner),
+                )
+
+    def task_states(self, tasks: list[str]) -> dict[str, tuple[float | None, int | None]]:
+        """Коли кожне із завдань брали востаннє (unix time) і скільки запитів зробив його останній обхід."""
+        states = {}
+        with self._lock:
+            for chunk in _chunks(list(tasks)):
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT task, claimed_at, last_requests FROM work_queue WHERE task IN ({placeholders})", chunk)
+                states.update((task, (claimed_at, last_requests)) for task, claimed_at, last_requests in rows)
+        return states
+
+    # --- Службові значення ---
+
+    def get_meta(self, key: str, default=None):
+        """Повертає збережене JSON-значення за ключем."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_meta(self, key: str, value):
+        with self._lock, self._conn:
+            self._write_meta(key, value)
+
+    def _write_meta(self, key: str, value):
+        self._conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, json.dumps(value, ensure_ascii=False)),
+        )
+
+    def is_crawled(self, search_url: str) -> bool:
+        """
+        Чи обходили вже пошук повністю. Лише тоді інкрементальний обхід може зупинятись
+        на першій сторінці без нових оголошень: база вже містить усі старіші оголошення.
+        """
+        return bool(self.get_meta(f"crawled:{search_url}"))
+
+    def mark_crawled(self, search_url: str):
+        self.set_meta(f"crawled:{search_url}", True)
+
+    # --- Міграція ---
+
+    def import_csv_once(self, csv_filepath: str) -> int:
+        """
+        Одноразово імпортує оголошення зі старого CSV файлу (колонки time,name,location,price,square,link).
+        Імпортовані оголошення вже надсилались у Telegram, тож вони одразу позначаються переглянутими
+        пошуком за замовчуванням — у тій самій транзакції, що й запис, щоб їх не надіслати вдруге.
+        Повторні виклики нічого не роблять. Повертає кількість імпортованих рядків.
+        """
+        if self.get_meta("csv_imported"):
+            return 0
+        try:
+            with open(csv_filepath, "r", encoding="utf-8", newline="") as file:
+                ads = [row for row in csv.DictReader(file) if row.get('link')]
+            # Посилання з CSV нормалізуються в upsert_ads, тож одне оголошення з різними
+            # трекінг-параметрами чи slug стає одним записом
+        except FileNotFoundError:
+            logger.info("CSV файл для імпорту не знайдено, імпорт пропущено.")
+            ads = []
+        except Exception as e:
+            logger.error(f"Помилка читання CSV файлу {csv_filepath}: {e}")
+            return 0
+
+        # Для старих записів точний час першої появи невідомий, тож беремо час імпорту
+        imported_at = datetime.now().isoformat(timespec="seconds")
+        with self._lock, self._conn:
+            ad_ids = self._write_ads(ads, imported_at)
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO search_seen (search, ad_id, seen_at) VALUES (?, ?, ?)",
+                [(DEFAULT_SEARCH_NAME, ad_id, imported_at) for ad_id in ad_ids],
+            )
+            self._write_meta("csv_imported", {
+                "path": csv_filepath,
+                "rows": len(ads),
+                "imported_at": imported_at,
+            })
+        logger.info(f"Імпортовано {len(ads)} оголошень з {csv_filepath} у {self.db_path}")
+        return len(ads)
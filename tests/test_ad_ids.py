@@ -0,0 +1,21 @@
+from ad_ids import canonical_link, extract_ad_id
+
+
+def test_canonical_link_drops_query_and_fragment():
+    assert (canonical_link(" HTTPS://WWW.OLX.UA/d/uk/obyavlenie/kvartira-IDXAhiv.html?reason=extended_search#photos ")
+            == "https://www.olx.ua/d/uk/obyavlenie/kvartira-IDXAhiv.html")
+
+
+def test_ad_id_ignores_slug_and_tracking_parameters():
+    ad_id = extract_ad_id("https://www.olx.ua/d/uk/obyavlenie/kvartira-na-pecherskomu-IDXAhiv.html")
+    assert ad_id > 0
+    assert extract_ad_id("https://www.olx.ua/d/uk/obyavlenie/nova-nazva-IDXAhiv.html?reason=observed_ad") == ad_id
+    assert extract_ad_id("https://www.olx.ua/d/uk/obyavlenie/kvartira-IDXAhiw.html") == ad_id + 1
+
+
+def test_ad_id_without_token_is_negative_and_stable():
+    link = "https://www.olx.ua/d/uk/obyavlenie/kvartira.html"
+    ad_id = extract_ad_id(link)
+    assert ad_id < 0
+    assert extract_ad_id(link + "?utm_source=telegram") == ad_id
+    assert extract_ad_id("https://www.olx.ua/d/uk/obyavlenie/insha-kvartira.html") != ad_id
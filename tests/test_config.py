@@ -0,0 +1,24 @@
+import pytest
+
+from config import ConfigError, Settings
+
+
+def test_settings_read_every_knob_from_environment(monkeypatch):
+    monkeypatch.setenv("OLX_INCREMENTAL_CRAWL", "0")
+    monkeypatch.setenv("OLX_PRICE_TRACKING", "0")
+    monkeypatch.setenv("OLX_WORK_LANES", "7")
+    monkeypatch.setenv("TELEGRAM_GROUP_RATE", "0.5")
+    settings = Settings.from_env()
+    assert settings.incremental_crawl is False
+    assert settings.price_tracking is False
+    assert settings.work_lanes == 7
+    assert settings.telegram_group_rate == 0.5
+    assert settings.export_parquet is False
+
+
+def test_settings_report_invalid_and_missing_values(monkeypatch):
+    monkeypatch.setenv("OLX_WORK_LANES", "багато")
+    with pytest.raises(ConfigError, match="OLX_WORK_LANES"):
+        Settings.from_env()
+    with pytest.raises(ConfigError, match="TELEGRAM_CHAT_ID_OLEKSANDR"):
+        Settings().require("telegram_chat_id")
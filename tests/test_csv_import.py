@@ -0,0 +1,44 @@
+import asyncio
+import csv
+
+import kyiv_rent_to_telegram as kyiv
+from benchmarks.fixtures import SyntheticCorpus, ad_link
+from searches import DEFAULT_SEARCH_NAME, Search
+from storage import AD_FIELDS, AdStore
+
+
+class _NullNotifier:
+    async def send_many(self, messages):
+        pass
+
+    def wake(self):
+        pass
+
+
+def _write_csv(path, corpus: SyntheticCorpus, numbers):
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=AD_FIELDS)
+        writer.writeheader()
+        for number in numbers:
+            sample = corpus.sample(number)
+            writer.writerow({"time": "11 березня 2025 р.", "name": sample["name"], "location": sample["location"],
+                             "price": sample["price"], "square": sample["square"], "link": ad_link(number)})
+
+
+def test_csv_history_is_not_renotified(tmp_path, monkeypatch):
+    monkeypatch.setattr(kyiv, "get_http_cache", lambda: None)
+    corpus = SyntheticCorpus(per_page=5, json_state=False, padding_kb=0)
+    # Перші три оголошення сторінки вже були в CSV (їх надсилали до переходу на SQLite), решта — нові
+    csv_path = tmp_path / "all_ad.csv"
+    _write_csv(csv_path, corpus, range(3))
+    search = Search(DEFAULT_SEARCH_NAME, "https://www.olx.ua/", chat_id=1)
+
+    with AdStore(str(tmp_path / "ads.sqlite3")) as store:
+        assert store.import_csv_once(str(csv_path)) == 3
+        page_ids, new_counts, sent_counts = asyncio.run(kyiv.process_page(
+            "https://www.olx.ua/?page=1", corpus.page(1, 1), store, _NullNotifier(), [search]))
+
+        assert len(page_ids) == 5
+        assert new_counts == {DEFAULT_SEARCH_NAME: 2}
+        assert sent_counts == {DEFAULT_SEARCH_NAME: 2}
+        assert store.count_pending_messages() == 2
@@ -0,0 +1,44 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from ad_ids import extract_ad_id
+from benchmarks.fixtures import ad_link
+from enrichment import DetailEnricher
+from storage import AdStore
+
+
+def _ad(number: int) -> dict:
+    return {"name": f"Квартира {number}", "link": ad_link(number), "time": "", "location": "", "price": "",
+            "square": ""}
+
+
+def test_failed_detail_fetch_is_not_repeated(tmp_path):
+    fetched = []
+
+    async def fetch(link):
+        fetched.append(link)
+        return None  # оголошення знято: 404
+
+    async def cycle(store):
+        enricher = DetailEnricher(store, [{}], drain_timeout=5)
+        enricher._fetcher.fetch = fetch
+        async with enricher:
+            pass
+
+    with AdStore(str(tmp_path / "ads.sqlite3")) as store:
+        store.upsert_ads([_ad(1)])
+        asyncio.run(cycle(store))
+        asyncio.run(cycle(store))
+        assert fetched == [ad_link(1)]
+        assert store.missing_details([extract_ad_id(ad_link(1))]) == []
+
+
+def test_csv_imported_ads_are_not_in_detail_backlog(tmp_path):
+    csv_path = tmp_path / "all_ad.csv"
+    csv_path.write_text(f"time,name,location,price,square,link\n,Стара квартира,,,,{ad_link(1)}\n", encoding="utf-8")
+    with AdStore(str(tmp_path / "ads.sqlite3")) as store:
+        store.import_csv_once(str(csv_path))
+        # Нове оголошення побачене парсером після імпорту
+        store.upsert_ads([_ad(2)], (datetime.now() + timedelta(minutes=1)).isoformat(timespec="seconds"))
+        backlog = store.recent_ads_without_details("2000-01-01T00:00:00")
+    assert [link for _, link in backlog] == [ad_link(2)]
@@ -0,0 +1,105 @@
+import asyncio
+import os
+
+from aiohttp import web
+
+from fetcher import AsyncFetcher
+from http_cache import HttpCache
+from http_session import close_async_sessions, get_http_stats
+
+
+def test_fetchers_reuse_connections_across_cycles():
+    async def page(request):
+        return web.Response(text="<html></html>", content_type="text/html")
+
+    async def scenario():
+        app = web.Application()
+        app.router.add_get("/page", page)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = runner.addresses[0][1]
+        host = f"127.0.0.1:{port}"
+        try:
+            # Два цикли парсингу: кожен зі своїм завантажувачем, як kyiv_rent_to_telegram.main
+            for _ in range(2):
+                async with AsyncFetcher([{}], rate=100, burst=10) as fetcher:
+                    assert await fetcher.fetch(f"http://{host}/page") == "<html></html>"
+        finally:
+            await close_async_sessions()
+            await runner.cleanup()
+        return host
+
+    host = asyncio.run(scenario())
+    stats = get_http_stats()[host]
+    assert stats["requests"] == 2
+    assert stats["new_connections"] == 1
+    assert stats["pool_hit_rate"] == 0.5
+
+
+async def _serve(app: web.Application, scenario):
+    """Запускає app на локальному порту і викликає scenario(base_url)."""
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    try:
+        return await scenario(f"http://127.0.0.1:{runner.addresses[0][1]}")
+    finally:
+        await close_async_sessions()
+        await runner.cleanup()
+
+
+def test_not_modified_without_cached_body_refetches_once(tmp_path):
+    conditional_requests = []
+
+    async def page(request):
+        if "If-None-Match" in request.headers:
+            conditional_requests.append(request.headers["If-None-Match"])
+            return web.Response(status=304)
+        return web.Response(text="<html>нова</html>", content_type="text/html", headers={"ETag": '"v1"'})
+
+    app = web.Application()
+    app.router.add_get("/page", page)
+    cache = HttpCache(str(tmp_path))
+
+    async def scenario(base_url):
+        url = f"{base_url}/page"
+        # ETag збережено, а тіла в кеші вже немає
+        cache.store_response(url, "<html>стара</html>", {"ETag": '"v1"'})
+        os.remove(cache._path(url, ".html.gz"))
+        async with AsyncFetcher([{}], rate=100, burst=10, cache=cache) as fetcher:
+            fetcher.retries = 0
+            return await fetcher.fetch(url)
+
+    assert asyncio.run(_serve(app, scenario)) == "<html>нова</html>"
+    assert conditional_requests == ['"v1"']
+
+
+def test_retry_after_is_capped(monkeypatch):
+    pauses = []
+    real_sleep = asyncio.sleep
+
+    async def sleep(delay):
+        pauses.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+    responses = [web.Response(status=429, headers={"Retry-After": "86400"}),
+                 web.Response(text="ok", content_type="text/html")]
+
+    async def page(request):
+        return responses.pop(0)
+
+    app = web.Application()
+    app.router.add_get("/page", page)
+
+    async def scenario(base_url):
+        async with AsyncFetcher([{}], rate=100, burst=10) as fetcher:
+            fetcher.backoff_max = 5
+            return await fetcher.fetch(f"{base_url}/page")
+
+    assert asyncio.run(_serve(app, scenario)) == "ok"
+    # asyncio.sleep(0) викликає й сам aiohttp
+    assert [pause for pause in pauses if pause] == [5]
@@ -0,0 +1,81 @@
+import asyncio
+import types
+
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+import fetcher
+from notifier import TELEGRAM_MESSAGE_LIMIT, TelegramNotifier
+from storage import AdStore
+
+
+class _RecordingBot:
+    """Замість aiogram Bot: запам'ятовує надіслане, перші `rate_limited` відправок отримують 429."""
+
+    def __init__(self, rate_limited: int = 0, retry_after: int = 3):
+        self.sent = []
+        self.rate_limited = rate_limited
+        self.retry_after = retry_after
+
+    async def send_message(self, chat_id, text, **kwargs):
+        if self.rate_limited:
+            self.rate_limited -= 1
+            raise TelegramRetryAfter(SendMessage(chat_id=chat_id, text=text), "Too Many Requests",
+                                     self.retry_after)
+        self.sent.append((chat_id, text))
+
+
+def test_make_batches_joins_messages_up_to_telegram_limit(tmp_path):
+    with AdStore(str(tmp_path / "ads.sqlite3")) as store:
+        notifier = TelegramNotifier(_RecordingBot(), store, batch_threshold=2)
+    assert notifier._make_batches([(1, "a", 0), (2, "b", 1)]) == [([1], "a", 0), ([2], "b", 1)]
+
+    long_text = "x" * (TELEGRAM_MESSAGE_LIMIT // 2)
+    batches = notifier._make_batches([(1, long_text, 0), (2, "b", 2), (3, long_text, 0), (4, "c", 0)])
+    assert [(ids, attempts) for ids, _, attempts in batches] == [([1, 2], 2), ([3, 4], 0)]
+    assert batches[0][1] == long_text + "\n\nb"
+    assert all(len(text) <= TELEGRAM_MESSAGE_LIMIT for _, text, _ in batches)
+
+
+def test_batched_messages_are_sent_in_order(tmp_path):
+    bot = _RecordingBot()
+
+    async def scenario(store):
+        async with TelegramNotifier(bot, store, global_rate=1000, batch_threshold=2) as notifier:
+            await notifier.send_many([(1, "m0"), (1, "m1"), (1, "m2"), (2, "інший чат")])
+
+    with AdStore(str(tmp_path / "ads.sqlite3")) as store:
+        asyncio.run(scenario(store))
+        assert store.count_pending_messages() == 0
+    assert sorted(bot.sent) == [(1, "m0\n\nm1\n\nm2"), (2, "інший чат")]
+
+
+def test_rate_limited_message_waits_and_slows_chat(tmp_path, monkeypatch):
+    pauses = []
+    clock = [0.0]
+    real_sleep = asyncio.sleep
+
+    async def sleep(delay):
+        # Паузи не чекаються насправді, а просувають годинник обмежувачів швидкості
+        pauses.append(delay)
+        clock[0] += delay
+        await real_sleep(0)
+
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+    monkeypatch.setattr(fetcher, "time", types.SimpleNamespace(monotonic=lambda: clock[0]))
+    bot = _RecordingBot(rate_limited=2, retry_after=7)
+
+    async def scenario(store):
+        async with TelegramNotifier(bot, store, global_rate=1000) as notifier:
+            await notifier.send(1, "привіт")
+            await notifier.drain()
+            return notifier._chat_bucket(1).rate, notifier._base_rate(1)
+
+    with AdStore(str(tmp_path / "ads.sqlite3")) as store:
+        rate, base_rate = asyncio.run(scenario(store))
+        assert store.count_pending_messages() == 0
+    # Повідомлення не втрачено і не відкладено: двічі чекали retry_after і надіслали
+    assert bot.sent == [(1, "привіт")]
+    assert pauses.count(7) == 2
+    # Швидкість чату двічі знижено вдвічі, після успіху трохи відновлено
+    assert rate == base_rate / 4 * 1.25
@@ -0,0 +1,42 @@
+import asyncio
+import time
+
+from storage import AdStore
+
+
+def test_mark_seen_queues_messages_in_ranked_order(tmp_path):
+    ranked = [900, 5, 77, 3, 1000, 42]
+    with AdStore(str(tmp_path / "ads.sqlite3")) as store:
+        store.mark_seen("default", [42], {42: [(1, "вже бачене")]})
+        store.mark_seen("default", ranked, {ad_id: [(1, str(ad_id))] for ad_id in ranked})
+        claimed = store.claim_messages("worker", now=0, lease_seconds=60)
+    assert [text for _, _, text, _ in claimed] == ["вже бачене", "900", "5", "77", "3", "1000"]
+
+
+class _FlakyBot:
+    """Замість aiogram Bot: перша відправка падає з тимчасовою помилкою."""
+
+    def __init__(self):
+        self.sent = []
+        self.failed = False
+
+    async def send_message(self, chat_id, text, **kwargs):
+        if not self.failed:
+            self.failed = True
+            raise RuntimeError("тимчасова помилка мережі")
+        self.sent.append(text)
+
+
+def test_deferred_chat_releases_unsent_messages(tmp_path):
+    from notifier import TelegramNotifier
+
+    async def scenario(store):
+        async with TelegramNotifier(_FlakyBot(), store, owner="worker-1") as notifier:
+            await notifier.send_many([(1, "m0"), (1, "m1"), (1, "m2")])
+
+    with AdStore(str(tmp_path / "ads.sqlite3")) as store:
+        asyncio.run(scenario(store))
+        # Жодне повідомлення не лишилось в оренді завершеного обробника
+        assert store.claim_messages("worker-2", now=time.time(), lease_seconds=60) == []
+        claimed = store.claim_messages("worker-2", now=time.time() + 3600, lease_seconds=60)
+    assert [(text, attempts) for _, _, text, attempts in claimed] == [("m0", 1), ("m1", 0), ("m2", 0)]
@@ -0,0 +1,19 @@
+import kyiv_rent_to_telegram as kyiv
+from benchmarks.fixtures import SyntheticCorpus
+from http_cache import HttpCache
+from metrics import PARSE_SECONDS
+
+
+def test_parse_timing_counts_cache_only_on_hit(tmp_path, monkeypatch):
+    monkeypatch.setattr(kyiv, "get_http_cache", lambda: HttpCache(str(tmp_path)))
+    corpus = SyntheticCorpus(per_page=3, json_state=False, padding_kb=0)
+    page_url = "https://www.olx.ua/?page=1"
+    cache_before, html_before = PARSE_SECONDS.count(source="cache"), PARSE_SECONDS.count(source="html")
+
+    kyiv.parse_ads_cached(corpus.page(1, 1), page_url)  # промах
+    ads = kyiv.parse_ads_cached(corpus.page(1, 1), page_url)  # влучання
+    kyiv.parse_ads_cached(corpus.page(1, 1, offset=3), page_url)  # сторінка змінилась — промах
+
+    assert len(ads) == 3
+    assert PARSE_SECONDS.count(source="cache") - cache_before == 1
+    assert PARSE_SECONDS.count(source="html") - html_before == 2
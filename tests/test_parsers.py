@@ -0,0 +1,50 @@
+import os
+from datetime import datetime
+
+from models import Ad
+from parsers import JSON_STATE_PARSER, BeautifulSoupParser, LxmlParser, parse_ads
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+PAGE_URL = "https://www.olx.ua/uk/nedvizhimost/kvartiry/dolgosrochnaya-arenda-kvartir/kiev/"
+# Поля, які дають і HTML-бекенди, і JSON стан
+SHARED_FIELDS = ("ad_id", "link", "name", "location", "time", "price", "square")
+
+CARD = (
+    '<div class="css-l9drzq" data-cy="l-card"><a href="/d/uk/obyavlenie/kvartira-IDXAhiv.html">'
+    '<h4>Оренда 2-кімнатної квартири</h4></a>'
+    '<p data-testid="price" class="css-uj7mm0">20 000 грн.</p><span class="css-6as4g5">55 м²</span>'
+    '<p data-testid="location-date" class="css-vbz67q">Київ, Печерський - Сьогодні о 18:45</p></div>'
+)
+
+
+def test_html_card_keeps_listing_time_of_day():
+    for backend in ("lxml", "bs4"):
+        [raw_ad] = parse_ads(f"<html><body>{CARD}</body></html>", "https://www.olx.ua/", backend=backend)
+        ad = Ad.from_dict(raw_ad)
+        today = datetime.now().replace(hour=18, minute=45, second=0, microsecond=0)
+        assert ad.listed_at == today
+        # Для показу "Сьогодні" замінюється датою
+        assert "Сьогодні" not in ad.time and str(today.year) in ad.time
+
+
+def _load_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def test_html_backends_match_on_saved_page():
+    html_content = _load_fixture("listing_page.html")
+    lxml_ads = LxmlParser().parse(html_content, PAGE_URL)
+    assert len(lxml_ads) == 3
+    assert lxml_ads == BeautifulSoupParser().parse(html_content, PAGE_URL)
+
+
+def test_json_state_matches_html_on_shared_fields():
+    html_content = _load_fixture("listing_page.html")
+    html_ads = LxmlParser().parse(html_content, PAGE_URL)
+    json_ads = JSON_STATE_PARSER.parse(html_content, PAGE_URL)
+    assert [{key: ad[key] for key in SHARED_FIELDS} for ad in json_ads] == \
+        [{key: ad[key] for key in SHARED_FIELDS} for ad in html_ads]
+    # JSON стан точніший за картку: час публікації з точністю до хвилини
+    assert [ad["created_at"][:16] for ad in json_ads] == \
+        ["2026-10-12T18:45", "2026-10-05T09:10", "2026-10-01T21:00"]
@@ -0,0 +1,90 @@
+import asyncio
+import dataclasses
+import time
+
+import kyiv_rent_to_telegram as kyiv
+from benchmarks.fixtures import SyntheticCorpus
+from config import get_settings
+from searches import Search
+from storage import AdStore
+
+
+class _NullNotifier:
+    def __init__(self):
+        self.sent = []
+
+    async def send_many(self, messages):
+        self.sent.extend(messages)
+
+    def wake(self):
+        pass
+
+
+class _Corpus(SyntheticCorpus):
+    """Сторінки з картками, вміст яких задається для кожного номера оголошення."""
+
+    def __init__(self, samples: dict[int, dict]):
+        super().__init__(per_page=2, json_state=False, padding_kb=0)
+        self.by_number = samples
+
+    def sample(self, number: int) -> dict:
+        return self.by_number[number]
+
+
+def _flat(name: str, price: str) -> dict:
+    return {"name": name, "location": "Київ, Печерський", "price": price, "square": "45 м²"}
+
+
+def test_price_drop_and_relist_of_sent_ad(tmp_path, monkeypatch):
+    monkeypatch.setattr(kyiv, "get_http_cache", lambda: None)
+    corpus = _Corpus({0: _flat("Квартира біля метро", "20 000 грн."), 1: _flat("Квартира з балконом", "18 000 грн."),
+                      4: _flat("Нова квартира", "25 000 грн."), 5: _flat("Квартира з балконом", "16 000 грн.")})
+    search = Search("pechersk", "https://www.olx.ua/", chat_id=1)
+
+    def process(html):
+        return asyncio.run(kyiv.process_page("https://www.olx.ua/?page=1", html, store, notifier, [search]))
+
+    def queued_texts():
+        claimed = store.claim_messages("test", now=time.time(), lease_seconds=60)
+        store.delete_messages([message_id for message_id, _, _, _ in claimed])
+        return [text for _, _, text, _ in claimed]
+
+    with AdStore(str(tmp_path / "ads.sqlite3")) as store:
+        notifier = _NullNotifier()
+        _, new_counts, sent_counts = process(corpus.page(1, 1))
+        assert (new_counts, sent_counts) == ({"pechersk": 2}, {"pechersk": 2})
+        assert len(queued_texts()) == 2
+
+        # Те саме оголошення подешевшало: окреме сповіщення про зниження ціни
+        corpus.by_number[0] = _flat("Квартира біля метро", "17 000 грн.")
+        _, new_counts, sent_counts = process(corpus.page(1, 1))
+        assert (new_counts, sent_counts) == ({"pechersk": 0}, {"pechersk": 0})
+        assert [(chat_id, text.splitlines()[0]) for chat_id, text in notifier.sent] == [
+            (1, "📉 <b>Ціна знизилась</b>: 20 000 → 17 000 UAH")]
+        assert queued_texts() == []
+
+        # Оголошення 5 — повторна публікація вже надісланого 1 з нижчою ціною, 4 — справді нове
+        _, new_counts, sent_counts = process(corpus.page(1, 1, offset=4))
+        assert (new_counts, sent_counts) == ({"pechersk": 2}, {"pechersk": 1})
+        texts = queued_texts()
+        assert len(texts) == 2
+        assert any("Нова квартира" in text and "Ціна знизилась" not in text for text in texts)
+        assert any(text.startswith("📉 <b>Ціна знизилась</b>: 18 000 → 16 000 UAH") and "Квартира з балконом" in text
+                   for text in texts)
+
+
+def test_last_seen_is_updated_without_price_tracking(tmp_path, monkeypatch):
+    monkeypatch.setattr(kyiv, "get_http_cache", lambda: None)
+    monkeypatch.setattr(kyiv, "get_settings", lambda: dataclasses.replace(get_settings(), price_tracking=False))
+    corpus = _Corpus({0: _flat("Квартира біля метро", "20 000 грн."), 1: _flat("Квартира з балконом", "18 000 грн.")})
+    search = Search("pechersk", "https://www.olx.ua/", chat_id=1)
+    with AdStore(str(tmp_path / "ads.sqlite3")) as store:
+        asyncio.run(kyiv.process_page("https://www.olx.ua/?page=1", corpus.page(1, 1), store, _NullNotifier(), [search]))
+        store._conn.execute("UPDATE ads SET last_seen = '2020-01-01T00:00:00'")
+
+        corpus.by_number[0] = _flat("Квартира біля метро", "17 000 грн.")
+        asyncio.run(kyiv.process_page("https://www.olx.ua/?page=1", corpus.page(1, 1), store, _NullNotifier(), [search]))
+        rows = store._conn.execute("SELECT price_value, last_seen FROM ads ORDER BY ad_id").fetchall()
+    # Ціна без відстеження не оновлюється, а час останньої появи — так
+    assert [price for price, _ in rows] == [20000, 18000]
+    assert all(last_seen > "2020-01-01T00:00:00" for _, last_seen in rows)
@@ -0,0 +1,62 @@
+import pytest
+
+from models import Ad
+from rules import SearchRules
+
+
+def _ad(ad_id: int, price: float | None = 20000, currency: str | None = "UAH", area: float | None = 50,
+        district: str | None = "Печерський", name: str = "Оренда квартири", is_business: bool | None = False) -> Ad:
+    return Ad(ad_id=ad_id, link=f"https://www.olx.ua/d/uk/obyavlenie/ad-{ad_id}.html", name=name,
+              price_value=price, currency=currency, area=area, district=district, is_business=is_business)
+
+
+@pytest.mark.parametrize("filters, message", [
+    ({"max_rooms": 2}, "Невідомі фільтри: max_rooms"),
+    ({"min_price": "дешево"}, "'min_price' має бути числом"),
+    ({"sort_by": "rooms"}, "sort_by має бути одним з"),
+    ({"title_include": ["("]}, "Некоректний регулярний вираз у 'title_include'"),
+])
+def test_from_filters_rejects_invalid_filters(filters, message):
+    with pytest.raises(ValueError, match=message):
+        SearchRules.from_filters(filters)
+
+
+def test_from_filters_normalizes_values():
+    rules = SearchRules.from_filters({"currency": "usd", "min_price": "500", "districts": " Печерський ",
+                                      "title_exclude": "подобово"})
+    assert rules.currency == "USD"
+    assert rules.min_price == 500.0
+    assert rules.districts == frozenset({"печерський"})
+    assert SearchRules.from_filters(None).is_empty
+
+
+@pytest.mark.parametrize("filters, ad, reason", [
+    ({"max_price": 25000}, _ad(1, currency="USD"), "currency"),
+    ({"max_price": 25000}, _ad(1, price=None), "price"),
+    ({"min_price": 25000}, _ad(1), "price"),
+    ({"max_area": 40}, _ad(1), "area"),
+    ({"min_area": 40}, _ad(1, area=None), "area"),
+    ({"max_price_per_m2": 300}, _ad(1), "price_per_m2"),
+    ({"districts": ["Оболонський"]}, _ad(1), "district"),
+    ({"exclude_districts": ["печерський"]}, _ad(1), "district"),
+    ({"title_include": "2-к|двокімнатн"}, _ad(1), "title"),
+    ({"title_exclude": "ОРЕНДА"}, _ad(1), "title"),
+    ({"exclude_business": True}, _ad(1, is_business=True), "business"),
+    ({"min_price": 15000, "max_price": 25000, "districts": ["ПЕЧЕРСЬКИЙ"], "title_include": "квартир"}, _ad(1), None),
+])
+def test_rejection_reason(filters, ad, reason):
+    assert SearchRules.from_filters(filters).rejection_reason(ad) == reason
+
+
+def test_rank_puts_ads_without_value_last():
+    ads = [_ad(1, price=30000), _ad(2, price=None), _ad(3, price=10000), _ad(4, price=20000)]
+    assert [ad.ad_id for ad in SearchRules.from_filters({"sort_by": "price"}).rank(ads)] == [3, 4, 1, 2]
+    assert [ad.ad_id for ad in SearchRules.from_filters({"sort_by": "-price"}).rank(ads)] == [1, 4, 3, 2]
+    assert SearchRules.from_filters({}).rank(ads) == ads
+
+
+def test_apply_splits_and_ranks():
+    rules = SearchRules.from_filters({"max_price": 25000, "sort_by": "-area"})
+    accepted, rejected = rules.apply([_ad(1, area=30), _ad(2, price=30000), _ad(3, area=60)])
+    assert [ad.ad_id for ad in accepted] == [3, 1]
+    assert [(ad.ad_id, reason) for ad, reason in rejected] == [(2, "price")]
@@ -0,0 +1,27 @@
+import pytest
+
+from scheduling import plan_intervals
+
+
+def test_busier_searches_are_polled_more_often_within_budget():
+    intervals = plan_intervals({"hot": 16, "quiet": 1}, {"hot": 1, "quiet": 1}, budget_per_hour=10,
+                               min_seconds=60, max_seconds=86400)
+    # T ~ sqrt(cost / rate): у 16 разів частіші оголошення — у 4 рази коротший інтервал
+    assert intervals == pytest.approx({"hot": 450, "quiet": 1800})
+    assert sum(3600 / interval for interval in intervals.values()) == pytest.approx(10)
+
+
+def test_intervals_are_clamped():
+    rates, costs = {"hot": 16, "quiet": 1}, {"hot": 1, "quiet": 1}
+    assert plan_intervals(rates, costs, 10, min_seconds=600, max_seconds=86400) == pytest.approx(
+        {"hot": 600, "quiet": 1800})
+    # Верхня межа важливіша за бюджет
+    assert plan_intervals(rates, costs, 10, min_seconds=60, max_seconds=1000) == pytest.approx(
+        {"hot": 450, "quiet": 1000})
+
+
+def test_expensive_searches_are_polled_less_often():
+    intervals = plan_intervals({"one_page": 4, "ten_pages": 4}, {"one_page": 1, "ten_pages": 10},
+                               budget_per_hour=100, min_seconds=1, max_seconds=86400)
+    assert intervals["ten_pages"] / intervals["one_page"] == pytest.approx(10 ** 0.5)
+    assert plan_intervals({}, {}, 100, 60, 3600) == {}
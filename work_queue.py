@@ -0,0 +1,117 @@
+import asyncio
+import os
+import socket
+import time
+
+from config import get_settings
+from jobs import run_blocking
+from logger_ import get_logger
+from storage import AdStore
+
+logger = get_logger(__name__)
+
+
+def worker_id() -> str:
+    """Ідентифікатор цього обробника в черзі завдань (OLX_WORKER_ID, за замовчуванням — хост і PID процесу)."""
+    return get_settings().worker_id or f"{socket.gethostname()}-{os.getpid()}"
+
+
+class TaskLease:
+    """
+    Оренда одного завдання. Поки вона активна, фоновий heartbeat продовжує її кожну третину
+    терміну оренди. Якщо продовжити не вдалося (обробник завис довше за оренду і завдання
+    взяв інший), lost стає True; дублювання повідомлень це не спричиняє — його відсікає mark_seen.
+    """
+
+    def __init__(self, store: AdStore, task: str, owner: str, lease_seconds: float):
+        self.store = store
+        self.task = task
+        self.owner = owner
+        self.lease_seconds = lease_seconds
+        self.lost = False
+        # Скільки запитів зробило виконання завдання (якщо обробник його повернув)
+        self.requests: int | None = None
+        self._heartbeat: asyncio.Task | None = None
+
+    async def __aenter__(self):
+        self._heartbeat = asyncio.create_task(self._beat())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._heartbeat.cancel()
+        await asyncio.gather(self._heartbeat, return_exceptions=True)
+        # Невдале завдання звільняємо одразу, щоб його міг повторити інший обробник
+        await run_blocking(self.store.finish_task, self.task, self.owner, exc_type is None, self.requests)
+
+    async def _beat(self):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            if not await run_blocking(self.store.extend_lease, self.task, self.owner, time.time(), self.lease_seconds):
+                self.lost = True
+                logger.warning(f"Оренду завдання {self.task} втрачено: його взяв інший обробник.")
+                return
+
+
+class WorkQueue:
+    """
+    Черга завдань обходу поверх AdStore, спільна для всіх обробників (процесів чи реплік),
+    що працюють з однією базою. Завдання — URL результатів пошуку (група пошуків, див. searches.py);
+    кожне в кожен момент виконує лише один обробник, тож N обробників ділять обхід між собою.
+    Пошуки з однаковим URL обходяться одним завданням, а всі завдання циклу ділять один завантажувач
+    (з'єднання й обмежувач швидкості), тож кількість запитів залежить від кількості різних сторінок.
+
+        queue = WorkQueue(store)
+        await queue.run(tasks, handler, lanes=4)  # handler(task) викликається для кожного взятого завдання
+                                                  # і може повернути кількість зроблених запитів
+
+    Черга лише розподіляє роботу; те, що кожне оголошення надсилається рівно один раз,
+    гарантує AdStore.mark_seen (позначка та повідомлення в outbox в одній транзакції).
+    """
+
+    def __init__(self, store: AdStore, owner: str | None = None, lease_seconds: float | None = None,
+                 min_interval: float | None = None):
+        settings = get_settings()
+        self.store = store
+        self.owner = owner or worker_id()
+        self.lease_seconds = settings.work_lease_seconds if lease_seconds is None else lease_seconds
+        self.min_interval = settings.work_min_interval if min_interval is None else min_interval
+        self.lanes = settings.work_lanes
+
+    async def claim(self, tasks: list[str]) -> TaskLease | None:
+        """Бере в оренду одне з доступних завдань або повертає None."""
+        task = await run_blocking(self.store.claim_task, tasks, self.owner, time.time(),
+                                  self.lease_seconds, self.min_interval)
+        return TaskLease(self.store, task, self.owner, self.lease_seconds) if task else None
+
+    async def run(self, tasks: list[str], handler, lanes: int | None = None) -> int:
+        """
+        Виконує доступні завдання у lanes паралельних потоках, доки їх не розберуть (цей або інші
+        обробники). Помилка одного завдання логується і не зупиняє решту. Повертає кількість виконаних.
+        """
+        lanes = self.lanes if lanes is None else lanes
+        done = 0
+        # Завдання, за які цей обробник уже брався в цьому виклику (невдале не повторюємо до наступного циклу)
+        attempted: set[str] = set()
+
+        async def lane():
+            nonlocal done
+            while True:
+                lease = await self.claim([task for task in tasks if task not in attempted])
+                if lease is None:
+                    return
+                attempted.add(lease.task)
+                try:
+                    async with lease:
+                        requests = await handler(lease.task)
+                        if isinstance(requests, int):
+                            lease.requests = requests
+                    done += 1
+                except Exception as e:
+                    logger.error(f"Помилка виконання завдання {lease.task}: {e}", exc_info=True)
+
+        await asyncio.gather(*(lane() for _ in range(max(1, min(lanes, len(tasks))))))
+        skipped = len(tasks) - done
+        if skipped:
+            logger.info(f"Обробник {self.owner}: виконано завдань {done}, решту ({skipped}) виконують "
+                        f"інші обробники або їх взято менш ніж {self.min_interval:.0f} с тому.")
+        return done